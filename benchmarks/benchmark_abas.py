@@ -0,0 +1,192 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks.dataset_sintetico import PASTA_DADOS, gerar_dataset_sintetico
+from tabs.catalogo import modulos_e_classes
+
+ESCALAS = [1, 10, 100, 1000]
+PERCENTIS = [50, 90, 99]
+
+# Tempo máximo de uma execução da aba no AppTest (segundos); datasets grandes demoram no primeiro render
+TEMPO_LIMITE = 600
+
+
+def _script_aba(modulo, classe):
+    # Script executado pelo AppTest: renderiza uma única aba, como o seletor de pages/dashboards.py
+    import importlib
+
+    import streamlit as st
+
+    getattr(importlib.import_module(modulo), classe)(st.container())
+
+
+def _executar(app):
+    # Executa um rerun e retorna (tempo em ms, pico de memória alocada durante o rerun em KB, exceções).
+    # O pico cobre o rerun inteiro: a instrumentação das fases (RegistroRender) só lê o uso atual e não zera o pico
+    memoria_inicial = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    inicio = time.perf_counter()
+    app.run(timeout=TEMPO_LIMITE)
+    tempo_ms = (time.perf_counter() - inicio) * 1000
+    pico_kb = (tracemalloc.get_traced_memory()[1] - memoria_inicial) / 1024
+    return tempo_ms, pico_kb, [excecao.value for excecao in app.exception]
+
+
+def _resumir(escala, linhas, aba, interacao, amostras):
+    tempos = [tempo for tempo, _, _ in amostras]
+    resultado = {
+        'escala': escala,
+        'linhas': linhas,
+        'aba': aba,
+        'interacao': interacao,
+        'amostras': len(tempos),
+        'media_ms': float(np.mean(tempos)),
+        'max_ms': float(np.max(tempos)),
+        'pico_memoria_kb': float(max(pico for _, pico, _ in amostras)),
+        'erros': sorted({erro for _, _, erros in amostras for erro in erros}),
+    }
+    for percentil, valor in zip(PERCENTIS, np.percentile(tempos, PERCENTIS)):
+        resultado[f'p{percentil}_ms'] = float(valor)
+    return resultado
+
+
+def _interacoes(app):
+    # Interações genéricas a partir dos widgets da aba: alternar cada radio entre as duas primeiras opções
+    # (tipo de gráfico, escala de cores...) e cada multiselect entre só a primeira opção e a seleção padrão
+    interacoes = []
+
+    for indice, radio in enumerate(app.radio):
+        # O seletor de formato da imagem faz parte da exportação e não altera os dados da aba
+        if (radio.key or '').startswith('formato_') or len(radio.options) < 2:
+            continue
+        valores = [radio.options[1], radio.options[0]]
+        interacoes.append((f'radio: {radio.label}', 'radio', indice, valores))
+
+    for indice, multiselect in enumerate(app.multiselect):
+        if not multiselect.options:
+            continue
+        valores = [[multiselect.options[0]], list(multiselect.value)]
+        interacoes.append((f'multiselect: {multiselect.label}', 'multiselect', indice, valores))
+
+    for indice, selectbox in enumerate(app.selectbox):
+        if len(selectbox.options) < 2:
+            continue
+        valores = [selectbox.options[1], selectbox.options[0]]
+        interacoes.append((f'selectbox: {selectbox.label}', 'selectbox', indice, valores))
+
+    return interacoes
+
+
+def medir_abas(abas, repeticoes, escala):
+    # Mede cada aba no processo atual, usando o dataset apontado por DATATHON_DATASET
+    from streamlit.testing.v1 import AppTest
+
+    from util.cache import limpar_cache_etapas
+    from util.dados import carregar_dataset
+
+    tracemalloc.start()
+    resultados = []
+
+    # Carga do dataset (CSV ou artefato colunar), separada do render das abas
+    inicio = time.perf_counter()
+    linhas = len(carregar_dataset())
+    resultados.append({
+        'escala': escala, 'linhas': linhas, 'aba': None, 'interacao': 'carregar_dataset', 'amostras': 1,
+        'media_ms': (time.perf_counter() - inicio) * 1000,
+    })
+
+    for modulo, classe in abas:
+        # Cada aba começa com o cache das etapas vazio, para medir o primeiro render de forma isolada
+        limpar_cache_etapas()
+        app = AppTest.from_function(_script_aba, args=(modulo, classe), default_timeout=TEMPO_LIMITE)
+
+        resultados.append(_resumir(escala, linhas, classe, 'render_inicial', [_executar(app)]))
+        resultados.append(_resumir(escala, linhas, classe, 'rerun', [_executar(app) for _ in range(repeticoes)]))
+
+        for nome, tipo, indice, valores in _interacoes(app):
+            amostras = []
+            for repeticao in range(repeticoes):
+                getattr(app, tipo)[indice].set_value(valores[repeticao % len(valores)])
+                amostras.append(_executar(app))
+
+            # Volta ao estado padrão antes da próxima interação
+            if repeticoes % len(valores):
+                getattr(app, tipo)[indice].set_value(valores[-1])
+                app.run(timeout=TEMPO_LIMITE)
+
+            resultados.append(_resumir(escala, linhas, classe, nome, amostras))
+
+    return resultados
+
+
+def _rss_maximo_kb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def executar_escala(escala, repeticoes, abas, pasta):
+    # Cada escala roda em um processo separado: os caches do processo e o pico de RSS não se misturam
+    caminho = gerar_dataset_sintetico(escala, pasta=pasta)
+    comando = [
+        sys.executable, '-m', 'benchmarks.benchmark_abas', '--processo-escala', str(escala),
+        '--repeticoes', str(repeticoes), '--abas', *[classe for _, classe in abas]
+    ]
+    # Cache só em memória: o primeiro render de cada aba é medido sem resultados gravados em disco por outras execuções
+    ambiente = {**os.environ, 'DATATHON_DATASET': caminho, 'DATATHON_CACHE': 'memoria'}
+    saida = subprocess.run(comando, env=ambiente, check=True, capture_output=True, text=True).stdout
+    return json.loads(saida.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark headless das abas de dashboards com AppTest.')
+    parser.add_argument('--escalas', nargs='+', type=int, default=ESCALAS, help='Fatores de ampliação do dataset.')
+    parser.add_argument('--repeticoes', type=int, default=5, help='Repetições de cada interação.')
+    parser.add_argument('--abas', nargs='+', help='Classes das abas a medir (padrão: todas).')
+    parser.add_argument('--pasta-dados', default=PASTA_DADOS, help='Pasta dos datasets sintéticos.')
+    parser.add_argument('--saida', help='Arquivo JSON de resultados (padrão: saída padrão).')
+    parser.add_argument('--processo-escala', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    abas = [(modulo, classe) for modulo, classe in modulos_e_classes() if not args.abas or classe in args.abas]
+
+    # Processo filho: mede uma escala e imprime os resultados em uma única linha JSON
+    if args.processo_escala is not None:
+        resultados = medir_abas(abas, args.repeticoes, args.processo_escala)
+        print(json.dumps({'resultados': resultados, 'rss_maximo_kb': _rss_maximo_kb()}, ensure_ascii=False))
+        return
+
+    relatorio = {
+        'momento': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'repeticoes': args.repeticoes,
+        'escalas': {},
+        'resultados': [],
+    }
+    for escala in args.escalas:
+        medicao = executar_escala(escala, args.repeticoes, abas, args.pasta_dados)
+        relatorio['escalas'][str(escala)] = {'rss_maximo_kb': medicao['rss_maximo_kb']}
+        relatorio['resultados'].extend(medicao['resultados'])
+
+    texto = json.dumps(relatorio, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(texto)
+    else:
+        print(texto)
+
+
+if __name__ == '__main__':
+    main()
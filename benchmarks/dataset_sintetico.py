@@ -0,0 +1,51 @@
+import argparse
+import os
+
+import pandas as pd
+
+from util.preprocessamento import CAMINHO_CSV
+
+# Pasta padrão dos datasets sintéticos (ignorada pelo git)
+PASTA_DADOS = './benchmarks/dados'
+
+
+def caminho_sintetico(escala, pasta=PASTA_DADOS):
+    return os.path.join(pasta, f'PEDE_PASSOS_DATASET_FIAP_x{escala}.csv')
+
+
+def gerar_dataset_sintetico(escala, origem=CAMINHO_CSV, pasta=PASTA_DADOS):
+    # Replica as linhas do dataset original `escala` vezes, com nomes de aluno únicos em cada cópia.
+    # O CSV é lido como texto e gravado cópia a cópia, sem materializar o dataset ampliado em memória.
+    if escala == 1:
+        return origem
+
+    destino = caminho_sintetico(escala, pasta)
+    if os.path.exists(destino):
+        return destino
+
+    os.makedirs(pasta, exist_ok=True)
+    original = pd.read_csv(origem, delimiter=';', dtype=str, keep_default_na=False)
+
+    destino_tmp = f'{destino}.tmp'
+    with open(destino_tmp, 'w', encoding='utf-8', newline='') as arquivo:
+        for copia in range(escala):
+            parte = original.assign(NOME=original['NOME'] + f'-{copia}')
+            parte.to_csv(arquivo, sep=';', index=False, header=copia == 0)
+
+    os.replace(destino_tmp, destino)
+    return destino
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera datasets sintéticos ampliados a partir do CSV original.')
+    parser.add_argument('escalas', nargs='+', type=int, help='Fatores de ampliação (ex.: 10 100 1000).')
+    parser.add_argument('--origem', default=CAMINHO_CSV, help='CSV original.')
+    parser.add_argument('--pasta', default=PASTA_DADOS, help='Pasta de destino dos CSVs gerados.')
+    args = parser.parse_args()
+
+    for escala in args.escalas:
+        print(f'x{escala}: {gerar_dataset_sintetico(escala, args.origem, args.pasta)}')
+
+
+if __name__ == '__main__':
+    main()
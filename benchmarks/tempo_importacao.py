@@ -0,0 +1,128 @@
+import argparse
+import ast
+import json
+import subprocess
+import sys
+
+import numpy as np
+
+from tabs.catalogo import modulos_e_classes
+
+# Página cujas importações formam a inicialização a frio dos dashboards
+PAGINA = 'pages/dashboards.py'
+
+# Orçamentos de tempo de importação (ms): módulos importados pela página, e importação adicional de cada aba
+# quando ela é aberta pela primeira vez (com a página já carregada)
+ORCAMENTO_PAGINA_MS = 1500
+ORCAMENTO_ABA_MS = 150
+
+# Linha escrita antes das importações medidas, para separá-las das importações da inicialização do Python
+MARCADOR = '--inicio-medicao--'
+
+
+def modulos_da_pagina(caminho=PAGINA):
+    # Módulos importados no nível superior do script da página, na ordem em que aparecem
+    with open(caminho, encoding='utf-8') as arquivo:
+        arvore = ast.parse(arquivo.read())
+
+    modulos = []
+    for no in arvore.body:
+        if isinstance(no, ast.Import):
+            modulos.extend(alias.name for alias in no.names)
+        elif isinstance(no, ast.ImportFrom) and no.module:
+            modulos.append(no.module)
+    return modulos
+
+
+def _ler_importtime(saida):
+    # Linhas do -X importtime após o marcador: (módulo, profundidade, próprio em ms, acumulado em ms)
+    linhas = saida.split(MARCADOR, 1)[-1].splitlines()
+    medicoes = []
+    for linha in linhas:
+        if not linha.startswith('import time:') or 'imported package' in linha:
+            continue
+        cabecalho, acumulado, nome = linha.split('|')
+        proprio = int(cabecalho.split(':')[1])
+        # O nome vem depois de um espaço fixo e é recuado em 2 espaços por nível de importação aninhada
+        nome = nome[1:].rstrip()
+        profundidade = (len(nome) - len(nome.lstrip())) // 2
+        medicoes.append((nome.strip(), profundidade, proprio / 1000, int(acumulado) / 1000))
+    return medicoes
+
+
+def medir_importacao(modulos, previos=()):
+    # Importa `previos` (sem medir) e depois `modulos` em um processo novo; retorna as medições destes últimos
+    codigo = ''.join(f'import {modulo}\n' for modulo in previos)
+    codigo += f'import sys\nsys.stderr.write({MARCADOR!r} + "\\n")\n'
+    codigo += ''.join(f'import {modulo}\n' for modulo in modulos)
+
+    resultado = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', codigo], capture_output=True, text=True, check=True
+    )
+    return _ler_importtime(resultado.stderr)
+
+
+def _tempo_total(medicoes):
+    return sum(acumulado for _, profundidade, _, acumulado in medicoes if profundidade == 0)
+
+
+def medir(modulos, previos=(), repeticoes=3):
+    # Mediana de várias execuções; a primeira execução (que pode compilar os .pyc) é descartada
+    medir_importacao(modulos, previos)
+    execucoes = [medir_importacao(modulos, previos) for _ in range(repeticoes)]
+    tempos = [_tempo_total(medicoes) for medicoes in execucoes]
+    mais_lentos = sorted(execucoes[-1], key=lambda medicao: medicao[3], reverse=True)[:10]
+    return float(np.median(tempos)), [
+        {'modulo': modulo, 'acumulado_ms': acumulado, 'proprio_ms': proprio}
+        for modulo, _, proprio, acumulado in mais_lentos
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Mede o tempo de importação (python -X importtime) da página de dashboards e de cada aba.'
+    )
+    parser.add_argument('--repeticoes', type=int, default=3, help='Execuções por medição (usa a mediana).')
+    parser.add_argument('--orcamento-pagina-ms', type=float, default=ORCAMENTO_PAGINA_MS)
+    parser.add_argument('--orcamento-aba-ms', type=float, default=ORCAMENTO_ABA_MS)
+    parser.add_argument('--saida', help='Arquivo JSON de resultados (padrão: saída padrão).')
+    args = parser.parse_args()
+
+    modulos_pagina = modulos_da_pagina()
+    tempo_pagina, mais_lentos = medir(modulos_pagina, repeticoes=args.repeticoes)
+    relatorio = {
+        'pagina': {
+            'modulos': modulos_pagina,
+            'tempo_ms': tempo_pagina,
+            'orcamento_ms': args.orcamento_pagina_ms,
+            'mais_lentos': mais_lentos,
+        },
+        'abas': [],
+    }
+
+    # Custo adicional de abrir cada aba, com os módulos da página já importados
+    for modulo, classe in modulos_e_classes():
+        tempo_aba, mais_lentos = medir([modulo], previos=modulos_pagina, repeticoes=args.repeticoes)
+        relatorio['abas'].append({
+            'aba': classe, 'modulo': modulo, 'tempo_ms': tempo_aba, 'orcamento_ms': args.orcamento_aba_ms,
+            'mais_lentos': mais_lentos[:3],
+        })
+
+    relatorio['dentro_do_orcamento'] = (
+        tempo_pagina <= args.orcamento_pagina_ms
+        and all(aba['tempo_ms'] <= args.orcamento_aba_ms for aba in relatorio['abas'])
+    )
+
+    texto = json.dumps(relatorio, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(texto)
+    else:
+        print(texto)
+
+    # Código de saída diferente de zero quando algum orçamento é excedido (útil em CI)
+    sys.exit(0 if relatorio['dentro_do_orcamento'] else 1)
+
+
+if __name__ == '__main__':
+    main()
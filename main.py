@@ -1,4 +1,5 @@
 import streamlit as st
+from util.aquecimento import iniciar_aquecimento
 from util.layout import output_layout
 import warnings
 
@@ -7,6 +8,9 @@ warnings.filterwarnings("ignore")
 st.set_page_config(page_title="Datathon | Fase 5 | FIAP", layout='wide')
 output_layout()
 
+# Aquecimento dos caches das abas em segundo plano, disparado uma única vez por processo do servidor
+iniciar_aquecimento()
+
 st.header(':blue[FIAP PÓS TECH – DATA ANALYTICS, 2024]',divider="orange")
 
 st.subheader(':orange[Datathon: Associação Passos Mágicos]')
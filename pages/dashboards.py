@@ -1,18 +1,17 @@
 import streamlit as st
-from tabs.graficos.pontoVirada_tab import PontoViradaTab
-from tabs.graficos.categorizacaoInde_tab import CategorizacaoIndeTab
-from tabs.graficos.evolucaoInde_tab import EvolucaoIndeTab
-from tabs.graficos.distribuicaoPedra_tab import DistribuicaoPedraTab
-from tabs.graficos.comparacaoPedra_tab import ComparacaoPedraTab
-from tabs.graficos.correlacaoIndicadores_tab import CorrelacaoIndicadoresTab
-from tabs.graficos.diferencaInde_tab import DiferencaIndeTab
-from tabs.graficos.notasDisciplina_tab import NotasDisciplinaTab
-from tabs.graficos.frequenciaPedra_tab import FrequenciaPedrasTab
+from tabs.catalogo import ABAS
+from tabs.navegador import NavegadorTabs
+from util.aquecimento import iniciar_aquecimento
+from util.coorte import barra_coorte
+from util.diagnostico import configurar_diagnostico, diagnostico_ativo, exibir_painel_diagnostico
 from util.layout import output_layout
 
 st.set_page_config(page_title="Dashboards | Datathon | FIAP", layout='wide')
 output_layout()
 
+# Aquecimento dos caches das abas em segundo plano, disparado uma única vez por processo do servidor
+iniciar_aquecimento()
+
 with st.container():
     st.header(':blue[Análises Gráficas Interativas: Descubra os Dados Através de Dashboards]',divider="orange")
 
@@ -29,32 +28,24 @@ st.markdown("<br>", unsafe_allow_html=True)
 
 st.markdown(
     """
-    <small>Para **:blue[navegar entre as abas]**, posicione o mouse em cima das abas e segure a tecla **:blue[[SHIFT]]** e utilize o botão central de scroll do mouse 🖱</small>
+    <small>Para **:blue[navegar entre os dashboards]**, escolha o gráfico desejado no seletor abaixo. Apenas o dashboard selecionado é carregado 🖱</small>
     """,
     unsafe_allow_html=True
 )
 
 
-tab0, tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs(
-    tabs=[
-        ":one: Pontos de Virada",
-        ":two: Categorização INDE",
-        ":three: Evolução INDE",
-        ":four: INDE vs Pedra",
-        ":five: Distribuição de Pedras por Instituição",
-        ":six: Correlação Indicadores",
-        ":seven: Diferenças INDE",
-        ":eight: Notas por Disciplina 2022",
-        ":nine: Distribuição de Alunos por Pedra"
-    ]
+# Instrumentação opcional das abas (memória e perfil), habilitada pela URL
+configurar_diagnostico()
+
+# Filtro global de coorte na barra lateral, aplicado a todas as abas
+barra_coorte()
+
+# As abas são referenciadas por 'módulo:Classe': só o módulo da aba selecionada é importado
+NavegadorTabs(
+    abas=ABAS,
+    modo='seletor'
 )
-PontoViradaTab(tab0)
-CategorizacaoIndeTab(tab1)
-EvolucaoIndeTab(tab2)
-ComparacaoPedraTab(tab3)
-DistribuicaoPedraTab(tab4)
-CorrelacaoIndicadoresTab(tab5)
-DiferencaIndeTab(tab6)
-NotasDisciplinaTab(tab7)
-FrequenciaPedrasTab(tab8)
-    
\ No newline at end of file
+
+# Painel de diagnóstico, exibido apenas quando a URL contém ?diagnostico
+if diagnostico_ativo():
+    exibir_painel_diagnostico()
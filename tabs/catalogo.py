@@ -0,0 +1,35 @@
+import importlib
+
+# Abas dos dashboards, na ordem de exibição: (título, 'módulo:Classe').
+# Os módulos das abas só são importados quando a aba é usada pela primeira vez (ver carregar_aba)
+ABAS = [
+    (":one: Pontos de Virada", 'tabs.graficos.pontoVirada_tab:PontoViradaTab'),
+    (":two: Categorização INDE", 'tabs.graficos.categorizacaoInde_tab:CategorizacaoIndeTab'),
+    (":three: Evolução INDE", 'tabs.graficos.evolucaoInde_tab:EvolucaoIndeTab'),
+    (":four: INDE vs Pedra", 'tabs.graficos.comparacaoPedra_tab:ComparacaoPedraTab'),
+    (":five: Distribuição de Pedras por Instituição", 'tabs.graficos.distribuicaoPedra_tab:DistribuicaoPedraTab'),
+    (":six: Correlação Indicadores", 'tabs.graficos.correlacaoIndicadores_tab:CorrelacaoIndicadoresTab'),
+    (":seven: Diferenças INDE", 'tabs.graficos.diferencaInde_tab:DiferencaIndeTab'),
+    (":eight: Notas por Disciplina 2022", 'tabs.graficos.notasDisciplina_tab:NotasDisciplinaTab'),
+    (":nine: Distribuição de Alunos por Pedra", 'tabs.graficos.frequenciaPedra_tab:FrequenciaPedrasTab'),
+    (":keycap_ten: Perfil do Aluno", 'tabs.graficos.perfilAluno_tab:PerfilAlunoTab'),
+]
+
+
+def separar_referencia(referencia):
+    # 'módulo:Classe' -> (módulo, classe)
+    modulo, classe = referencia.split(':')
+    return modulo, classe
+
+
+def carregar_aba(referencia):
+    # Aceita a própria classe da aba ou a referência 'módulo:Classe', importando o módulo só neste momento
+    if not isinstance(referencia, str):
+        return referencia
+    modulo, classe = separar_referencia(referencia)
+    return getattr(importlib.import_module(modulo), classe)
+
+
+def modulos_e_classes():
+    # Pares (módulo, classe) de todas as abas, sem importá-las
+    return [separar_referencia(referencia) for _, referencia in ABAS]
@@ -1,42 +1,27 @@
 import streamlit as st
 import pandas as pd
-import seaborn as sns
 import plotly.graph_objects as go
 from tabs.tab import TabInterface
+from util.cache import etapa
+from util.coorte import versao_coorte_atual
+from util.dados import dataset_completo
+from util.exportacao import botao_download_csv, botao_download_grafico
+from util.indicadores import calcular_variacao_inde, classificar_tendencia_inde
 
 
 class CategorizacaoIndeTab(TabInterface):
+    COLUNAS = {'NOME': 'object', 'INDE_{ano}': 'float64'}
+
     def __init__(self, tab):
         self.tab = tab
         self.render()
 
     def render(self):
         with self.tab:
-            # Carregar os dados
-            file_path = './dataset/PEDE_PASSOS_DATASET_FIAP.csv'
-            df = pd.read_csv(file_path, delimiter=';')
-        
-            # Preparar os dados
-            df_clean = df.dropna()
-
-            # Lista de colunas não relevantes para nosso estudo
-            colunas_para_remover = [
-                'INSTITUICAO_ENSINO_ALUNO_2020', 'IDADE_ALUNO_2020', 'ANOS_PM_2020', 'FASE_TURMA_2020', 'INDE_CONCEITO_2020',
-                'PEDRA_2020', 'DESTAQUE_IEG_2020', 'DESTAQUE_IDA_2020', 'DESTAQUE_IPV_2020', 'FASE_2021', 'TURMA_2021',
-                'INSTITUICAO_ENSINO_ALUNO_2021', 'SINALIZADOR_INGRESSANTE_2021', 'PEDRA_2021', 'REC_EQUIPE_1_2021',
-                'REC_EQUIPE_2_2021', 'REC_EQUIPE_3_2021', 'REC_EQUIPE_4_2021', 'NIVEL_IDEAL_2021', 'DEFASAGEM_2021',
-                'FASE_2022', 'TURMA_2022', 'ANO_INGRESSO_2022', 'BOLSISTA_2022', 'PEDRA_2022', 'DESTAQUE_IEG_2022',
-                'DESTAQUE_IDA_2022', 'DESTAQUE_IPV_2022', 'NOTA_PORT_2022', 'NOTA_MAT_2022', 'NOTA_ING_2022', 'QTD_AVAL_2022',
-                'REC_AVA_1_2022', 'REC_AVA_2_2022', 'REC_AVA_3_2022', 'REC_AVA_4_2022', 'INDICADO_BOLSA_2022', 'NIVEL_IDEAL_2022'
-            ]
-
-            # Criando um DataFrame com as novas colunas
-            df_cleaned = df_clean.drop(columns=colunas_para_remover)
-
-            # Convertendo as colunas dos indicadores anuais para formato numérico
-            df_cleaned['INDE_2020'] = pd.to_numeric(df_cleaned['INDE_2020'], errors='coerce')
-            df_cleaned['INDE_2021'] = pd.to_numeric(df_cleaned['INDE_2021'], errors='coerce')
-            df_cleaned['INDE_2022'] = pd.to_numeric(df_cleaned['INDE_2022'], errors='coerce')
+            self.fase('carregar')
+
+            # Versão do dataset (com a coorte da barra lateral): chave das etapas em cache (limpar → agregar → filtrar → figura)
+            versao = versao_coorte_atual()
 
             # Filtros interativos com chave única
             anos_disponiveis = ['2020', '2021', '2022']
@@ -47,50 +32,10 @@ class CategorizacaoIndeTab(TabInterface):
             # Aplicar filtro de anos selecionados
             anos_indices = [i for i, ano in enumerate(anos_disponiveis) if ano in anos_selecionados]
 
-            # Função para determinar a tendência com base nas notas
-            def calcular_tendencia(inde_2020, inde_2021, inde_2022):
-                if inde_2021 > inde_2020 and inde_2022 > inde_2021:
-                    return 'Aumento'
-                elif inde_2021 < inde_2020 and inde_2022 < inde_2021:
-                    return 'Queda'
-                elif inde_2021 > inde_2020 and inde_2022 < inde_2021:
-                    return 'Aumento seguido de queda'
-                elif inde_2021 < inde_2020 and inde_2022 > inde_2021:
-                    return 'Queda seguida de aumento'
-                elif inde_2020 == inde_2021 and inde_2021 > inde_2022:
-                    return 'Queda'
-                elif inde_2020 == inde_2021 and inde_2021 < inde_2022:
-                    return 'Aumento'
-                else:
-                    return 'Estável'
-
-            # Aplicando a função para criar a nova coluna INDE_TENDENCIA
-            df_cleaned['INDE_TENDENCIA'] = df_cleaned.apply(
-                lambda row: calcular_tendencia(row['INDE_2020'], row['INDE_2021'], row['INDE_2022']),
-                axis=1
-            )
-
-            # Função para calcular a variação percentual
-            def calcular_variacao(inde_2020, inde_2022):
-                if inde_2020 == 0:
-                    if inde_2022 == 0:
-                        return 0
-                    else:
-                        return 'Aumento Infinito'
-                else:
-                    return ((inde_2022 - inde_2020) / abs(inde_2020)) * 100
-
-            # Aplicando a função para criar a nova coluna INDE_VARIACAO
-            df_cleaned['INDE_VARIACAO'] = df_cleaned.apply(
-                lambda row: calcular_variacao(row['INDE_2020'], row['INDE_2022']),
-                axis=1
-            )
+            self.fase('preparar')
 
             # Contar o número de ocorrências de cada categoria em INDE_TENDENCIA
-            tendencia_counts = df_cleaned['INDE_TENDENCIA'].value_counts()
-
-            # Criar uma paleta de cores pastéis
-            pastel_palette = sns.color_palette("deep", n_colors=len(tendencia_counts))
+            tendencia_counts = self.agregar(versao)
 
             # Gerar funcionalidade que mostra os detalhes da visualização escolhida pelo usuário
             anos_str = ', '.join(anos_selecionados)
@@ -100,23 +45,15 @@ class CategorizacaoIndeTab(TabInterface):
                 st.write(f"✅ **Anos Selecionados:** {anos_str}.")
                 st.write(f"📊 **{tipo_grafico_str}**")
 
-            fig = self.plot_graph(tendencia_counts, tipo_grafico, pastel_palette)
+            self.fase('plotar')
+
+            fig = self.construir_figura(versao, tipo_grafico)
             st.plotly_chart(fig)
 
             st.subheader(':blue[Tabela de Categorização por Ano]', divider='orange')
 
-            # Verificar o comprimento correto para cada coluna
-            anos_filtrados = anos_selecionados
-            tendencias_filtradas = tendencia_counts.index.tolist()
-            contagens_filtradas = tendencia_counts.values.tolist()
-
-            # Garantir que o tamanho de cada lista seja o mesmo antes de criar o DataFrame
-            tamanho_minimo = min(len(anos_filtrados), len(tendencias_filtradas), len(contagens_filtradas))
-            tabela_dados = pd.DataFrame({
-                'Ano': anos_filtrados[:tamanho_minimo],
-                'Tendência': tendencias_filtradas[:tamanho_minimo],
-                'Contagem': contagens_filtradas[:tamanho_minimo]
-            })
+            # Exibir tabela com os dados filtrados
+            tabela_dados = self.filtrar(versao, tuple(anos_selecionados))
             st.write(tabela_dados.set_index("Ano"))
 
             st.markdown("<br>", unsafe_allow_html=True)
@@ -138,11 +75,13 @@ class CategorizacaoIndeTab(TabInterface):
             
             st.markdown("<br>", unsafe_allow_html=True)
 
+            self.fase('exportar')
+
             st.subheader(':blue[Exportação de Dados e Gráficos]', divider='orange')
 
             # Botão para download dos dados filtrados
             csv_data = tabela_dados.to_csv(index=True).encode('utf-8')
-            st.download_button(
+            botao_download_csv(
                 label="Download dos Dados Filtrados",
                 data=csv_data,
                 file_name="categorizacao_inde_dados_filtrados.csv",
@@ -152,7 +91,46 @@ class CategorizacaoIndeTab(TabInterface):
             # Adicionar botão para download do gráfico como imagem
             self.download_graph_image(fig)
 
-    def plot_graph(self, tendencia_counts, tipo_grafico, pastel_palette):
+    @etapa
+    def classificar(self, versao):
+        # Apenas as colunas do manifesto da aba são lidas (as demais não são relevantes para nosso estudo)
+        df_cleaned = dataset_completo(versao, self.manifesto())
+
+        # Classificar a tendência e calcular a variação percentual do INDE de forma vetorizada. O resultado de
+        # dataset_completo é compartilhado pelo cache das etapas: as colunas novas vão para um novo DataFrame (assign)
+        return df_cleaned.assign(
+            INDE_TENDENCIA=classificar_tendencia_inde(
+                df_cleaned['INDE_2020'], df_cleaned['INDE_2021'], df_cleaned['INDE_2022']
+            ),
+            INDE_VARIACAO=calcular_variacao_inde(df_cleaned['INDE_2020'], df_cleaned['INDE_2022']),
+        )
+
+    @etapa
+    def agregar(self, versao):
+        return self.classificar(versao)['INDE_TENDENCIA'].value_counts()
+
+    @etapa
+    def filtrar(self, versao, anos_selecionados):
+        # Verificar o comprimento correto para cada coluna
+        anos_filtrados = list(anos_selecionados)
+        tendencia_counts = self.agregar(versao)
+        tendencias_filtradas = tendencia_counts.index.tolist()
+        contagens_filtradas = tendencia_counts.values.tolist()
+
+        # Garantir que o tamanho de cada lista seja o mesmo antes de criar o DataFrame
+        tamanho_minimo = min(len(anos_filtrados), len(tendencias_filtradas), len(contagens_filtradas))
+        tabela_dados = pd.DataFrame({
+            'Ano': anos_filtrados[:tamanho_minimo],
+            'Tendência': tendencias_filtradas[:tamanho_minimo],
+            'Contagem': contagens_filtradas[:tamanho_minimo]
+        })
+        return tabela_dados
+
+    @etapa
+    def construir_figura(self, versao, tipo_grafico):
+        return self.plot_graph(self.agregar(versao), tipo_grafico)
+
+    def plot_graph(self, tendencia_counts, tipo_grafico):
         # Criar a figura interativa com Plotly
         fig = go.Figure()
 
@@ -192,11 +170,5 @@ class CategorizacaoIndeTab(TabInterface):
         return fig
 
     def download_graph_image(self, fig):
-        # Função para permitir download da imagem do gráfico em PNG
-        img_bytes = fig.to_image(format="png")
-        st.download_button(
-            label="Download do Gráfico",
-            data=img_bytes,
-            file_name="grafico_categorizacao_inde.png",
-            mime="image/png"
-        )
+        # Função para permitir download da imagem do gráfico, gerada apenas quando solicitada pelo usuário
+        botao_download_grafico(fig, "grafico_categorizacao_inde.png", label="Download do Gráfico")
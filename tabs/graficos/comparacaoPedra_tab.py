@@ -1,57 +1,43 @@
 import streamlit as st
-import pandas as pd
 import plotly.graph_objects as go
 from tabs.tab import TabInterface
+from util.cache import etapa
+from util.coorte import versao_coorte_atual
+from util.cubo import COLUNAS_CUBO, obter_cubo
+from util.exportacao import botao_download_csv, botao_download_grafico
+from util.formato_longo import NIVEL_ANO
 
 
 class ComparacaoPedraTab(TabInterface):
+    COLUNAS = COLUNAS_CUBO
+    PEDRAS = ['Topázio', 'Ametista', 'Ágata', 'Quartzo']
+    ANOS = ['2020', '2021', '2022']
+
+    # Mesmo filtro de filtrar_alunos_com_pedra, em SQL, para o motor de consultas DuckDB
+    CONDICAO_ALUNOS_COM_PEDRA = ' AND '.join(
+        f"PEDRA_{ano} IN ('Topázio', 'Ametista', 'Ágata', 'Quartzo')" for ano in ANOS
+    )
+
     def __init__(self, tab):
         self.tab = tab
         self.render()
 
     def render(self):
         with self.tab:
-            # Carregar os dados
-            file_path = './dataset/PEDE_PASSOS_DATASET_FIAP.csv'
-            df = pd.read_csv(file_path, delimiter=';')
-
-            # Preparar os dados
-            df_clean = df.dropna()
-
-            # Filtrar os dados para alunos com categorias "Pedra"
-            pedra_categories = ['Topázio', 'Ametista', 'Ágata', 'Quartzo']
-            comparison_data = df_clean[
-                df_clean['PEDRA_2020'].isin(pedra_categories) &
-                df_clean['PEDRA_2021'].isin(pedra_categories) &
-                df_clean['PEDRA_2022'].isin(pedra_categories)
-            ]
-
-            # Converter colunas INDE para tipo numérico
-            comparison_data['INDE_2020'] = pd.to_numeric(comparison_data['INDE_2020'], errors='coerce')
-            comparison_data['INDE_2021'] = pd.to_numeric(comparison_data['INDE_2021'], errors='coerce')
-            comparison_data['INDE_2022'] = pd.to_numeric(comparison_data['INDE_2022'], errors='coerce')
+            self.fase('carregar')
+
+            # Versão do dataset (com a coorte da barra lateral): chave das etapas em cache (agregar → filtrar → figura)
+            versao = versao_coorte_atual()
 
             # Filtros interativos
-            pedras_disponiveis = ['Topázio', 'Ametista', 'Ágata', 'Quartzo']
-            pedras_selecionadas = st.multiselect('Selecione as categorias de Pedra:', options=pedras_disponiveis, default=pedras_disponiveis)
+            pedras_selecionadas = st.multiselect('Selecione as categorias de Pedra:', options=self.PEDRAS, default=self.PEDRAS)
 
             tipo_grafico = st.radio("Escolha o tipo de gráfico:", ("Barras", "Linhas"))
 
-            # Filtrar os dados com base nas categorias de pedras selecionadas
-            comparison_data_filtrado = comparison_data[comparison_data['PEDRA_2020'].isin(pedras_selecionadas)]
-
-            # Calcular a média do INDE para cada categoria de Pedra em cada ano
-            mean_inde_by_pedra = comparison_data_filtrado.groupby('PEDRA_2020')[['INDE_2020', 'INDE_2021', 'INDE_2022']].mean()
-
-             # Calcular a média dos três anos (2020, 2021, 2022) para cada pedra
-            mean_inde_by_pedra['INDE_Media_2020_2022'] = mean_inde_by_pedra[['INDE_2020', 'INDE_2021', 'INDE_2022']].mean(axis=1)
-
-            # Aplicar filtro de pedras selecionadas
-            pedras_filtradas = list(mean_inde_by_pedra.index)
+            self.fase('preparar')
 
-            # Ordem de exibição das pedras no gráfico
-            pedras_filtradas = ['Topázio', 'Ametista', 'Ágata', 'Quartzo']
-            mean_inde_by_pedra = mean_inde_by_pedra.reindex(pedras_filtradas)
+            # Média do INDE por ano e pela média dos três anos, na ordem de exibição das pedras
+            mean_inde_by_pedra = self.filtrar(versao, tuple(pedras_selecionadas))
 
             # Gerar funcionalidade que mostra os detalhes da visualização escolhida pelo usuário
             pedras_str = ', '.join(pedras_selecionadas)
@@ -61,8 +47,10 @@ class ComparacaoPedraTab(TabInterface):
                 st.write(f"✅ **Categorias de Pedra Selecionadas:** {pedras_str}.")
                 st.write(f"📊 **{tipo_grafico_str}**")
 
+            self.fase('plotar')
+
             # Gerar gráfico com Plotly
-            fig = self.plot_graph(pedras_filtradas, mean_inde_by_pedra, tipo_grafico)
+            fig = self.construir_figura(versao, tuple(pedras_selecionadas), tipo_grafico)
             st.plotly_chart(fig)
 
             st.markdown("<br>", unsafe_allow_html=True)    
@@ -103,11 +91,13 @@ class ComparacaoPedraTab(TabInterface):
 
             st.markdown("<br>", unsafe_allow_html=True)
 
+            self.fase('exportar')
+
             st.subheader(':blue[Exportação de Dados e Gráficos]', divider='orange')
 
             # Botão para download dos dados filtrados
             csv_data = tabela_dados.to_csv(index=False).encode('utf-8')
-            st.download_button(
+            botao_download_csv(
                 label="Download dos Dados Filtrados",
                 data=csv_data,
                 file_name="comparacao_pedra_dados_filtrados.csv",
@@ -117,6 +107,45 @@ class ComparacaoPedraTab(TabInterface):
             # Adicionar botão para download do gráfico como imagem
             self.download_graph_image(fig)
 
+    @etapa
+    def agregar(self, versao):
+        # Cubo agregado dos alunos com categorias "Pedra" válidas em todos os anos
+        # O filtro é passado pela classe (função sem instância), que é estável entre reruns na chave do cache
+        return obter_cubo(
+            'pedras_validas', ComparacaoPedraTab.filtrar_alunos_com_pedra, versao=versao,
+            condicao_sql=self.CONDICAO_ALUNOS_COM_PEDRA
+        )
+
+    @etapa
+    def filtrar(self, versao, pedras_selecionadas):
+        # Calcular a média do INDE em cada ano para as categorias de Pedra (de 2020) selecionadas
+        mean_inde_by_pedra = self.agregar(versao).media(
+            'INDE', por=['PEDRA_INICIAL', NIVEL_ANO], PEDRA_INICIAL=list(pedras_selecionadas)
+        ).unstack(NIVEL_ANO)
+        # Sem pedras selecionadas o unstack não gera colunas: os anos são garantidos (com NaN)
+        mean_inde_by_pedra = mean_inde_by_pedra.reindex(columns=self.ANOS)
+        mean_inde_by_pedra.columns = [f'INDE_{ano}' for ano in mean_inde_by_pedra.columns]
+        mean_inde_by_pedra.index.name = 'PEDRA_2020'
+
+        # Calcular a média dos três anos (2020, 2021, 2022) para cada pedra
+        mean_inde_by_pedra['INDE_Media_2020_2022'] = mean_inde_by_pedra[['INDE_2020', 'INDE_2021', 'INDE_2022']].mean(axis=1)
+
+        # Ordem de exibição das pedras no gráfico
+        return mean_inde_by_pedra.reindex(['Topázio', 'Ametista', 'Ágata', 'Quartzo'])
+
+    @etapa
+    def construir_figura(self, versao, pedras_selecionadas, tipo_grafico):
+        mean_inde_by_pedra = self.filtrar(versao, pedras_selecionadas)
+        return self.plot_graph(list(mean_inde_by_pedra.index), mean_inde_by_pedra, tipo_grafico)
+
+    @staticmethod
+    def filtrar_alunos_com_pedra(df):
+        # Mantém os alunos cuja Pedra é uma das quatro categorias em todos os anos comparados (os mesmos da condição
+        # SQL; o cubo pode trazer anos a mais do dataset)
+        pedra_categories = ['Topázio', 'Ametista', 'Ágata', 'Quartzo']
+        colunas_pedra = [f'PEDRA_{ano}' for ano in ComparacaoPedraTab.ANOS]
+        return df[df[colunas_pedra].isin(pedra_categories).all(axis=1)]
+
     def plot_graph(self, pedras, mean_inde_by_pedra, tipo_grafico):
         # Criar a figura interativa com Plotly
         fig = go.Figure()
@@ -172,11 +201,5 @@ class ComparacaoPedraTab(TabInterface):
         return fig
 
     def download_graph_image(self, fig):
-        # Função para permitir download da imagem do gráfico em PNG
-        img_bytes = fig.to_image(format="png")
-        st.download_button(
-            label="Download do Gráfico",
-            data=img_bytes,
-            file_name="comparacao_pedra_grafico.png",
-            mime="image/png"
-        )
+        # Função para permitir download da imagem do gráfico, gerada apenas quando solicitada pelo usuário
+        botao_download_grafico(fig, "comparacao_pedra_grafico.png", label="Download do Gráfico")
@@ -1,37 +1,45 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
 from tabs.tab import TabInterface
+from util.cache import etapa
+from util.coorte import versao_coorte_atual
+from util.correlacao import EstatisticasCorrelacao
+from util.dados import dataset_completo
+from util.exportacao import botao_download_csv, botao_download_grafico
 
 class CorrelacaoIndicadoresTab(TabInterface):
+    INDICADORES = ['INDE', 'IAA', 'IDA', 'IEG', 'IPS', 'IPP']
+    ANOS = ['2020', '2021', '2022']
+    METODOS = ['Pearson', 'Spearman']
+    COLUNAS = dict.fromkeys(['INDE_{ano}', 'IAA_{ano}', 'IDA_{ano}', 'IEG_{ano}', 'IPS_{ano}', 'IPP_{ano}'], 'float64')
+
     def __init__(self, tab):
         self.tab = tab
         self.render()
 
     def render(self):
         with self.tab:
-            # Carregar os dados
-            file_path = './dataset/PEDE_PASSOS_DATASET_FIAP.csv'
-            df = pd.read_csv(file_path, delimiter=';')
-
-            # Preparar os dados
-            df_clean = df.dropna()
-
-            # Selecionar as colunas de interesse para correlação
-            correlation_columns = [
-                'INDE_2020', 'INDE_2021', 'INDE_2022',
-                'IAA_2020', 'IAA_2021', 'IAA_2022',
-                'IDA_2020', 'IDA_2021', 'IDA_2022',
-                'IEG_2020', 'IEG_2021', 'IEG_2022',
-                'IPS_2020', 'IPS_2021', 'IPS_2022',
-                'IPP_2020', 'IPP_2021', 'IPP_2022'
-            ]
-
-            # Criar uma nova tabela com as colunas de interesse
-            correlation_data = df_clean[correlation_columns].apply(pd.to_numeric, errors='coerce')
+            self.fase('carregar')
 
-            # Calcular a matriz de correlação
-            correlation_matrix = correlation_data.corr()
+            # Versão do dataset (com a coorte da barra lateral): chave das etapas em cache (limpar → agregar → figura)
+            versao = versao_coorte_atual()
+
+            # Escolher os indicadores, os anos e o método: a matriz é fatiada das estatísticas já calculadas
+            indicadores = st.multiselect(
+                'Selecione os Indicadores:',
+                options=self.INDICADORES,
+                default=self.INDICADORES
+            )
+            anos = st.multiselect(
+                'Selecione os Anos:',
+                options=self.ANOS,
+                default=self.ANOS
+            )
+            metodo = st.radio(
+                'Escolha o Método de Correlação:',
+                options=self.METODOS,
+                index=0,
+                horizontal=True
+            )
 
             # Escolher a escala de cores
             color_scale_option = st.selectbox(
@@ -40,22 +48,38 @@ class CorrelacaoIndicadoresTab(TabInterface):
                 index=0
             )
 
+            colunas = self.colunas_selecionadas(indicadores, anos)
+
+            if len(colunas) < 2:
+                st.warning("Selecione indicadores e anos que somem pelo menos duas colunas para calcular a correlação.")
+                return
+
+            self.fase('preparar')
+
+            # Calcular a matriz de correlação
+            correlation_matrix = self.filtrar(versao, metodo, colunas)
+
             # Gerar funcionalidade que mostra os detalhes da visualização escolhida pelo usuário
             with st.expander("Detalhes da Visualização"):
                 st.write("✅ **Indicadores Selecionados para o Heatmap de Correlação:**")
-                st.write(", ".join(correlation_columns))
+                st.write(", ".join(correlation_matrix.columns))
+                st.write(f"✅ **Método:** {metodo}")
+
+            self.fase('plotar')
 
             # Plotar o heatmap de correlação usando Plotly Express
-            fig = self.plot_heatmap(correlation_matrix, color_scale_option)
+            fig = self.construir_figura(versao, metodo, colunas, color_scale_option)
 
             # Exibir o gráfico
             st.plotly_chart(fig)
 
+            self.fase('exportar')
+
             st.subheader(':blue[Exportação de Dados e Gráficos]', divider='orange')
 
             # Botão para download dos dados filtrados (correlação)
             csv_data = correlation_matrix.to_csv(index=True).encode('utf-8')
-            st.download_button(
+            botao_download_csv(
                 label="Download da Matriz de Correlação",
                 data=csv_data,
                 file_name="matriz_correlacao_indicadores.csv",
@@ -65,8 +89,37 @@ class CorrelacaoIndicadoresTab(TabInterface):
             # Adicionar botão para download do gráfico
             self.download_graph_image(fig, "heatmap_correlacao_indicadores.png")
 
+    @classmethod
+    def colunas_selecionadas(cls, indicadores, anos):
+        # Colunas na ordem original (indicador, depois ano), independente da ordem de seleção
+        return tuple(
+            f'{indicador}_{ano}'
+            for indicador in cls.INDICADORES if indicador in indicadores
+            for ano in cls.ANOS if ano in anos
+        )
+
+    @etapa
+    def agregar(self, versao, metodo):
+        # Tabela com todas as colunas de interesse (manifesto da aba, já numéricas no dataset tipado)
+        correlation_data = dataset_completo(versao, self.manifesto())
+
+        # Estatísticas suficientes (somas, somas dos quadrados, produtos cruzados e contagens por par, sobre os
+        # postos no Spearman): uma única passada sobre os dados atende qualquer subconjunto de indicadores e anos
+        return EstatisticasCorrelacao.de_dataframe(correlation_data, metodo)
+
+    @etapa
+    def filtrar(self, versao, metodo, colunas):
+        # Calcular a matriz de correlação das colunas selecionadas a partir das estatísticas
+        return self.agregar(versao, metodo).correlacao(colunas)
+
+    @etapa
+    def construir_figura(self, versao, metodo, colunas, color_scale):
+        return self.plot_heatmap(self.filtrar(versao, metodo, colunas), color_scale)
+
     def plot_heatmap(self, correlation_matrix, color_scale):
-        # Criar heatmap interativo com Plotly Express
+        # Criar heatmap interativo com Plotly Express (importado só aqui: é pesado e só esta etapa o usa)
+        import plotly.express as px
+
         fig = px.imshow(
             correlation_matrix,
             labels=dict(color="Correlação"),
@@ -100,11 +153,5 @@ class CorrelacaoIndicadoresTab(TabInterface):
         return fig
 
     def download_graph_image(self, fig, filename):
-        # Função para permitir download da imagem do gráfico em PNG
-        img_bytes = fig.to_image(format="png")
-        st.download_button(
-            label=f"Download do Gráfico",
-            data=img_bytes,
-            file_name=filename,
-            mime="image/png"
-        )
+        # Função para permitir download da imagem do gráfico, gerada apenas quando solicitada pelo usuário
+        botao_download_grafico(fig, filename, label="Download do Gráfico")
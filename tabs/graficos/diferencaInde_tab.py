@@ -1,49 +1,29 @@
 import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
 from tabs.tab import TabInterface
+from util.cache import etapa
+from util.coorte import versao_coorte_atual
+from util.dados import dataset_completo
+from util.exportacao import botao_download_csv, botao_download_grafico
+from util.histograma import NUMERO_BINS, bordas_histograma, calcular_histograma, figura_histograma
 
 
 class DiferencaIndeTab(TabInterface):
+    COLUNAS = {
+        'NOME': 'object',
+        'PONTO_VIRADA_{ano}': 'category',
+        'INDE_{ano}': 'float64',
+    }
+
     def __init__(self, tab):
         self.tab = tab
         self.render()
 
     def render(self):
         with self.tab:
-            # Carregar os dados
-            file_path = './dataset/PEDE_PASSOS_DATASET_FIAP.csv'
-            df = pd.read_csv(file_path, delimiter=';')
-
-            # Preparar os dados
-            df_clean = df.dropna()
-
-            # Filtrar as colunas relevantes para análise
-            columns_of_interest = [
-                'NOME', 'PONTO_VIRADA_2020', 'PONTO_VIRADA_2021', 'PONTO_VIRADA_2022',
-                'INDE_2020', 'INDE_2021', 'INDE_2022'
-            ]
-
-            impact_data = df_clean[columns_of_interest]
+            self.fase('carregar')
 
-            # Verificar se existem alunos com pontos de virada nos diferentes anos
-            pontos_virada = impact_data[
-                (impact_data['PONTO_VIRADA_2020'] == 'Sim') |
-                (impact_data['PONTO_VIRADA_2021'] == 'Sim') |
-                (impact_data['PONTO_VIRADA_2022'] == 'Sim')
-            ]
-
-            # Converter colunas INDE para numérico, ignorando erros para evitar problemas com valores não numéricos
-            pontos_virada['INDE_2020'] = pd.to_numeric(pontos_virada['INDE_2020'], errors='coerce')
-            pontos_virada['INDE_2021'] = pd.to_numeric(pontos_virada['INDE_2021'], errors='coerce')
-            pontos_virada['INDE_2022'] = pd.to_numeric(pontos_virada['INDE_2022'], errors='coerce')
-
-            # Remover valores nulos após a conversão
-            pontos_virada.dropna(subset=['INDE_2020', 'INDE_2021', 'INDE_2022'], inplace=True)
-
-            # Calcular as diferenças de INDE ano a ano
-            pontos_virada['DIF_INDE_2020_2021'] = pontos_virada['INDE_2021'] - pontos_virada['INDE_2020']
-            pontos_virada['DIF_INDE_2021_2022'] = pontos_virada['INDE_2022'] - pontos_virada['INDE_2021']
+            # Versão do dataset (com a coorte da barra lateral): chave das etapas em cache (limpar → filtrar → figura)
+            versao = versao_coorte_atual()
 
             # Filtros interativos para os Pontos de Virada
             pontos_virada_selecionados = st.multiselect(
@@ -53,73 +33,15 @@ class DiferencaIndeTab(TabInterface):
                 key='pontos_virada_selecionados'
             )
 
-            # Aplicar filtros com base nas seleções do usuário
-            dados_filtrados = pontos_virada[
-                (pontos_virada['PONTO_VIRADA_2020'].isin(pontos_virada_selecionados)) |
-                (pontos_virada['PONTO_VIRADA_2021'].isin(pontos_virada_selecionados)) |
-                (pontos_virada['PONTO_VIRADA_2022'].isin(pontos_virada_selecionados))
-            ]
-
             # Detalhes da visualização
             with st.expander("Detalhes da Visualização"):
                 st.write(f"📊 **Pontos de Virada Selecionados:** {', '.join(pontos_virada_selecionados)}")
                 st.write(f"📈 **Tipo de Gráfico:** Histograma")
 
-            # Gráfico de diferença no INDE de 2020 para 2021
-            fig_2020_2021 = go.Figure(data=[go.Histogram(
-                x=dados_filtrados['DIF_INDE_2020_2021'].dropna(),
-                nbinsx=20,  
-                marker_color='blue',
-                marker_line=dict(width=0.5, color='black'), 
-            )])
-
-            fig_2020_2021.update_layout(
-                xaxis_title="Diferença no INDE",
-                yaxis=dict(
-                    title='Número de Alunos',
-                    showgrid=True,  
-                    gridcolor='lightgray'  
-                ),
-                title={
-                    'text': 'Diferença no INDE de 2020 para 2021',
-                    'y': 0.85,
-                    'x': 0.5,
-                    'xanchor': 'center',
-                    'yanchor': 'top',
-                },
-                font=dict(
-                    family="Arial, sans-serif",
-                    size=14  
-                )
-            )
+            self.fase('plotar')
 
-            # Gráfico de diferença no INDE de 2021 para 2022
-            fig_2021_2022 = go.Figure(data=[go.Histogram(
-                x=dados_filtrados['DIF_INDE_2021_2022'].dropna(),
-                nbinsx=20,  
-                marker_color='green',
-                marker_line=dict(width=0.5, color='black'), 
-            )])
-
-            fig_2021_2022.update_layout(
-                xaxis_title="Diferença no INDE",
-                yaxis=dict(
-                    title='Número de Alunos',
-                    showgrid=True,  
-                    gridcolor='lightgray'  
-                ),
-                title={
-                    'text': 'Diferença no INDE de 2021 para 2022',
-                    'y': 0.85,
-                    'x': 0.5,
-                    'xanchor': 'center',
-                    'yanchor': 'top',
-                },
-                font=dict(
-                    family="Arial, sans-serif", 
-                    size=14  
-                )
-            )
+            # Histogramas das diferenças no INDE de 2020 para 2021 e de 2021 para 2022
+            fig_2020_2021, fig_2021_2022 = self.construir_figuras(versao, tuple(pontos_virada_selecionados))
 
             # Exibir os gráficos
             st.plotly_chart(fig_2020_2021)
@@ -131,19 +53,20 @@ class DiferencaIndeTab(TabInterface):
             st.subheader(':blue[Métricas Dinâmicas de Diferença INDE]', divider='orange')
 
             # Adicionar ícones, cores e explicação
+            contagens = self.contar_diferencas(versao, tuple(pontos_virada_selecionados))
             col1, col2 = st.columns(2)
 
             with col1:
                 st.markdown("<h3 style='font-size:17px; color:#2D9CDB;'>📈 Diferença Positiva INDE 2020-2021:</h3>", unsafe_allow_html=True)
-                st.metric(label="", value=dados_filtrados[dados_filtrados['DIF_INDE_2020_2021'] > 0].shape[0])
+                st.metric(label="", value=contagens['DIF_INDE_2020_2021']['positiva'])
                 st.markdown("<h3 style='font-size:17px; color:#EB5757;'>📉 Diferença Negativa INDE 2020-2021:</h3>", unsafe_allow_html=True)
-                st.metric(label="", value=dados_filtrados[dados_filtrados['DIF_INDE_2020_2021'] < 0].shape[0])
+                st.metric(label="", value=contagens['DIF_INDE_2020_2021']['negativa'])
 
             with col2:
                 st.markdown("<h3 style='font-size:17px; color:#2D9CDB;'>📈 Diferença Positiva INDE 2021-2022:</h3>", unsafe_allow_html=True)
-                st.metric(label="", value=dados_filtrados[dados_filtrados['DIF_INDE_2021_2022'] > 0].shape[0])
+                st.metric(label="", value=contagens['DIF_INDE_2021_2022']['positiva'])
                 st.markdown("<h3 style='font-size:17px; color:#EB5757;'>📉 Diferença Negativa INDE 2021-2022:</h3>", unsafe_allow_html=True)
-                st.metric(label="", value=dados_filtrados[dados_filtrados['DIF_INDE_2021_2022'] < 0].shape[0])
+                st.metric(label="", value=contagens['DIF_INDE_2021_2022']['negativa'])
 
             st.markdown("<br>", unsafe_allow_html=True)
 
@@ -155,11 +78,13 @@ class DiferencaIndeTab(TabInterface):
 
             st.markdown("<br>", unsafe_allow_html=True)
 
+            self.fase('exportar')
+
             st.subheader(':blue[Exportação de Dados e Gráficos]', divider='orange')
 
             # Botão para download dos dados filtrados
-            csv_data = dados_filtrados.to_csv(index=False).encode('utf-8')
-            st.download_button(
+            csv_data = self.exportar_csv(versao, tuple(pontos_virada_selecionados))
+            botao_download_csv(
                 label="Download dos Dados Filtrados",
                 data=csv_data,
                 file_name="diferenca_inde_dados_filtrados.csv",
@@ -170,12 +95,95 @@ class DiferencaIndeTab(TabInterface):
             self.download_graph_image(fig_2020_2021, "diferenca_inde_2020_2021_grafico.png")
             self.download_graph_image(fig_2021_2022, "diferenca_inde_2021_2022_grafico.png")
 
-    def download_graph_image(self, fig, filename):
-        # Função para permitir download da imagem do gráfico em PNG
-        img_bytes = fig.to_image(format="png")
-        st.download_button(
-            label=f"Download do Gráfico ({filename.split('_')[2]})",
-            data=img_bytes,
-            file_name=filename,
-            mime="image/png"
+    @etapa
+    def preparar(self, versao):
+        # Apenas as colunas relevantes para análise (manifesto da aba) são lidas
+        impact_data = dataset_completo(versao, self.manifesto())
+
+        # Verificar se existem alunos com pontos de virada nos diferentes anos
+        pontos_virada = impact_data[
+            (impact_data['PONTO_VIRADA_2020'] == 'Sim') |
+            (impact_data['PONTO_VIRADA_2021'] == 'Sim') |
+            (impact_data['PONTO_VIRADA_2022'] == 'Sim')
+        ].copy()
+
+        # Remover valores nulos após a conversão
+        pontos_virada.dropna(subset=['INDE_2020', 'INDE_2021', 'INDE_2022'], inplace=True)
+
+        # Calcular as diferenças de INDE ano a ano
+        pontos_virada['DIF_INDE_2020_2021'] = pontos_virada['INDE_2021'] - pontos_virada['INDE_2020']
+        pontos_virada['DIF_INDE_2021_2022'] = pontos_virada['INDE_2022'] - pontos_virada['INDE_2021']
+
+        return pontos_virada
+
+    @etapa
+    def filtrar(self, versao, pontos_virada_selecionados):
+        # Aplicar filtros com base nas seleções do usuário
+        pontos_virada = self.preparar(versao)
+        return pontos_virada[
+            (pontos_virada['PONTO_VIRADA_2020'].isin(list(pontos_virada_selecionados))) |
+            (pontos_virada['PONTO_VIRADA_2021'].isin(list(pontos_virada_selecionados))) |
+            (pontos_virada['PONTO_VIRADA_2022'].isin(list(pontos_virada_selecionados)))
+        ]
+
+    @etapa
+    def construir_figuras(self, versao, pontos_virada_selecionados):
+        histograma_2020_2021 = self.histograma(versao, 'DIF_INDE_2020_2021', pontos_virada_selecionados)
+        histograma_2021_2022 = self.histograma(versao, 'DIF_INDE_2021_2022', pontos_virada_selecionados)
+        fig_2020_2021 = self.plot_graph(histograma_2020_2021, 'blue', 'Diferença no INDE de 2020 para 2021')
+        fig_2021_2022 = self.plot_graph(histograma_2021_2022, 'green', 'Diferença no INDE de 2021 para 2022')
+        return fig_2020_2021, fig_2021_2022
+
+    @etapa
+    def histograma(self, versao, coluna, pontos_virada_selecionados, nbins=NUMERO_BINS):
+        # Contagens por intervalo calculadas no servidor; as bordas vêm da coluna antes do filtro de pontos de virada,
+        # para que os intervalos não mudem com a seleção
+        bordas = bordas_histograma(self.preparar(versao)[coluna], nbins)
+        return calcular_histograma(self.filtrar(versao, pontos_virada_selecionados)[coluna], bordas)
+
+    @etapa
+    def contar_diferencas(self, versao, pontos_virada_selecionados):
+        # Número de alunos com diferença positiva e negativa no INDE em cada período
+        dados_filtrados = self.filtrar(versao, pontos_virada_selecionados)
+        return {
+            coluna: {
+                'positiva': dados_filtrados[dados_filtrados[coluna] > 0].shape[0],
+                'negativa': dados_filtrados[dados_filtrados[coluna] < 0].shape[0]
+            }
+            for coluna in ['DIF_INDE_2020_2021', 'DIF_INDE_2021_2022']
+        }
+
+    @etapa
+    def exportar_csv(self, versao, pontos_virada_selecionados):
+        return self.filtrar(versao, pontos_virada_selecionados).to_csv(index=False).encode('utf-8')
+
+    def plot_graph(self, histograma, cor, titulo):
+        # Histograma das diferenças no INDE entre dois anos, desenhado a partir das contagens
+        fig = figura_histograma(histograma, cor, rotulo_valor='Diferença no INDE', rotulo_contagem='Número de Alunos')
+
+        fig.update_layout(
+            bargap=0,
+            xaxis_title="Diferença no INDE",
+            yaxis=dict(
+                title='Número de Alunos',
+                showgrid=True,  
+                gridcolor='lightgray'  
+            ),
+            title={
+                'text': titulo,
+                'y': 0.85,
+                'x': 0.5,
+                'xanchor': 'center',
+                'yanchor': 'top',
+            },
+            font=dict(
+                family="Arial, sans-serif",
+                size=14  
+            )
         )
+
+        return fig
+
+    def download_graph_image(self, fig, filename):
+        # Função para permitir download da imagem do gráfico, gerada apenas quando solicitada pelo usuário
+        botao_download_grafico(fig, filename, label=f"Download do Gráfico ({filename.split('_')[2]})")
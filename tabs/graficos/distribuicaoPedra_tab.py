@@ -1,32 +1,30 @@
 import streamlit as st
-import pandas as pd
 import plotly.graph_objects as go
 from tabs.tab import TabInterface
+from util.cache import etapa
+from util.coorte import versao_coorte_atual
+from util.cubo import COLUNAS_CUBO, obter_cubo
+from util.exportacao import botao_download_csv, botao_download_grafico
 
 
 class DistribuicaoPedraTab(TabInterface):
+    COLUNAS = COLUNAS_CUBO
+    PEDRAS = ['Ametista', 'Quartzo', 'Topázio', 'Ágata']
+
     def __init__(self, tab):
         self.tab = tab
         self.render()
 
     def render(self):
         with self.tab:
-            # Carregar os dados
-            file_path = './dataset/PEDE_PASSOS_DATASET_FIAP.csv'
-            df = pd.read_csv(file_path, delimiter=';')
-
-            # Preparar os dados
-            df_clean = df.dropna()
+            self.fase('carregar')
 
-            # Filtrar as colunas necessárias e remover valores nulos
-            data_filtered = df_clean[['INSTITUICAO_ENSINO_ALUNO_2020', 'INSTITUICAO_ENSINO_ALUNO_2021', 'PEDRA_2020', 'PEDRA_2021']].dropna()
+            # Versão do dataset (com a coorte da barra lateral): chave das etapas em cache (agregar → filtrar → figura)
+            versao = versao_coorte_atual()
 
-            # Remover entradas com valores '#NULO!' nas colunas de PEDRA_2020 e PEDRA_2021
-            data_filtered_final = data_filtered[~data_filtered['PEDRA_2021'].str.contains('#NULO!', na=False)]
-
-            # Contar a quantidade de ocorrências de cada combinação de Instituição e Pedra por ano
-            instituicao_pedra_2020_final = data_filtered_final.groupby(['INSTITUICAO_ENSINO_ALUNO_2020', 'PEDRA_2020']).size().unstack(fill_value=0)
-            instituicao_pedra_2021_final = data_filtered_final.groupby(['INSTITUICAO_ENSINO_ALUNO_2021', 'PEDRA_2021']).size().unstack(fill_value=0)
+            # Contar a quantidade de alunos de cada combinação de Instituição e Pedra por ano
+            instituicao_pedra_2020_final = self.agregar(versao, '2020')
+            instituicao_pedra_2021_final = self.agregar(versao, '2021')
 
             # Filtros interativos
             instituicoes_disponiveis_2020 = list(instituicao_pedra_2020_final.index)
@@ -37,9 +35,11 @@ class DistribuicaoPedraTab(TabInterface):
 
             tipo_grafico = st.radio("Escolha o tipo de gráfico:", ("Barras", "Linhas"), key='tipo_grafico_distribuicao_pedra')
 
+            self.fase('preparar')
+
             # Filtrar os dados com base nas instituições selecionadas
-            data_2020_filtrado = instituicao_pedra_2020_final.loc[instituicoes_selecionadas_2020]
-            data_2021_filtrado = instituicao_pedra_2021_final.loc[instituicoes_selecionadas_2021]
+            data_2020_filtrado = self.filtrar(versao, '2020', tuple(instituicoes_selecionadas_2020))
+            data_2021_filtrado = self.filtrar(versao, '2021', tuple(instituicoes_selecionadas_2021))
 
             # Gerar funcionalidade que mostra os detalhes da visualização escolhida pelo usuário
             instituicoes_2020_str = ', '.join(instituicoes_selecionadas_2020)
@@ -51,9 +51,11 @@ class DistribuicaoPedraTab(TabInterface):
                 st.write(f"✅ **Instituições Selecionadas para 2021:** {instituicoes_2021_str}.")
                 st.write(f"📊 **{tipo_grafico_str}**")
 
+            self.fase('plotar')
+
             # Plotar gráficos com Plotly
-            fig_2020 = self.plot_graph(data_2020_filtrado, tipo_grafico, 'Distribuição de Pedra por Instituição em 2020', tick_interval=20)
-            fig_2021 = self.plot_graph(data_2021_filtrado, tipo_grafico, 'Distribuição de Pedra por Instituição em 2021', tick_interval=10)
+            fig_2020 = self.construir_figura(versao, '2020', tuple(instituicoes_selecionadas_2020), tipo_grafico, tick_interval=20)
+            fig_2021 = self.construir_figura(versao, '2021', tuple(instituicoes_selecionadas_2021), tipo_grafico, tick_interval=10)
 
             # Exibir os dois gráficos
             st.plotly_chart(fig_2020)
@@ -150,18 +152,20 @@ class DistribuicaoPedraTab(TabInterface):
 
             st.markdown("<br>", unsafe_allow_html=True)
 
+            self.fase('exportar')
+
             st.subheader(':blue[Exportação de Dados e Gráficos]', divider='orange')
 
             # Botão para download dos dados filtrados
             csv_data_2020 = tabela_dados_2020.to_csv(index=False).encode('utf-8')
             csv_data_2021 = tabela_dados_2021.to_csv(index=False).encode('utf-8')
-            st.download_button(
+            botao_download_csv(
                 label="Download dos Dados Filtrados de 2020",
                 data=csv_data_2020,
                 file_name="distribuicao_pedra_2020_dados_filtrados.csv",
                 mime="text/csv"
             )
-            st.download_button(
+            botao_download_csv(
                 label="Download dos Dados Filtrados de 2021",
                 data=csv_data_2021,
                 file_name="distribuicao_pedra_2021_dados_filtrados.csv",
@@ -172,6 +176,27 @@ class DistribuicaoPedraTab(TabInterface):
             self.download_graph_image(fig_2020, "distribuicao_pedra_2020_grafico.png")
             self.download_graph_image(fig_2021, "distribuicao_pedra_2021_grafico.png")
 
+    @etapa
+    def agregar(self, versao, ano):
+        # Tabela Instituição x Pedra de um ano, com os nomes de coluna/índice usados nas tabelas exportadas
+        contagem = obter_cubo(versao=versao).contagem(por=['INSTITUICAO', 'PEDRA'], ANO=[ano]).unstack(fill_value=0)
+        # Todas as pedras aparecem como colunas, mesmo quando a coorte da barra lateral não tem alunos em alguma delas
+        contagem = contagem.reindex(columns=contagem.columns.union(self.PEDRAS), fill_value=0)
+        contagem = contagem.sort_index().sort_index(axis=1)
+        contagem.index.name = f'INSTITUICAO_ENSINO_ALUNO_{ano}'
+        contagem.columns.name = f'PEDRA_{ano}'
+        return contagem
+
+    @etapa
+    def filtrar(self, versao, ano, instituicoes_selecionadas):
+        # Filtrar os dados com base nas instituições selecionadas
+        return self.agregar(versao, ano).loc[list(instituicoes_selecionadas)]
+
+    @etapa
+    def construir_figura(self, versao, ano, instituicoes_selecionadas, tipo_grafico, tick_interval):
+        data = self.filtrar(versao, ano, instituicoes_selecionadas)
+        return self.plot_graph(data, tipo_grafico, f'Distribuição de Pedra por Instituição em {ano}', tick_interval=tick_interval)
+
     def plot_graph(self, data, tipo_grafico, titulo, tick_interval):
         # Criar a figura interativa com Plotly
         fig = go.Figure()
@@ -227,11 +252,5 @@ class DistribuicaoPedraTab(TabInterface):
         return fig
 
     def download_graph_image(self, fig, filename):
-        # Função para permitir download da imagem do gráfico em PNG
-        img_bytes = fig.to_image(format="png")
-        st.download_button(
-            label=f"Download do Gráfico ({filename.split('_')[2]})",
-            data=img_bytes,
-            file_name=filename,
-            mime="image/png"
-        )
+        # Função para permitir download da imagem do gráfico, gerada apenas quando solicitada pelo usuário
+        botao_download_grafico(fig, filename, label=f"Download do Gráfico ({filename.split('_')[2]})")
@@ -2,69 +2,46 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 from tabs.tab import TabInterface
+from util.cache import etapa
+from util.coorte import versao_coorte_atual
+from util.dados import dataset_completo
+from util.exportacao import botao_download_csv, botao_download_grafico
+from util.formato_longo import NIVEL_ALUNO, NIVEL_ANO, listar_anos, para_formato_longo
 
 
 class EvolucaoIndeTab(TabInterface):
+    COLUNAS = {
+        'NOME': 'object',
+        'PONTO_VIRADA_{ano}': 'category',
+        'INDE_{ano}': 'float64',
+    }
+
     def __init__(self, tab):
         self.tab = tab
         self.render()
 
     def render(self):
         with self.tab:
-            # Carregar os dados
-            file_path = './dataset/PEDE_PASSOS_DATASET_FIAP.csv'
-            df = pd.read_csv(file_path, delimiter=';')
-
-            # Preparar os dados
-            df_clean = df.dropna()
-
-            # Filtrar as colunas relevantes para análise
-            columns_of_interest = [
-                'NOME', 'PONTO_VIRADA_2020', 'PONTO_VIRADA_2021', 'PONTO_VIRADA_2022',
-                'INDE_2020', 'INDE_2021', 'INDE_2022'
-            ]
-            impact_data = df_clean[columns_of_interest]
-
-            # Filtrar dados para alunos com e sem ponto de virada
-            with_pv = impact_data[(impact_data['PONTO_VIRADA_2020'] == 'Sim') |
-                                  (impact_data['PONTO_VIRADA_2021'] == 'Sim') |
-                                  (impact_data['PONTO_VIRADA_2022'] == 'Sim')]
-
-            without_pv = impact_data[(impact_data['PONTO_VIRADA_2020'] == 'Não') &
-                                     (impact_data['PONTO_VIRADA_2021'] == 'Não') &
-                                     (impact_data['PONTO_VIRADA_2022'] == 'Não')]
-
-            # Converter INDE para numérico
-            with_pv['INDE_2020'] = pd.to_numeric(with_pv['INDE_2020'], errors='coerce')
-            with_pv['INDE_2021'] = pd.to_numeric(with_pv['INDE_2021'], errors='coerce')
-            with_pv['INDE_2022'] = pd.to_numeric(with_pv['INDE_2022'], errors='coerce')
-
-            without_pv['INDE_2020'] = pd.to_numeric(without_pv['INDE_2020'], errors='coerce')
-            without_pv['INDE_2021'] = pd.to_numeric(without_pv['INDE_2021'], errors='coerce')
-            without_pv['INDE_2022'] = pd.to_numeric(without_pv['INDE_2022'], errors='coerce')
-
-            # Calcular as médias do INDE ao longo dos anos para ambos os grupos
-            mean_with_pv = with_pv[['INDE_2020', 'INDE_2021', 'INDE_2022']].mean()
-            mean_without_pv = without_pv[['INDE_2020', 'INDE_2021', 'INDE_2022']].mean()
+            self.fase('carregar')
+
+            # Versão do dataset (com a coorte da barra lateral): chave das etapas em cache (limpar → agregar → filtrar → figura)
+            versao = versao_coorte_atual()
+            medias_inde = self.agregar(versao)
 
             # Filtros interativos
-            anos_disponiveis = ['2020', '2021', '2022']
+            anos_disponiveis = medias_inde.index.tolist()
             anos_selecionados = st.multiselect('Selecione os anos:', options=anos_disponiveis, default=anos_disponiveis, key='anos_evolucao_inde')
 
             tipo_grafico = st.radio("Escolha o tipo de gráfico:", ("Barras", "Linhas"), key='tipo_grafico_evolucao_inde')
 
-            # Aplicar filtro de anos selecionados
-            anos_indices = [i for i, ano in enumerate(anos_disponiveis) if ano in anos_selecionados]
+            self.fase('preparar')
 
-            # Aplicar o filtro de anos selecionados para cada grupo
-            anos = ['2020', '2021', '2022']
-            mean_with_pv_filtrado = [mean_with_pv[i] for i in anos_indices]
-            mean_without_pv_filtrado = [mean_without_pv[i] for i in anos_indices]
-            anos_filtrados = [anos[i] for i in anos_indices]
-
-            # Cálculo das variações percentuais
-            var_with_pv = [0 if i == 0 else (mean_with_pv_filtrado[i] - mean_with_pv_filtrado[i - 1]) / mean_with_pv_filtrado[i - 1] * 100 for i in range(len(mean_with_pv_filtrado))]
-            var_without_pv = [0 if i == 0 else (mean_without_pv_filtrado[i] - mean_without_pv_filtrado[i - 1]) / mean_without_pv_filtrado[i - 1] * 100 for i in range(len(mean_without_pv_filtrado))]
+            # INDE médio de cada grupo e variações percentuais nos anos selecionados
+            tabela_dados = self.filtrar(versao, tuple(anos_selecionados))
+            mean_with_pv_filtrado = tabela_dados['INDE Médio Com Ponto de Virada'].tolist()
+            mean_without_pv_filtrado = tabela_dados['INDE Médio Sem Ponto de Virada'].tolist()
+            var_with_pv = tabela_dados['Variação Com Ponto de Virada (%)'].tolist()
+            var_without_pv = tabela_dados['Variação Sem Ponto de Virada (%)'].tolist()
 
             # Gerar funcionalidade que mostra os detalhes da visualização escolhida pelo usuário
             anos_str = ', '.join(anos_selecionados)
@@ -74,20 +51,15 @@ class EvolucaoIndeTab(TabInterface):
                 st.write(f"✅ **Anos Selecionados:** {anos_str}.")
                 st.write(f"📊 **{tipo_grafico_str}**")
 
+            self.fase('plotar')
+
             # Chamar a função que plota o gráfico
-            fig = self.plot_graph(anos_filtrados, mean_with_pv_filtrado, mean_without_pv_filtrado, var_with_pv, var_without_pv, tipo_grafico)
+            fig = self.construir_figura(versao, tuple(anos_selecionados), tipo_grafico)
             st.plotly_chart(fig)
 
             st.subheader(':blue[Tabela de Evolução do INDE por Ano]', divider='orange')
 
             # Exibir tabela com os dados filtrados
-            tabela_dados = pd.DataFrame({
-                'Ano': anos_filtrados,
-                'INDE Médio Com Ponto de Virada': mean_with_pv_filtrado,
-                'INDE Médio Sem Ponto de Virada': mean_without_pv_filtrado,
-                'Variação Com Ponto de Virada (%)': var_with_pv,
-                'Variação Sem Ponto de Virada (%)': var_without_pv
-            })
             st.write(tabela_dados.set_index("Ano"))
 
             st.markdown("<br>", unsafe_allow_html=True)
@@ -107,11 +79,13 @@ class EvolucaoIndeTab(TabInterface):
                 st.metric(label="", value=f"{sum(mean_without_pv_filtrado):.2f}", delta=f"{var_without_pv[-1]:.2f}%")
                 st.line_chart(mean_without_pv_filtrado, use_container_width=True)  # Gráfico de progresso para INDE sem ponto de virada
 
+            self.fase('exportar')
+
             st.subheader(':blue[Exportação de Dados e Gráficos]', divider='orange')
 
             # Botão para download dos dados filtrados
             csv_data = tabela_dados.to_csv(index=True).encode('utf-8')
-            st.download_button(
+            botao_download_csv(
                 label="Download dos Dados Filtrados",
                 data=csv_data,
                 file_name="evolucao_inde_dados_filtrados.csv",
@@ -121,6 +95,61 @@ class EvolucaoIndeTab(TabInterface):
             # Adicionar botão para download do gráfico como imagem
             self.download_graph_image(fig)
 
+    @etapa
+    def agregar(self, versao):
+        # Dados no formato longo (aluno, ano) com o ponto de virada e o INDE de cada ano
+        impact_data = para_formato_longo(dataset_completo(versao, self.manifesto()), indicadores=['PONTO_VIRADA', 'INDE'])
+
+        # Alunos com ponto de virada em algum ano e alunos sem ponto de virada em nenhum ano
+        ponto_virada = impact_data['PONTO_VIRADA']
+        alunos_com_pv = (ponto_virada == 'Sim').groupby(level=NIVEL_ALUNO).any()
+        alunos_sem_pv = (ponto_virada == 'Não').groupby(level=NIVEL_ALUNO).all()
+
+        alunos = impact_data.index.get_level_values(NIVEL_ALUNO)
+        with_pv = impact_data[alunos.isin(alunos_com_pv.index[alunos_com_pv])]
+        without_pv = impact_data[alunos.isin(alunos_sem_pv.index[alunos_sem_pv])]
+
+        # Calcular as médias do INDE ao longo dos anos para ambos os grupos
+        mean_with_pv = with_pv.groupby(level=NIVEL_ANO)['INDE'].mean()
+        mean_without_pv = without_pv.groupby(level=NIVEL_ANO)['INDE'].mean()
+
+        return pd.DataFrame({'com_pv': mean_with_pv, 'sem_pv': mean_without_pv}, index=listar_anos(impact_data))
+
+    @etapa
+    def filtrar(self, versao, anos_selecionados):
+        medias_inde = self.agregar(versao)
+        mean_with_pv = medias_inde['com_pv']
+        mean_without_pv = medias_inde['sem_pv']
+
+        # Aplicar o filtro de anos selecionados para cada grupo (fatia do índice por ano)
+        anos_filtrados = [ano for ano in medias_inde.index if ano in anos_selecionados]
+        mean_with_pv_filtrado = mean_with_pv.reindex(anos_filtrados).tolist()
+        mean_without_pv_filtrado = mean_without_pv.reindex(anos_filtrados).tolist()
+
+        # Cálculo das variações percentuais
+        var_with_pv = [0 if i == 0 else (mean_with_pv_filtrado[i] - mean_with_pv_filtrado[i - 1]) / mean_with_pv_filtrado[i - 1] * 100 for i in range(len(mean_with_pv_filtrado))]
+        var_without_pv = [0 if i == 0 else (mean_without_pv_filtrado[i] - mean_without_pv_filtrado[i - 1]) / mean_without_pv_filtrado[i - 1] * 100 for i in range(len(mean_without_pv_filtrado))]
+
+        return pd.DataFrame({
+            'Ano': anos_filtrados,
+            'INDE Médio Com Ponto de Virada': mean_with_pv_filtrado,
+            'INDE Médio Sem Ponto de Virada': mean_without_pv_filtrado,
+            'Variação Com Ponto de Virada (%)': var_with_pv,
+            'Variação Sem Ponto de Virada (%)': var_without_pv
+        })
+
+    @etapa
+    def construir_figura(self, versao, anos_selecionados, tipo_grafico):
+        tabela_dados = self.filtrar(versao, anos_selecionados)
+        return self.plot_graph(
+            tabela_dados['Ano'].tolist(),
+            tabela_dados['INDE Médio Com Ponto de Virada'].tolist(),
+            tabela_dados['INDE Médio Sem Ponto de Virada'].tolist(),
+            tabela_dados['Variação Com Ponto de Virada (%)'].tolist(),
+            tabela_dados['Variação Sem Ponto de Virada (%)'].tolist(),
+            tipo_grafico
+        )
+
     def plot_graph(self, anos, mean_with_pv, mean_without_pv, var_with_pv, var_without_pv, tipo_grafico):
         # Criar a figura interativa com Plotly
         fig = go.Figure()
@@ -166,11 +195,5 @@ class EvolucaoIndeTab(TabInterface):
         return fig
 
     def download_graph_image(self, fig):
-        # Função para permitir download da imagem do gráfico em PNG
-        img_bytes = fig.to_image(format="png")
-        st.download_button(
-            label="Download do Gráfico",
-            data=img_bytes,
-            file_name="grafico_evolucao_inde.png",
-            mime="image/png"
-        )
+        # Função para permitir download da imagem do gráfico, gerada apenas quando solicitada pelo usuário
+        botao_download_grafico(fig, "grafico_evolucao_inde.png", label="Download do Gráfico")
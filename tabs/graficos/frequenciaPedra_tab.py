@@ -1,52 +1,33 @@
 import streamlit as st
-import pandas as pd
 import plotly.graph_objects as go
 from tabs.tab import TabInterface
+from util.cache import etapa
+from util.coorte import versao_coorte_atual
+from util.cubo import COLUNAS_CUBO, obter_cubo
+from util.exportacao import botao_download_csv, botao_download_grafico
+from util.formato_longo import NIVEL_ANO
 
 
 class FrequenciaPedrasTab(TabInterface):
+    COLUNAS = COLUNAS_CUBO
+
     def __init__(self, tab):
         self.tab = tab
         self.render()  
 
     def render(self):
         with self.tab:
-            # Carregar os dados
-            file_path = './dataset/PEDE_PASSOS_DATASET_FIAP.csv'
-            df = pd.read_csv(file_path, delimiter=';')
+            self.fase('carregar')
 
-            # Preparar os dados
-            df_clean = df.dropna()
+            # Versão do dataset (com a coorte da barra lateral): chave das etapas em cache (agregar → filtrar → figura)
+            versao = versao_coorte_atual()
 
             # Filtros interativos
-            anos_disponiveis = ['2020', '2021', '2022']
+            anos_disponiveis = self.agregar(versao).index.tolist()
             anos_selecionados = st.multiselect('Selecione os anos:', options=anos_disponiveis, default=anos_disponiveis, key='anos_frequenciapedra')
 
             tipo_grafico = st.radio("Escolha o tipo de gráfico:", ("Barras", "Linhas"), key='tipo_grafico_frequenciapedra')
 
-            # Realiza a contagem de valores em cada coluna 'PEDRA'
-            count_2020 = df_clean['PEDRA_2020'].value_counts()
-            count_2021 = df_clean['PEDRA_2021'].value_counts()
-            count_2022 = df_clean['PEDRA_2022'].value_counts()
-
-            # Ordenar as contagens pelas categorias específicas: Topázio, Ametista, Ágata e Quartzo
-            ordered_categories = ['Topázio', 'Ametista', 'Ágata', 'Quartzo']
-
-            # Reindexar as contagens com base na ordem desejada
-            count_2020 = count_2020.reindex(ordered_categories)
-            count_2021 = count_2021.reindex(ordered_categories)
-            count_2022 = count_2022.reindex(ordered_categories)
-
-            # Aplicar o filtro de anos selecionados
-            contagens = {
-                '2020': count_2020,
-                '2021': count_2021,
-                '2022': count_2022
-            }
-
-            anos_filtrados = [ano for ano in anos_selecionados]
-            contagens_filtradas = [contagens[ano].fillna(0).values for ano in anos_filtrados]
-
             # Funcionalidade para mostrar os detalhes da visualização escolhida pelo usuário
             anos_str = ', '.join(anos_selecionados)
             tipo_grafico_str = f"Tipo de gráfico: {tipo_grafico}."
@@ -55,20 +36,16 @@ class FrequenciaPedrasTab(TabInterface):
                 st.write(f"📅 **Anos Selecionados:** {anos_str}.")
                 st.write(f"📊 **{tipo_grafico_str}**")
 
+            self.fase('plotar')
+
             # Gerar gráfico interativo
-            fig = self.plot_graph(anos_filtrados, contagens_filtradas, tipo_grafico)
+            fig = self.construir_figura(versao, tuple(anos_selecionados), tipo_grafico)
             st.plotly_chart(fig)
 
             st.subheader(':blue[Tabela de Frequência de Alunos por Pedras]', divider='orange')
 
             # Exibir tabela com os dados filtrados
-            tabela_dados = pd.DataFrame({
-                'Ano': anos_filtrados,
-                'Topázio': [contagens[ano].get('Topázio', 0) for ano in anos_filtrados],
-                'Ametista': [contagens[ano].get('Ametista', 0) for ano in anos_filtrados],
-                'Ágata': [contagens[ano].get('Ágata', 0) for ano in anos_filtrados],
-                'Quartzo': [contagens[ano].get('Quartzo', 0) for ano in anos_filtrados],
-            })
+            tabela_dados = self.filtrar(versao, tuple(anos_selecionados))
             st.write(tabela_dados.set_index("Ano"))
 
             st.markdown("<br>", unsafe_allow_html=True)
@@ -101,11 +78,13 @@ class FrequenciaPedrasTab(TabInterface):
                 st.metric(label="", value=total_quartzo)
                 st.line_chart(tabela_dados['Quartzo'], use_container_width=True)
 
+            self.fase('exportar')
+
             st.subheader(':blue[Exportação de Dados e Gráficos]', divider='orange')
 
             # Botão para download dos dados filtrados
             csv_data = tabela_dados.to_csv(index=True).encode('utf-8')
-            st.download_button(
+            botao_download_csv(
                 label="Download dos Dados Filtrados",
                 data=csv_data,
                 file_name="frequencia_pedra_dados_filtrados.csv",
@@ -115,6 +94,30 @@ class FrequenciaPedrasTab(TabInterface):
             # Adicionar botão para download do gráfico como imagem
             self.download_graph_image(fig)
 
+    @etapa
+    def agregar(self, versao):
+        # Ordenar as contagens pelas categorias específicas: Topázio, Ametista, Ágata e Quartzo
+        ordered_categories = ['Topázio', 'Ametista', 'Ágata', 'Quartzo']
+
+        # Realiza a contagem de alunos por pedra em cada ano, a partir do cubo das linhas completas
+        return (
+            obter_cubo(versao=versao).contagem(por=[NIVEL_ANO, 'PEDRA'])
+            .unstack(fill_value=0)
+            .reindex(columns=ordered_categories, fill_value=0)
+        )
+
+    @etapa
+    def filtrar(self, versao, anos_selecionados):
+        # Aplicar o filtro de anos selecionados (fatia do índice por ano, na ordem da seleção)
+        contagens = self.agregar(versao)
+        return contagens.loc[list(anos_selecionados)].rename_axis(index='Ano', columns=None).reset_index()
+
+    @etapa
+    def construir_figura(self, versao, anos_selecionados, tipo_grafico):
+        contagens = self.agregar(versao)
+        contagens_filtradas = [contagens.loc[ano].values for ano in anos_selecionados]
+        return self.plot_graph(list(anos_selecionados), contagens_filtradas, tipo_grafico)
+
     def plot_graph(self, anos, contagens, tipo_grafico):
         # Criar a figura interativa com Plotly
         fig = go.Figure()
@@ -161,11 +164,5 @@ class FrequenciaPedrasTab(TabInterface):
         return fig
 
     def download_graph_image(self, fig):
-        # Função para permitir download da imagem do gráfico em PNG
-        img_bytes = fig.to_image(format="png")
-        st.download_button(
-            label="Download do Gráfico",
-            data=img_bytes,
-            file_name="grafico_frequencia_pedra.png",
-            mime="image/png"
-        )
+        # Função para permitir download da imagem do gráfico, gerada apenas quando solicitada pelo usuário
+        botao_download_grafico(fig, "grafico_frequencia_pedra.png", label="Download do Gráfico")
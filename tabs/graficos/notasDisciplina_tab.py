@@ -1,31 +1,34 @@
+import numpy as np
 import streamlit as st
-import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 from tabs.tab import TabInterface
+from util.cache import etapa
+from util.coorte import versao_coorte_atual
+from util.dados import dataset_versao
+from util.estatisticas import amostrar_pontos, densidade_kde, resumo_boxplot
+from util.exportacao import botao_download_csv, botao_download_grafico
+from util.histograma import NUMERO_BINS, bordas_histograma, calcular_histograma, figura_histograma
 
 class NotasDisciplinaTab(TabInterface):
+    # Limites de pontos individuais enviados ao navegador no modo de estatísticas calculadas no servidor
+    LIMITE_PONTOS_PADRAO = 300
+    LIMITE_OUTLIERS = 500
+
+    # Mesma cor padrão usada pelo px.box / px.violin
+    COR_DISTRIBUICAO = '#636efa'
+
+    COLUNAS = {'NOTA_PORT_2022': 'float64', 'NOTA_MAT_2022': 'float64', 'NOTA_ING_2022': 'float64'}
+
     def __init__(self, tab):
         self.tab = tab
         self.render()
 
     def render(self):
         with self.tab:
-            # Carregar os dados
-            file_path = './dataset/PEDE_PASSOS_DATASET_FIAP.csv'
-            df = pd.read_csv(file_path, sep=';')
-
-            # Renomear as colunas
-            df = df.rename(columns={
-                'NOTA_PORT_2022': 'Portugues',
-                'NOTA_MAT_2022': 'Matematica',
-                'NOTA_ING_2022': 'Ingles'
-            })
-
-            # Preparar os dados
-            columns_to_analyze = ['Portugues', 'Matematica', 'Ingles']
-            df[columns_to_analyze] = df[columns_to_analyze].apply(pd.to_numeric, errors='coerce')
-            df_clean = df.dropna(subset=columns_to_analyze)
+            self.fase('carregar')
+
+            # Versão do dataset (com a coorte da barra lateral): chave das etapas em cache (limpar → filtrar → figura)
+            versao = versao_coorte_atual()
 
             # Filtros interativos
             disciplinas = ['Portugues', 'Matematica', 'Ingles']
@@ -35,8 +38,17 @@ class NotasDisciplinaTab(TabInterface):
 
             tipo_grafico = st.radio("Escolha o tipo de gráfico:", ("Boxplot", "Violin Plot", "Histograma"), key='tipo_grafico_notas')
 
-            # Aplicar filtros com base nas disciplinas selecionadas
-            df_filtrado = df_clean[disciplinas_selecionadas]
+            # No Boxplot e no Violin Plot, quartis, cercas, outliers e densidade podem ser calculados no servidor:
+            # o gráfico recebe apenas os resumos e uma amostra limitada de pontos, em vez da nota de cada aluno
+            resumo_servidor = False
+            limite_pontos = self.LIMITE_PONTOS_PADRAO
+            if tipo_grafico in ("Boxplot", "Violin Plot"):
+                resumo_servidor = st.toggle('Calcular as estatísticas no servidor', value=True, key='resumo_servidor_notas')
+                if resumo_servidor:
+                    limite_pontos = st.slider(
+                        'Máximo de pontos individuais por disciplina:', min_value=0, max_value=1000,
+                        value=self.LIMITE_PONTOS_PADRAO, step=50, key='limite_pontos_notas'
+                    )
 
             # Gerar funcionalidade que mostra os detalhes da visualização escolhida pelo usuário
             disciplinas_str = ', '.join(disciplinas_selecionadas)
@@ -46,83 +58,11 @@ class NotasDisciplinaTab(TabInterface):
                 st.write(f"📚 **Disciplinas Selecionadas:** {disciplinas_str}.")
                 st.write(f"📊 **{tipo_grafico_str}**")
 
-            # Plotar gráfico Boxplot, Violin Plot ou Histograma individual por disciplina
-            if tipo_grafico == "Boxplot":
-                fig = px.box(df_filtrado.melt(var_name='Disciplinas', value_name='Notas'), x='Disciplinas', y='Notas', points="all", title='Distribuição das Notas por Disciplina (2022)')
-            elif tipo_grafico == "Violin Plot":
-                fig = px.violin(df_filtrado.melt(var_name='Disciplinas', value_name='Notas'), x='Disciplinas', y='Notas', points="all", title='Distribuição das Notas por Disciplina (2022)')
-            elif tipo_grafico == "Histograma":
-                # Criar um histograma separado para cada disciplina selecionada
-                for disciplina in disciplinas_selecionadas:
-                    fig = px.histogram(df_clean, x=disciplina, nbins=20, title=f'Histograma de {disciplina} (2022)', color_discrete_sequence=['lightblue'])
-                    fig.update_traces(marker_line=dict(width=0.5, color='black'))
-                    fig.update_layout(
-                        xaxis=dict(
-                            title='Notas'  
-                        ),
-                        yaxis=dict(
-                            title='Frequência',
-                            showgrid=True,
-                            gridcolor='lightgray',
-                        ),
-                        title={
-                            'text': f'Histograma das Notas de {disciplina} (2022)',
-                            'y': 0.91,
-                            'x': 0.5,
-                            'xanchor': 'center',
-                            'yanchor': 'top',
-                        },
-                        font=dict(
-                            family="Arial, sans-serif",
-                            size=14  
-                        ),
-                        plot_bgcolor='#f7f7f7',  # Background mais claro
-                        paper_bgcolor='#f7f7f7',  # Fundo geral da figura
-                        hoverlabel=dict(
-                            bgcolor="white",
-                            font_size=14,
-                            font_family="Arial"
-                        ),
-                        margin=dict(l=50, r=50, t=80, b=50),
-                        showlegend=False
-                    )
-                    # Exibir o histograma para cada disciplina
-                    st.plotly_chart(fig)
+            self.fase('plotar')
 
-            # Layout do gráfico
-            if tipo_grafico in ["Boxplot", "Violin Plot"]:
-                fig.update_layout(
-                    xaxis=dict(
-                        title='Disciplinas'
-                    ),
-                    yaxis=dict(
-                        title='Notas',
-                        showgrid=True,
-                        gridcolor='lightgray',
-                    ),
-                    title={
-                        'text': 'Distribuição das Notas por Disciplina (2022)',
-                        'y': 0.91,
-                        'x': 0.5,
-                        'xanchor': 'center',
-                        'yanchor': 'top',
-                    },
-                    font=dict(
-                        family="Arial, sans-serif",
-                        size=14  
-                    ),
-                    plot_bgcolor='#f7f7f7',  # Background mais claro
-                    paper_bgcolor='#f7f7f7',  # Fundo geral da figura
-                    hoverlabel=dict(
-                        bgcolor="white",
-                        font_size=14,
-                        font_family="Arial"
-                    ),
-                    margin=dict(l=50, r=50, t=80, b=50),  # Ajustar margens
-                    showlegend=False
-                )
-
-                # Exibir o gráfico
+            # Plotar gráfico Boxplot, Violin Plot ou Histograma individual por disciplina
+            figuras = self.construir_figuras(versao, tuple(disciplinas_selecionadas), tipo_grafico, resumo_servidor, limite_pontos)
+            for fig in figuras:
                 st.plotly_chart(fig)
 
             st.markdown("<br>", unsafe_allow_html=True)
@@ -130,22 +70,7 @@ class NotasDisciplinaTab(TabInterface):
             st.subheader(':blue[Resumo Estatístico de Notas por Disciplina]', divider='orange')
 
             # Exibir resumo estatístico e ajustar os nomes para português
-            resumo_estatistico = df_filtrado.describe()
-
-            # Renomear as linhas para português
-            resumo_estatistico = resumo_estatistico.rename(index={
-                'count': 'Contagem',
-                'mean': 'Média',
-                'std': 'Desvio Padrão',
-                'min': 'Mínimo',
-                '25%': '1º Quartil (25%)',
-                '50%': 'Mediana (50%)',
-                '75%': '3º Quartil (75%)',
-                'max': 'Máximo'
-            })
-
-            # Adicionar nome à primeira coluna (por exemplo, 'Estatística')
-            resumo_estatistico.index.name = 'Estatística'
+            resumo_estatistico = self.resumir(versao, tuple(disciplinas_selecionadas))
 
             # Exibir o resumo ajustado
             st.write(resumo_estatistico)
@@ -155,46 +80,7 @@ class NotasDisciplinaTab(TabInterface):
             # Gráfico "Média das Notas por Disciplina (2022)" 
             st.subheader(':blue[Média das Notas por Disciplina (2022)]', divider='orange')
             
-            means = df_clean[columns_to_analyze].mean()
-
-            # Criar o gráfico de barras 
-            fig_means = go.Figure(
-                data=[go.Bar(
-                    x=means.index,
-                    y=means.values,
-                    text=[f'{value:.2f}' for value in means.values],
-                    textposition='auto',
-                    marker_color=['#1f77b4', '#ff7f0e', '#2ca02c'], 
-                    hoverinfo='text'
-                )]
-            )
-
-            # Adicionar título e ajustar layout do gráfico
-            fig_means.update_layout(
-                title={
-                'text': 'Média das Notas por Disciplina (2022)',
-                'y': 0.91,
-                'x': 0.46,
-                'xanchor': 'center',
-                'yanchor': 'top'
-            },
-                xaxis_title="Disciplina",
-                yaxis_title="Média",
-                font=dict(
-                    family="Arial, sans-serif",
-                    size=14
-                ),
-                plot_bgcolor='#f7f7f7',
-                paper_bgcolor='#f7f7f7',
-                hoverlabel=dict(
-                    bgcolor="white",
-                    font_size=14,
-                    font_family="Arial"
-                ),
-                margin=dict(l=50, r=50, t=70, b=50),  
-                showlegend=False,
-                bargap=0.3, 
-            )
+            fig_means = self.construir_figura_medias(versao)
 
             # Exibir o gráfico de barras no Streamlit
             st.plotly_chart(fig_means)
@@ -204,38 +90,37 @@ class NotasDisciplinaTab(TabInterface):
             # Exibir Métricas Dinâmicas com barras de progresso
             st.subheader(':blue[Visão Geral das Notas (Disciplinas Combinadas)]', divider='orange')
 
-            media = df_filtrado.mean().mean()
-            maxima = df_filtrado.max().max()
-            minima = df_filtrado.min().min()
-            desvio_padrao = df_filtrado.std().std()
+            media, maxima, minima, desvio_padrao = self.calcular_metricas(versao, tuple(disciplinas_selecionadas))
 
             col1, col2 = st.columns(2)
 
             with col1:
                 st.markdown("<h3 style='font-size:17px;'>📈 Média das Notas:</h3>", unsafe_allow_html=True)
                 st.metric(label="", value=f"{media:.2f}")
-                st.progress(media / 10)  # Supondo que a nota máxima seja 10
+                st.progress(self.fracao_progresso(media))  # Supondo que a nota máxima seja 10
 
                 st.markdown("<h3 style='font-size:17px;'>📊 Nota Máxima:</h3>", unsafe_allow_html=True)
                 st.metric(label="", value=f"{maxima:.2f}")
-                st.progress(maxima / 10)
+                st.progress(self.fracao_progresso(maxima))
 
             with col2:
                 st.markdown("<h3 style='font-size:17px;'>📉 Nota Mínima:</h3>", unsafe_allow_html=True)
                 st.metric(label="", value=f"{minima:.2f}")
-                st.progress(minima / 10)
+                st.progress(self.fracao_progresso(minima))
 
                 st.markdown("<h3 style='font-size:17px;'>📉 Desvio Padrão:</h3>", unsafe_allow_html=True)
                 st.metric(label="", value=f"{desvio_padrao:.2f}")
-                st.progress(desvio_padrao / 10)
+                st.progress(self.fracao_progresso(desvio_padrao))
 
             st.markdown("<br>", unsafe_allow_html=True)
 
+            self.fase('exportar')
+
             st.subheader(':blue[Exportação de Dados e Gráficos]', divider='orange')
 
             # Botão para download dos dados filtrados
-            csv_data = df_filtrado.to_csv(index=False).encode('utf-8')
-            st.download_button(
+            csv_data = self.exportar_csv(versao, tuple(disciplinas_selecionadas))
+            botao_download_csv(
                 label="Download dos Dados Filtrados",
                 data=csv_data,
                 file_name="notas_dados_filtrados.csv",
@@ -245,12 +130,263 @@ class NotasDisciplinaTab(TabInterface):
             # Botão para download do gráfico de Boxplot ou Violin Plot
             self.download_graph_image(fig, "grafico_notas.png")
 
-    def download_graph_image(self, fig, filename):
-        # Função para permitir download da imagem do gráfico em PNG
-        img_bytes = fig.to_image(format="png")
-        st.download_button(
-            label="Download do Gráfico",
-            data=img_bytes,
-            file_name=filename,
-            mime="image/png"
+    @etapa
+    def preparar(self, versao):
+        # Renomear as colunas
+        df = dataset_versao(versao, self.manifesto()).rename(columns={
+            'NOTA_PORT_2022': 'Portugues',
+            'NOTA_MAT_2022': 'Matematica',
+            'NOTA_ING_2022': 'Ingles'
+        })
+
+        # Preparar os dados (as notas já são numéricas no dataset tipado)
+        columns_to_analyze = ['Portugues', 'Matematica', 'Ingles']
+        return df.dropna(subset=columns_to_analyze)
+
+    @etapa
+    def filtrar(self, versao, disciplinas_selecionadas):
+        # Aplicar filtros com base nas disciplinas selecionadas
+        return self.preparar(versao)[list(disciplinas_selecionadas)]
+
+    @etapa
+    def resumir_distribuicoes(self, versao, disciplinas_selecionadas):
+        # Quartis, cercas, outliers e curva de densidade de cada disciplina, calculados com NumPy
+        df_filtrado = self.filtrar(versao, disciplinas_selecionadas)
+        return {
+            disciplina: {
+                'boxplot': resumo_boxplot(df_filtrado[disciplina]),
+                'densidade': densidade_kde(df_filtrado[disciplina])
+            }
+            for disciplina in disciplinas_selecionadas
+        }
+
+    @etapa
+    def construir_figuras(self, versao, disciplinas_selecionadas, tipo_grafico, resumo_servidor=False, limite_pontos=LIMITE_PONTOS_PADRAO):
+        # Plotar gráfico Boxplot, Violin Plot ou Histograma individual por disciplina
+        figuras = []
+        if tipo_grafico in ("Boxplot", "Violin Plot") and resumo_servidor:
+            fig = self.plot_resumo_distribuicoes(versao, disciplinas_selecionadas, tipo_grafico, limite_pontos)
+        elif tipo_grafico == "Boxplot":
+            # Plotly Express só é importado nos modos que enviam todos os pontos ao navegador
+            import plotly.express as px
+            fig = px.box(self.filtrar(versao, disciplinas_selecionadas).melt(var_name='Disciplinas', value_name='Notas'), x='Disciplinas', y='Notas', points="all", title='Distribuição das Notas por Disciplina (2022)')
+        elif tipo_grafico == "Violin Plot":
+            import plotly.express as px
+            fig = px.violin(self.filtrar(versao, disciplinas_selecionadas).melt(var_name='Disciplinas', value_name='Notas'), x='Disciplinas', y='Notas', points="all", title='Distribuição das Notas por Disciplina (2022)')
+        elif tipo_grafico == "Histograma":
+            # Criar um histograma separado para cada disciplina selecionada
+            for disciplina in disciplinas_selecionadas:
+                fig = figura_histograma(self.histograma(versao, disciplina), 'lightblue', rotulo_valor='Notas', rotulo_contagem='Frequência')
+                fig.update_layout(
+                    bargap=0,
+                    xaxis=dict(
+                        title='Notas'  
+                    ),
+                    yaxis=dict(
+                        title='Frequência',
+                        showgrid=True,
+                        gridcolor='lightgray',
+                    ),
+                    title={
+                        'text': f'Histograma das Notas de {disciplina} (2022)',
+                        'y': 0.91,
+                        'x': 0.5,
+                        'xanchor': 'center',
+                        'yanchor': 'top',
+                    },
+                    font=dict(
+                        family="Arial, sans-serif",
+                        size=14  
+                    ),
+                    plot_bgcolor='#f7f7f7',  # Background mais claro
+                    paper_bgcolor='#f7f7f7',  # Fundo geral da figura
+                    hoverlabel=dict(
+                        bgcolor="white",
+                        font_size=14,
+                        font_family="Arial"
+                    ),
+                    margin=dict(l=50, r=50, t=80, b=50),
+                    showlegend=False
+                )
+                # Um gráfico para cada disciplina
+                figuras.append(fig)
+
+        # Layout do gráfico
+        if tipo_grafico in ["Boxplot", "Violin Plot"]:
+            fig.update_layout(
+                xaxis=dict(
+                    title='Disciplinas'
+                ),
+                yaxis=dict(
+                    title='Notas',
+                    showgrid=True,
+                    gridcolor='lightgray',
+                ),
+                title={
+                    'text': 'Distribuição das Notas por Disciplina (2022)',
+                    'y': 0.91,
+                    'x': 0.5,
+                    'xanchor': 'center',
+                    'yanchor': 'top',
+                },
+                font=dict(
+                    family="Arial, sans-serif",
+                    size=14  
+                ),
+                plot_bgcolor='#f7f7f7',  # Background mais claro
+                paper_bgcolor='#f7f7f7',  # Fundo geral da figura
+                hoverlabel=dict(
+                    bgcolor="white",
+                    font_size=14,
+                    font_family="Arial"
+                ),
+                margin=dict(l=50, r=50, t=80, b=50),  # Ajustar margens
+                showlegend=False
+            )
+
+            figuras.append(fig)
+
+        return figuras
+
+    @etapa
+    def histograma(self, versao, disciplina, nbins=NUMERO_BINS):
+        # Contagens por intervalo das notas de uma disciplina, calculadas no servidor com bordas fixas
+        notas = self.preparar(versao)[disciplina]
+        return calcular_histograma(notas, bordas_histograma(notas, nbins))
+
+    def plot_resumo_distribuicoes(self, versao, disciplinas_selecionadas, tipo_grafico, limite_pontos):
+        # Boxplot / Violin Plot montado a partir dos resumos: o tamanho do gráfico não depende do número de alunos
+        df_filtrado = self.filtrar(versao, disciplinas_selecionadas)
+        resumos = self.resumir_distribuicoes(versao, disciplinas_selecionadas)
+        gerador = np.random.default_rng(0)
+
+        fig = go.Figure()
+        for posicao, disciplina in enumerate(disciplinas_selecionadas):
+            boxplot = resumos[disciplina]['boxplot']
+            densidade = resumos[disciplina]['densidade']
+            if boxplot is None:
+                continue
+
+            # Contorno do violino a partir da curva de densidade, espelhada em torno da posição da disciplina
+            if tipo_grafico == "Violin Plot":
+                meia_largura = 0.4 * densidade['densidade'] / densidade['densidade'].max()
+                fig.add_trace(go.Scatter(
+                    x=np.concatenate([posicao - meia_largura, (posicao + meia_largura)[::-1]]),
+                    y=np.concatenate([densidade['y'], densidade['y'][::-1]]),
+                    fill='toself', mode='lines', line=dict(color=self.COR_DISTRIBUICAO, width=1),
+                    name=disciplina, hoverinfo='skip'
+                ))
+
+            fig.add_trace(go.Box(
+                x=[posicao], q1=[boxplot['q1']], median=[boxplot['mediana']], q3=[boxplot['q3']],
+                lowerfence=[boxplot['cerca_inferior']], upperfence=[boxplot['cerca_superior']],
+                width=0.15 if tipo_grafico == "Violin Plot" else 0.5,
+                marker_color=self.COR_DISTRIBUICAO, name=disciplina, boxpoints=False
+            ))
+
+            # Outliers e amostra de pontos individuais, ambos limitados
+            outliers = amostrar_pontos(boxplot['outliers'], self.LIMITE_OUTLIERS)
+            if outliers.size:
+                fig.add_trace(go.Scatter(
+                    x=np.full(outliers.size, posicao), y=outliers, mode='markers', name=f'{disciplina} (outliers)',
+                    marker=dict(color=self.COR_DISTRIBUICAO, symbol='circle-open', size=6)
+                ))
+
+            pontos = amostrar_pontos(df_filtrado[disciplina], limite_pontos)
+            if pontos.size:
+                fig.add_trace(go.Scatter(
+                    x=np.round(posicao - 0.3 + gerador.uniform(-0.08, 0.08, pontos.size), 3), y=pontos, mode='markers',
+                    name=f'{disciplina} (amostra)', marker=dict(color=self.COR_DISTRIBUICAO, size=4, opacity=0.5)
+                ))
+
+        fig.update_xaxes(tickvals=list(range(len(disciplinas_selecionadas))), ticktext=list(disciplinas_selecionadas))
+        return fig
+
+    @etapa
+    def resumir(self, versao, disciplinas_selecionadas):
+        resumo_estatistico = self.filtrar(versao, disciplinas_selecionadas).describe()
+
+        # Renomear as linhas para português
+        resumo_estatistico = resumo_estatistico.rename(index={
+            'count': 'Contagem',
+            'mean': 'Média',
+            'std': 'Desvio Padrão',
+            'min': 'Mínimo',
+            '25%': '1º Quartil (25%)',
+            '50%': 'Mediana (50%)',
+            '75%': '3º Quartil (75%)',
+            'max': 'Máximo'
+        })
+
+        # Adicionar nome à primeira coluna (por exemplo, 'Estatística')
+        resumo_estatistico.index.name = 'Estatística'
+
+        return resumo_estatistico
+
+    @etapa
+    def construir_figura_medias(self, versao):
+        means = self.preparar(versao)[['Portugues', 'Matematica', 'Ingles']].mean()
+
+        # Criar o gráfico de barras 
+        fig_means = go.Figure(
+            data=[go.Bar(
+                x=means.index,
+                y=means.values,
+                text=[f'{value:.2f}' for value in means.values],
+                textposition='auto',
+                marker_color=['#1f77b4', '#ff7f0e', '#2ca02c'], 
+                hoverinfo='text'
+            )]
         )
+
+        # Adicionar título e ajustar layout do gráfico
+        fig_means.update_layout(
+            title={
+            'text': 'Média das Notas por Disciplina (2022)',
+            'y': 0.91,
+            'x': 0.46,
+            'xanchor': 'center',
+            'yanchor': 'top'
+        },
+            xaxis_title="Disciplina",
+            yaxis_title="Média",
+            font=dict(
+                family="Arial, sans-serif",
+                size=14
+            ),
+            plot_bgcolor='#f7f7f7',
+            paper_bgcolor='#f7f7f7',
+            hoverlabel=dict(
+                bgcolor="white",
+                font_size=14,
+                font_family="Arial"
+            ),
+            margin=dict(l=50, r=50, t=70, b=50),  
+            showlegend=False,
+            bargap=0.3, 
+        )
+
+        return fig_means
+
+    @etapa
+    def calcular_metricas(self, versao, disciplinas_selecionadas):
+        df_filtrado = self.filtrar(versao, disciplinas_selecionadas)
+        media = df_filtrado.mean().mean()
+        maxima = df_filtrado.max().max()
+        minima = df_filtrado.min().min()
+        desvio_padrao = df_filtrado.std().std()
+
+        return media, maxima, minima, desvio_padrao
+
+    @staticmethod
+    def fracao_progresso(valor, nota_maxima=10):
+        # Fração da barra de progresso; coortes pequenas podem gerar NaN (ex.: desvio padrão de um único aluno)
+        return 0.0 if np.isnan(valor) else float(np.clip(valor / nota_maxima, 0, 1))
+
+    @etapa
+    def exportar_csv(self, versao, disciplinas_selecionadas):
+        return self.filtrar(versao, disciplinas_selecionadas).to_csv(index=False).encode('utf-8')
+
+    def download_graph_image(self, fig, filename):
+        # Função para permitir download da imagem do gráfico, gerada apenas quando solicitada pelo usuário
+        botao_download_grafico(fig, filename, label="Download do Gráfico")
@@ -0,0 +1,224 @@
+import streamlit as st
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from tabs.tab import TabInterface
+from util.cache import etapa
+from util.coorte import versao_coorte_atual
+from util.dados import dataset_versao
+from util.exportacao import botao_download_csv, botao_download_grafico
+from util.formato_longo import NIVEL_ALUNO, para_formato_longo
+from util.indice_alunos import IndiceAlunos
+
+
+class PerfilAlunoTab(TabInterface):
+    ANOS = ['2020', '2021', '2022']
+    INDICADORES = ['INDE', 'IAA', 'IEG', 'IPS', 'IDA', 'IPP', 'IPV', 'IAN']
+    CATEGORIAS = ['PEDRA', 'PONTO_VIRADA']
+    COLUNAS = {
+        'NOME': 'object',
+        'INDE_{ano}': 'float64', 'IAA_{ano}': 'float64', 'IEG_{ano}': 'float64', 'IPS_{ano}': 'float64',
+        'IDA_{ano}': 'float64', 'IPP_{ano}': 'float64', 'IPV_{ano}': 'float64', 'IAN_{ano}': 'float64',
+        'PEDRA_{ano}': 'category', 'PONTO_VIRADA_{ano}': 'category',
+    }
+
+    # Máximo de nomes sugeridos pela busca por prefixo
+    LIMITE_SUGESTOES = 50
+
+    def __init__(self, tab):
+        self.tab = tab
+        self.render()
+
+    def render(self):
+        with self.tab:
+            self.fase('carregar')
+
+            # Versão do dataset (com a coorte da barra lateral): chave das etapas em cache da coorte (agregar → índice →
+            # distribuições → faixas). A coorte também é o grupo de comparação dos percentis do aluno
+            versao = versao_coorte_atual()
+            indice = self.indice(versao)
+
+            # Busca por prefixo do nome (autocompletar) e escolha do aluno entre as sugestões
+            busca = st.text_input('Buscar aluno pelo nome:', placeholder='ex.: ALUNO-12', key='busca_perfil_aluno')
+            sugestoes, total = indice.buscar_prefixo(busca, self.LIMITE_SUGESTOES)
+            if not sugestoes:
+                st.warning(f"Nenhum aluno da coorte com nome iniciado por '{busca}'.")
+                return
+            if total > len(sugestoes):
+                st.caption(f'{total} alunos encontrados; exibindo os {len(sugestoes)} primeiros. Refine a busca.')
+
+            nome = st.selectbox('Selecione o aluno:', options=sugestoes, key='aluno_perfil_aluno')
+            indicador = st.radio("Escolha o indicador:", self.INDICADORES, horizontal=True, key='indicador_perfil_aluno')
+
+            self.fase('preparar')
+
+            # Trajetória do aluno (indicadores, Pedra e Ponto de Virada por ano) e percentis na coorte
+            perfil = self.perfil(versao, nome)
+            percentis = self.percentis(versao, nome)
+
+            with st.expander("Detalhes da Visualização"):
+                st.write(f"✅ **Aluno Selecionado:** {nome}.")
+                st.write(f"📊 **Indicador:** {indicador}.")
+                st.write(f"👥 **Alunos na Coorte:** {len(indice)}.")
+
+            self.fase('plotar')
+
+            fig = self.construir_figura(versao, nome, indicador)
+            st.plotly_chart(fig)
+
+            st.subheader(':blue[Trajetória do Aluno por Ano]', divider='orange')
+
+            # Exibir tabela com os valores do aluno em cada ano
+            st.write(perfil)
+
+            st.markdown("<br>", unsafe_allow_html=True)
+
+            st.subheader(':blue[Posição do Aluno na Coorte]', divider='orange')
+
+            # INDE de cada ano comparado com a mediana da coorte, com o percentil do aluno
+            medianas = self.faixas(versao).xs('Mediana', level='ESTATISTICA', axis=1)
+            colunas = st.columns(len(self.ANOS))
+            for coluna, ano in zip(colunas, self.ANOS):
+                with coluna:
+                    valor = perfil.loc[ano, 'INDE'] if ano in perfil.index else np.nan
+                    st.markdown(f"<h3 style='font-size:17px;'>🎯 INDE {ano}:</h3>", unsafe_allow_html=True)
+                    if np.isnan(valor):
+                        st.metric(label="", value="—")
+                        st.caption('Sem avaliação no ano.')
+                    else:
+                        mediana = medianas.loc['INDE', ano]
+                        st.metric(label="", value=f"{valor:.2f}", delta=f"{valor - mediana:+.2f} vs. mediana")
+                        st.caption(f"Percentil {percentis.loc['INDE', ano]:.0f} na coorte.")
+
+            # Percentil do aluno em todos os indicadores
+            st.write(percentis.style.format('{:.0f}', na_rep='—'))
+
+            self.fase('exportar')
+
+            st.subheader(':blue[Exportação de Dados e Gráficos]', divider='orange')
+
+            # Botão para download do perfil do aluno
+            csv_data = perfil.join(percentis.T.add_prefix('PERCENTIL_')).to_csv(index=True).encode('utf-8')
+            botao_download_csv(
+                label="Download do Perfil do Aluno",
+                data=csv_data,
+                file_name=f"perfil_{nome}.csv",
+                mime="text/csv"
+            )
+
+            # Adicionar botão para download do gráfico como imagem
+            self.download_graph_image(fig, nome)
+
+    @etapa
+    def agregar(self, versao):
+        # Colunas do perfil para todos os alunos da coorte (uma linha por aluno), na ordem usada pelo índice
+        return dataset_versao(versao, self.manifesto()).reset_index(drop=True)
+
+    @etapa
+    def indice(self, versao):
+        # Índice hash e lista ordenada de nomes, construídos uma vez por versão (e coorte)
+        return IndiceAlunos(self.agregar(versao)[NIVEL_ALUNO])
+
+    @etapa
+    def distribuicoes(self, versao):
+        # Valores ordenados (sem ausentes) de cada indicador e ano na coorte: o percentil de um aluno sai de uma
+        # busca binária (np.searchsorted), sem reordenar a coluna a cada consulta
+        df = self.agregar(versao)
+        colunas = [f'{indicador}_{ano}' for indicador in self.INDICADORES for ano in self.ANOS]
+        return {coluna: np.sort(df[coluna].dropna().to_numpy()) for coluna in colunas}
+
+    @etapa
+    def faixas(self, versao):
+        # Quartis da coorte por indicador (linhas) e ano (colunas), usados como referência no gráfico e nas métricas
+        distribuicoes = self.distribuicoes(versao)
+        estatisticas = {'P25': 25, 'Mediana': 50, 'P75': 75}
+        faixas = pd.DataFrame(
+            index=self.INDICADORES,
+            columns=pd.MultiIndex.from_product([estatisticas, self.ANOS], names=['ESTATISTICA', 'ANO']),
+            dtype='float64'
+        )
+        for indicador in self.INDICADORES:
+            for ano in self.ANOS:
+                valores = distribuicoes[f'{indicador}_{ano}']
+                if len(valores):
+                    faixas.loc[indicador, [(nome, ano) for nome in estatisticas]] = np.percentile(valores, list(estatisticas.values()))
+        return faixas
+
+    def perfil(self, versao, nome):
+        # Linha do aluno localizada pelo índice (iloc) e convertida para uma linha por ano. Perfil, percentis e figura
+        # de um aluno ficam fora do cache das etapas (uma entrada por aluno encheria o cache e o disco com perfis
+        # individuais): são consultas rápidas sobre as etapas da coorte, essas sim em cache
+        linha = self.agregar(versao).iloc[[self.indice(versao).posicao(nome)]]
+        perfil = para_formato_longo(linha, indicadores=[*self.INDICADORES, *self.CATEGORIAS]).droplevel(NIVEL_ALUNO)
+        return perfil[[*self.INDICADORES, *self.CATEGORIAS]]
+
+    def percentis(self, versao, nome):
+        # Percentil do aluno na coorte: % dos alunos avaliados no ano com valor menor ou igual ao dele
+        distribuicoes = self.distribuicoes(versao)
+        perfil = self.perfil(versao, nome)
+        percentis = pd.DataFrame(index=self.INDICADORES, columns=self.ANOS, dtype='float64')
+        for indicador in self.INDICADORES:
+            for ano in self.ANOS:
+                valores = distribuicoes[f'{indicador}_{ano}']
+                valor = perfil.loc[ano, indicador] if ano in perfil.index else np.nan
+                if len(valores) and not np.isnan(valor):
+                    percentis.loc[indicador, ano] = np.searchsorted(valores, valor, side='right') / len(valores) * 100
+        return percentis
+
+    def construir_figura(self, versao, nome, indicador):
+        faixas = self.faixas(versao).loc[indicador]
+        perfil = self.perfil(versao, nome)
+        valores_aluno = perfil[indicador].reindex(self.ANOS).tolist()
+        return self.plot_graph(
+            self.ANOS, nome, indicador, valores_aluno,
+            faixas['P25'].tolist(), faixas['Mediana'].tolist(), faixas['P75'].tolist()
+        )
+
+    def plot_graph(self, anos, nome, indicador, valores_aluno, p25, mediana, p75):
+        # Criar a figura interativa com Plotly
+        fig = go.Figure()
+
+        # Faixa entre o 1º e o 3º quartil da coorte, mediana e trajetória do aluno
+        fig.add_trace(go.Scatter(x=anos, y=p75, mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'))
+        fig.add_trace(go.Scatter(
+            x=anos, y=p25, mode='lines', line=dict(width=0), fill='tonexty', fillcolor='rgba(0, 0, 255, 0.12)',
+            name='Coorte (P25–P75)'
+        ))
+        fig.add_trace(go.Scatter(
+            x=anos, y=mediana, mode='lines+markers', name='Mediana da Coorte',
+            line=dict(color='green', width=2, dash='dash'), marker=dict(size=8)
+        ))
+        fig.add_trace(go.Scatter(
+            x=anos, y=valores_aluno, mode='lines+markers', name=nome, line=dict(color='blue', width=3), marker=dict(size=10)
+        ))
+
+        # Layout do gráfico
+        fig.update_layout(
+            title={
+                'text': f'{indicador} de {nome} Comparado com a Coorte',
+                'y': 0.93,
+                'x': 0.45,
+                'xanchor': 'center',
+                'yanchor': 'top'
+            },
+            xaxis_title='Ano',
+            yaxis_title=indicador,
+            plot_bgcolor='white',
+            height=600,
+            width=750,
+            legend=dict(
+                x=0.3,
+                y=1.085,
+                orientation='h'
+            )
+        )
+
+        # Adicionar grid e linhas de estilo
+        fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='LightGrey', type='category')
+        fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='LightGrey')
+
+        return fig
+
+    def download_graph_image(self, fig, nome):
+        # Função para permitir download da imagem do gráfico, gerada apenas quando solicitada pelo usuário
+        botao_download_grafico(fig, f"grafico_perfil_{nome}.png", label="Download do Gráfico")
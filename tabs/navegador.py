@@ -0,0 +1,39 @@
+import streamlit as st
+
+from tabs.catalogo import carregar_aba
+
+
+class NavegadorTabs:
+    # Modos de renderização disponíveis:
+    # - 'seletor': apenas a aba escolhida no seletor é instanciada, então só ela carrega os dados e gera os gráficos
+    # - 'abas': comportamento original com st.tabs, em que todas as abas são renderizadas a cada execução
+    MODOS = ('seletor', 'abas')
+
+    def __init__(self, abas, modo='seletor', key='aba_dashboard'):
+        if modo not in self.MODOS:
+            raise ValueError(f"Modo de navegação inválido: {modo}. Use um de {self.MODOS}.")
+
+        # Lista de tuplas (título, aba): a aba é a classe que implementa TabInterface ou a referência
+        # 'módulo:Classe', importada apenas quando a aba é exibida
+        self.abas = abas
+        self.modo = modo
+        self.key = key
+        self.render()
+
+    def render(self):
+        titulos = [titulo for titulo, _ in self.abas]
+
+        if self.modo == 'abas':
+            containers = st.tabs(tabs=titulos)
+            for container, (_, aba) in zip(containers, self.abas):
+                carregar_aba(aba)(container)
+            return
+
+        titulo_selecionado = st.radio(
+            'Selecione o dashboard:', options=titulos, horizontal=True, key=self.key
+        )
+
+        st.markdown("<br>", unsafe_allow_html=True)
+
+        # Somente a aba selecionada executa o seu pipeline de dados e gráficos
+        carregar_aba(dict(self.abas)[titulo_selecionado])(st.container())
@@ -1,7 +1,31 @@
 from abc import ABC, abstractmethod
 
+from util.dados import manifesto
+from util.instrumentacao import instrumentar_render
+
 class TabInterface(ABC):
+    # Manifesto das colunas que a aba lê do dataset ({coluna: dtype}); a camada de dados carrega só essas colunas.
+    # Colunas anuais são declaradas com o marcador do ano ('INDE_{ano}') e lidas para todos os anos do dataset.
+    # None mantém a leitura do dataset inteiro
+    COLUNAS = None
+
+    def __init_subclass__(cls, **kwargs):
+        # Todo render() de aba é instrumentado: tempo, CPU e pico de memória por fase, a cada rerun
+        super().__init_subclass__(**kwargs)
+        if 'render' in cls.__dict__:
+            cls.render = instrumentar_render(cls.render)
+
+    def fase(self, nome):
+        # Marca o início de uma fase do render (carregar, preparar, plotar, exportar); a fase anterior é encerrada
+        registro = getattr(self, '_registro_render', None)
+        if registro is not None:
+            registro.iniciar_fase(nome)
+
+    @classmethod
+    def manifesto(cls):
+        # Manifesto em forma imutável, usado como chave das etapas dataset_versao/dataset_completo
+        return manifesto(cls.COLUNAS)
 
     @abstractmethod
     def render():
-        pass
\ No newline at end of file
+        pass
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Testes com o cache das etapas só em memória e sem aquecimento: nada é gravado em cache_resultados/
+os.environ.setdefault('DATATHON_CACHE', 'memoria')
+os.environ.setdefault('DATATHON_AQUECIMENTO', '0')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
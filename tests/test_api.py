@@ -0,0 +1,65 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from util import api
+
+
+@pytest.fixture(scope='module')
+def servidor():
+    servidor = api.criar_servidor(porta=0)
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://{api.HOST_PADRAO}:{servidor.server_address[1]}'
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def _get(url, cabecalhos=None):
+    requisicao = urllib.request.Request(url, headers=cabecalhos or {})
+    try:
+        with urllib.request.urlopen(requisicao) as resposta:
+            return resposta.status, dict(resposta.headers), resposta.read()
+    except urllib.error.HTTPError as erro:
+        return erro.code, dict(erro.headers), erro.read()
+
+
+def test_etag_igual_para_a_mesma_consulta_em_outra_ordem(servidor):
+    _, cabecalhos_a, _ = _get(f'{servidor}/api/ponto-virada?anos=2020,2021')
+    _, cabecalhos_b, _ = _get(f'{servidor}/api/ponto-virada?anos=2021,2020')
+    _, cabecalhos_c, _ = _get(f'{servidor}/api/ponto-virada?anos=2020')
+
+    assert cabecalhos_a['ETag'] == cabecalhos_b['ETag'] != cabecalhos_c['ETag']
+
+    status, _, corpo = _get(f'{servidor}/api/ponto-virada?anos=2021,2020', {'If-None-Match': cabecalhos_a['ETag']})
+    assert status == 304 and corpo == b''
+
+
+def test_etag_muda_com_o_codigo_das_etapas(monkeypatch):
+    versao, aplicados = 'a' * 64, {'pedras': ['Ametista']}
+    original = api.etag(versao, '/api/inde-por-pedra', aplicados)
+
+    monkeypatch.setattr(api, 'versao_codigo_rota', lambda caminho: 'outro-codigo')
+    assert api.etag(versao, '/api/inde-por-pedra', aplicados) != original
+
+
+def test_erro_inesperado_responde_500_em_json(servidor, monkeypatch):
+    def falhar(versao, pedras):
+        raise RuntimeError('falha')
+
+    interpretar, _, etapas, descricao = api.ROTAS['/api/inde-por-pedra']
+    monkeypatch.setitem(api.ROTAS, '/api/inde-por-pedra', (interpretar, falhar, etapas, descricao))
+
+    status, cabecalhos, corpo = _get(f'{servidor}/api/inde-por-pedra')
+    assert status == 500
+    assert cabecalhos['Content-Type'].startswith('application/json')
+    assert 'erro' in json.loads(corpo)
+
+
+def test_parametro_invalido_responde_400(servidor):
+    status, _, corpo = _get(f'{servidor}/api/correlacao?metodo=Kendall')
+    assert status == 400
+    assert 'Kendall' in json.loads(corpo)['erro']
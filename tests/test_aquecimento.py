@@ -0,0 +1,23 @@
+import sys
+
+import util.aquecimento as aquecimento
+from tabs.catalogo import modulos_e_classes
+
+
+def test_aquecimento_parcial_remove_resultados_obsoletos(monkeypatch):
+    chamadas = []
+
+    def remover(versao):
+        # No momento da limpeza, todas as abas já foram importadas (e suas etapas registradas)
+        chamadas.append([modulo in sys.modules for modulo, _ in modulos_e_classes()])
+        return 0
+
+    monkeypatch.setattr(aquecimento, 'remover_resultados_obsoletos', remover)
+
+    passos = aquecimento.aquecer([('tabs.graficos.pontoVirada_tab', 'PontoViradaTab')], imagens=False)
+
+    assert [passo['passo'] for passo in passos] == [
+        'dataset (hash e artefato colunar)', 'PontoViradaTab', 'remoção de resultados obsoletos'
+    ]
+    assert all(passo['erro'] is None for passo in passos)
+    assert chamadas and all(chamadas[0])
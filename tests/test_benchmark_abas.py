@@ -0,0 +1,29 @@
+import tracemalloc
+
+from benchmarks.benchmark_abas import _executar
+from util.instrumentacao import RegistroRender
+
+
+class _AppFalso:
+    # Simula o rerun de uma aba instrumentada: a primeira fase aloca 8 MB temporários e as seguintes quase nada
+    exception = []
+
+    def run(self, timeout=None):
+        registro = RegistroRender('AbaFalsa')
+        registro.iniciar_fase('carregar')
+        temporario = bytearray(8 * 1024 * 1024)
+        del temporario
+        for fase in ('preparar', 'plotar', 'exportar'):
+            registro.iniciar_fase(fase)
+        registro.finalizar(0, 0)
+
+
+def test_pico_do_benchmark_cobre_todas_as_fases():
+    tracemalloc.start()
+    try:
+        _, pico_kb, erros = _executar(_AppFalso())
+    finally:
+        tracemalloc.stop()
+
+    assert pico_kb >= 8 * 1024
+    assert erros == []
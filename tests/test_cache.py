@@ -0,0 +1,74 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import util.cache as cache
+from util.cache import AUSENTE, CacheDisco, criar_cache
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_backend_padrao_e_memoria():
+    ambiente = {chave: valor for chave, valor in os.environ.items() if chave != 'DATATHON_CACHE'}
+    saida = subprocess.run(
+        [sys.executable, '-c', 'import util.cache as c; print(c.BACKEND_CACHE, c._cache.compartilhado)'],
+        cwd=RAIZ, env=ambiente, capture_output=True, text=True, check=True
+    ).stdout
+
+    assert saida.split() == ['memoria', 'None']
+
+
+def test_despejo_lru_sem_varrer_a_pasta(tmp_path, monkeypatch):
+    disco = CacheDisco(str(tmp_path / 'etapas'), limite_bytes=3500)
+    valor = b'x' * 1000
+
+    # Depois de criado, o cache não varre a pasta: o despejo usa o índice do processo
+    def varredura(*args, **kwargs):
+        raise AssertionError('a pasta foi varrida')
+
+    monkeypatch.setattr(cache.os, 'scandir', varredura)
+
+    for chave in ['a', 'b', 'c']:
+        disco.guardar(chave, valor)
+    assert disco.obter('a') == valor
+    disco.guardar('d', valor)
+
+    assert disco.obter('b') is AUSENTE
+    assert [disco.obter(chave) == valor for chave in ['a', 'c', 'd']] == [True, True, True]
+    assert disco._total == sum(os.path.getsize(caminho) for caminho in disco._indice)
+    assert len(os.listdir(disco.pasta)) == 3
+
+
+def test_indice_inicial_vem_da_pasta(tmp_path):
+    pasta = str(tmp_path / 'etapas')
+    CacheDisco(pasta, limite_bytes=10 ** 6).guardar('a', b'x' * 1000)
+
+    # Outra réplica (ou um reinício) encontra o arquivo já gravado e o conta no total
+    disco = CacheDisco(pasta, limite_bytes=1500)
+    disco.guardar('b', b'y' * 1000)
+
+    assert disco.obter('a') is AUSENTE
+    assert disco.obter('b') == b'y' * 1000
+
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason='permissões POSIX')
+def test_pasta_gravavel_por_outros_e_recusada(tmp_path, monkeypatch):
+    pasta = tmp_path / 'etapas'
+    pasta.mkdir()
+    pasta.chmod(0o777)
+
+    with pytest.raises(PermissionError):
+        CacheDisco(str(pasta), limite_bytes=10 ** 6)
+
+    # criar_cache cai para o cache só em memória
+    monkeypatch.setattr(cache, 'PASTA_CACHE', str(tmp_path))
+    assert criar_cache('etapas', 8, backend='disco').compartilhado is None
+
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason='permissões POSIX')
+def test_pasta_nova_e_privada(tmp_path):
+    disco = CacheDisco(str(tmp_path / 'etapas'), limite_bytes=10 ** 6)
+
+    assert os.stat(disco.pasta).st_mode & 0o777 == 0o700
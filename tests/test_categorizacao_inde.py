@@ -0,0 +1,14 @@
+from tabs.graficos.categorizacaoInde_tab import CategorizacaoIndeTab
+from util.dados import dataset_completo, versao_dataset
+
+
+def test_classificar_nao_altera_o_resultado_em_cache_de_dataset_completo():
+    aba = CategorizacaoIndeTab.__new__(CategorizacaoIndeTab)
+    versao = versao_dataset()
+
+    classificado = aba.classificar(versao)
+
+    assert {'INDE_TENDENCIA', 'INDE_VARIACAO'} <= set(classificado.columns)
+    compartilhado = dataset_completo(versao, aba.manifesto())
+    assert 'INDE_TENDENCIA' not in compartilhado.columns
+    assert 'INDE_VARIACAO' not in compartilhado.columns
@@ -0,0 +1,51 @@
+import pytest
+
+from tabs.graficos.comparacaoPedra_tab import ComparacaoPedraTab
+from util.api import inde_por_pedra, parametros_inde_por_pedra
+from util.cubo import obter_cubo
+from util.dados import versao_dataset
+
+COLUNAS_ESPERADAS = ['INDE_2020', 'INDE_2021', 'INDE_2022', 'INDE_Media_2020_2022']
+
+
+def _aba():
+    return ComparacaoPedraTab.__new__(ComparacaoPedraTab)
+
+
+def test_filtrar_sem_pedras_selecionadas():
+    tabela = _aba().filtrar(versao_dataset(), ())
+
+    assert list(tabela.columns) == COLUNAS_ESPERADAS
+    assert list(tabela.index) == ComparacaoPedraTab.PEDRAS
+    assert tabela.isna().all().all()
+
+
+def test_filtrar_mantem_colunas_com_selecao_parcial():
+    tabela = _aba().filtrar(versao_dataset(), ('Ametista',))
+
+    assert list(tabela.columns) == COLUNAS_ESPERADAS
+    assert tabela.loc['Ametista'].notna().all()
+    assert tabela.drop(index='Ametista').isna().all().all()
+
+
+def test_api_inde_por_pedra_com_lista_vazia():
+    aplicados = parametros_inde_por_pedra(versao_dataset(), {'pedras': ['']})
+    tabela = inde_por_pedra(versao_dataset(), **aplicados)
+
+    assert aplicados == {'pedras': []}
+    assert tabela['columns'] == COLUNAS_ESPERADAS
+
+
+def test_cubo_filtrado_compartilhado_entre_instancias():
+    versao = versao_dataset()
+
+    assert _aba().agregar.__wrapped__(_aba(), versao) is _aba().agregar.__wrapped__(_aba(), versao)
+
+
+def test_obter_cubo_recusa_metodo_ligado():
+    class Filtro:
+        def selecionar(self, df):
+            return df
+
+    with pytest.raises(ValueError):
+        obter_cubo('ligado', Filtro().selecionar, versao=versao_dataset())
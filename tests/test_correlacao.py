@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from util.correlacao import EstatisticasCorrelacao
+
+
+@pytest.fixture
+def df():
+    # Colunas com valores ausentes em linhas diferentes (pares completos variam por par) e uma coluna constante
+    gerador = np.random.default_rng(7)
+    df = pd.DataFrame(gerador.normal(size=(200, 4)), columns=['A', 'B', 'C', 'D'])
+    df['B'] += df['A']
+    df.loc[gerador.choice(200, 30, replace=False), 'A'] = np.nan
+    df.loc[gerador.choice(200, 45, replace=False), 'C'] = np.nan
+    df['D'] = 3.0
+    return df
+
+
+def test_pearson_igual_ao_pandas(df):
+    obtido = EstatisticasCorrelacao.de_dataframe(df).correlacao()
+
+    pd.testing.assert_frame_equal(obtido, df.corr(method='pearson'), atol=1e-12)
+
+
+def test_pearson_de_subconjunto_de_colunas(df):
+    estatisticas = EstatisticasCorrelacao.de_dataframe(df)
+
+    pd.testing.assert_frame_equal(estatisticas.correlacao(['C', 'A']), df[['C', 'A']].corr(), atol=1e-12)
+
+
+def test_spearman_sobre_postos_do_dataset_inteiro():
+    # Sem valores ausentes, Pearson sobre os postos da coluna inteira é a correlação de Spearman
+    gerador = np.random.default_rng(11)
+    df = pd.DataFrame(gerador.integers(0, 10, size=(150, 3)).astype('float64'), columns=['X', 'Y', 'Z'])
+
+    obtido = EstatisticasCorrelacao.de_dataframe(df, metodo='Spearman').correlacao()
+
+    pd.testing.assert_frame_equal(obtido, df.corr(method='spearman'), atol=1e-12)
+
+
+
+def test_adicionar_igual_a_recalcular_do_zero(df):
+    # Pearson: somar as estatísticas de lotes novos dá o mesmo resultado de calcular tudo de uma vez
+    estatisticas = EstatisticasCorrelacao.de_dataframe(df.iloc[:80])
+    estatisticas.adicionar(df.iloc[80:150])
+    estatisticas.adicionar(df.iloc[150:])
+
+    completo = EstatisticasCorrelacao.de_dataframe(df)
+    pd.testing.assert_frame_equal(estatisticas.correlacao(), completo.correlacao(), atol=1e-12)
+    np.testing.assert_array_equal(estatisticas.n, completo.n)
+
+
+def test_adicionar_recusa_spearman(df):
+    # Os postos são globais: um lote novo altera os postos das linhas já processadas
+    estatisticas = EstatisticasCorrelacao.de_dataframe(df.iloc[:100], metodo='Spearman')
+
+    with pytest.raises(ValueError, match='Spearman'):
+        estatisticas.adicionar(df.iloc[100:])
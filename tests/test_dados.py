@@ -0,0 +1,17 @@
+from util.dados import carregar_colunas, carregar_dataset
+
+
+def test_carregar_colunas_mantem_float32_compactado():
+    # IPS_2020 é gravada como float32 pela compactação; o manifesto 'float64' não força a conversão
+    df = carregar_colunas((('IPS_2020', 'float64'), ('INDE_2020', 'float64'), ('NOME', 'object')))
+
+    assert str(df['IPS_2020'].dtype) == 'float32'
+    assert str(df['INDE_2020'].dtype) == 'float64'
+    assert df['IPS_2020'].astype('float64').equals(carregar_dataset()['IPS_2020'].astype('float64'))
+
+
+def test_carregar_colunas_converte_tipo_de_outra_especie():
+    df = carregar_colunas((('IPS_2020', 'object'), ('PEDRA_2020', 'object')))
+
+    assert df['IPS_2020'].dtype == object
+    assert df['PEDRA_2020'].dtype == object
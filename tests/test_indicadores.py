@@ -0,0 +1,82 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from util.indicadores import calcular_variacao_inde, classificar_tendencia_inde
+
+
+# Implementações linha a linha originais da aba de Categorização do INDE, usadas como referência
+def calcular_tendencia(inde_2020, inde_2021, inde_2022):
+    if inde_2021 > inde_2020 and inde_2022 > inde_2021:
+        return 'Aumento'
+    elif inde_2021 < inde_2020 and inde_2022 < inde_2021:
+        return 'Queda'
+    elif inde_2021 > inde_2020 and inde_2022 < inde_2021:
+        return 'Aumento seguido de queda'
+    elif inde_2021 < inde_2020 and inde_2022 > inde_2021:
+        return 'Queda seguida de aumento'
+    elif inde_2020 == inde_2021 and inde_2021 > inde_2022:
+        return 'Queda'
+    elif inde_2020 == inde_2021 and inde_2021 < inde_2022:
+        return 'Aumento'
+    else:
+        return 'Estável'
+
+
+def calcular_variacao(inde_2020, inde_2022):
+    if inde_2020 == 0:
+        if inde_2022 == 0:
+            return 0
+        else:
+            return 'Aumento Infinito'
+    else:
+        return ((inde_2022 - inde_2020) / abs(inde_2020)) * 100
+
+
+VALORES = [np.nan, -2.5, 0.0, 5.0, 7.25]
+
+
+@pytest.fixture
+def df():
+    # Todas as combinações dos valores nos três anos: NaN, empates entre anos, base zero e base negativa
+    indice = pd.MultiIndex.from_product([VALORES, VALORES, VALORES], names=['INDE_2020', 'INDE_2021', 'INDE_2022'])
+    return indice.to_frame(index=False)
+
+
+def _iguais(esperado, obtido):
+    if isinstance(esperado, str) or isinstance(obtido, str):
+        return esperado == obtido
+    if math.isnan(esperado):
+        return math.isnan(obtido)
+    return esperado == pytest.approx(obtido)
+
+
+def test_tendencia_igual_a_versao_linha_a_linha(df):
+    esperado = df.apply(lambda row: calcular_tendencia(row['INDE_2020'], row['INDE_2021'], row['INDE_2022']), axis=1)
+    obtido = classificar_tendencia_inde(df['INDE_2020'], df['INDE_2021'], df['INDE_2022'])
+
+    pd.testing.assert_series_equal(obtido, esperado, check_names=False)
+
+
+def test_variacao_igual_a_versao_linha_a_linha(df):
+    esperado = df.apply(lambda row: calcular_variacao(row['INDE_2020'], row['INDE_2022']), axis=1)
+    obtido = calcular_variacao_inde(df['INDE_2020'], df['INDE_2022'])
+
+    assert obtido.index.equals(esperado.index)
+    divergentes = [
+        (linha, esperado[linha], obtido[linha]) for linha in df.index if not _iguais(esperado[linha], obtido[linha])
+    ]
+    assert not divergentes
+
+
+def test_variacao_sem_aumento_infinito_mantem_tipo_numerico():
+    inicio = pd.Series([5.0, -2.0, 0.0, np.nan])
+    fim = pd.Series([7.5, -1.0, 0.0, 3.0])
+
+    variacao = calcular_variacao_inde(inicio, fim)
+
+    assert variacao.dtype == 'float64'
+    assert variacao.tolist()[:3] == [50.0, 50.0, 0.0]
+    assert math.isnan(variacao.iloc[3])
@@ -0,0 +1,57 @@
+import tracemalloc
+
+from util import instrumentacao
+from util.instrumentacao import (
+    LIMITE_MINIMO_PERFIL_MS, RegistroRender, configurar_perfil, iniciar_rastreamento_memoria,
+    parar_rastreamento_memoria
+)
+
+
+def test_limite_do_perfil_respeita_o_minimo():
+    configurar_perfil(0.0)
+    assert instrumentacao._perfil.limite_ms == LIMITE_MINIMO_PERFIL_MS
+
+    configurar_perfil(None)
+    assert instrumentacao._perfil.limite_ms is None
+
+
+def test_tracemalloc_desligado_sem_sessoes_de_diagnostico():
+    iniciar_rastreamento_memoria('a')
+    iniciar_rastreamento_memoria('b')
+    parar_rastreamento_memoria('a')
+    assert tracemalloc.is_tracing()
+
+    parar_rastreamento_memoria('b')
+    assert not tracemalloc.is_tracing()
+
+
+def test_memoria_da_fase_desconta_o_uso_no_inicio():
+    iniciar_rastreamento_memoria('teste')
+    try:
+        retido = bytearray(4 * 1024 * 1024)
+        registro = RegistroRender('Aba')
+        registro.iniciar_fase('preparar')
+        alocado = bytearray(1024 * 1024)
+        registro.iniciar_fase('plotar')
+        del alocado
+        registro.encerrar_fase()
+    finally:
+        parar_rastreamento_memoria('teste')
+
+    # Os 4 MB retidos antes das fases não entram na medição; a segunda fase libera o que a primeira alocou
+    preparar, plotar = registro.fases
+    assert 1000 <= preparar['memoria_kb'] < 2048
+    assert plotar['memoria_kb'] < -1000
+    del retido
+
+
+def test_perfis_rotacionados(tmp_path, monkeypatch):
+    monkeypatch.setattr(instrumentacao, 'PASTA_PERFIS', str(tmp_path))
+    monkeypatch.setattr(instrumentacao, 'LIMITE_ARQUIVOS_PERFIL', 3)
+    for numero in range(5):
+        (tmp_path / f'perfil_{numero}.prof').write_bytes(b'')
+        instrumentacao.os.utime(tmp_path / f'perfil_{numero}.prof', (numero, numero))
+
+    instrumentacao._rotacionar_perfis()
+
+    assert sorted(arquivo.name for arquivo in tmp_path.iterdir()) == ['perfil_2.prof', 'perfil_3.prof', 'perfil_4.prof']
@@ -0,0 +1,54 @@
+import json
+import os
+import subprocess
+import sys
+
+import pandas as pd
+
+from util.formato_longo import expandir_anos
+from util.preprocessamento import CAMINHO_CSV, ler_csv
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_expandir_anos_usa_os_anos_existentes():
+    existentes = ['NOME', 'INDE_2021', 'INDE_2020', 'INSTITUICAO_ENSINO_ALUNO_2020', 'INDE_CONCEITO_2020', 'PEDRA_2022']
+
+    expandido = expandir_anos({'NOME': 'object', 'INDE_{ano}': 'float64', 'INSTITUICAO_ENSINO_ALUNO_{ano}': 'category'}, existentes)
+
+    assert expandido == {
+        'NOME': 'object', 'INDE_2020': 'float64', 'INDE_2021': 'float64', 'INSTITUICAO_ENSINO_ALUNO_2020': 'category',
+    }
+
+
+def test_ano_novo_no_dataset_chega_as_abas(tmp_path):
+    # Dataset sintético com um ano a mais (2023, copiado de 2022): as abas passam a lê-lo sem alterar os manifestos
+    df = ler_csv(os.path.join(RAIZ, CAMINHO_CSV))
+    for coluna in [coluna for coluna in df.columns if coluna.endswith('_2022')]:
+        df[coluna.replace('_2022', '_2023')] = df[coluna]
+    caminho = tmp_path / 'dataset_2023.csv'
+    df.to_csv(caminho, sep=';', index=False)
+
+    script = '''
+import json
+from tabs.graficos.correlacaoIndicadores_tab import CorrelacaoIndicadoresTab
+from tabs.graficos.evolucaoInde_tab import EvolucaoIndeTab
+from tabs.graficos.pontoVirada_tab import PontoViradaTab
+from util.dados import versao_dataset
+
+versao = versao_dataset()
+print(json.dumps({
+    'manifesto': [coluna for coluna, _ in CorrelacaoIndicadoresTab.manifesto()],
+    'evolucao': list(EvolucaoIndeTab.__new__(EvolucaoIndeTab).agregar(versao).index),
+    'ponto_virada': list(PontoViradaTab.__new__(PontoViradaTab).agregar(versao).index),
+}))
+'''
+    ambiente = {**os.environ, 'DATATHON_DATASET': str(caminho), 'DATATHON_CACHE': 'memoria', 'PYTHONPATH': RAIZ}
+    saida = subprocess.run(
+        [sys.executable, '-c', script], cwd=RAIZ, env=ambiente, capture_output=True, text=True, check=True
+    ).stdout
+    resultado = json.loads(saida.strip().splitlines()[-1])
+
+    assert {'INDE_2023', 'IPP_2023'} <= set(resultado['manifesto'])
+    assert resultado['evolucao'] == ['2020', '2021', '2022', '2023']
+    assert resultado['ponto_virada'] == ['2020', '2021', '2022', '2023']
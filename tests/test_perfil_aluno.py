@@ -0,0 +1,24 @@
+from tabs.graficos.perfilAluno_tab import PerfilAlunoTab
+from util.cache import estatisticas_etapas
+from util.dados import versao_dataset
+from util.site_estatico import ABAS_SEM_COMBINACOES
+
+
+def test_perfis_individuais_fora_do_cache():
+    aba = PerfilAlunoTab.__new__(PerfilAlunoTab)
+    versao = versao_dataset()
+    nome = aba.indice(versao).ordenados[0]
+
+    perfil = aba.perfil(versao, nome)
+    aba.percentis(versao, nome)
+    aba.construir_figura(versao, nome, 'INDE')
+
+    etapas = estatisticas_etapas()
+    por_aluno = ['PerfilAlunoTab.perfil', 'PerfilAlunoTab.percentis', 'PerfilAlunoTab.construir_figura']
+    assert not set(por_aluno) & set(etapas)
+    assert 'PerfilAlunoTab.faixas' in etapas
+    assert list(perfil.columns) == [*PerfilAlunoTab.INDICADORES, *PerfilAlunoTab.CATEGORIAS]
+
+
+def test_perfil_fora_da_grade_de_combinacoes():
+    assert PerfilAlunoTab.__name__ in ABAS_SEM_COMBINACOES
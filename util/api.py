@@ -0,0 +1,228 @@
+import argparse
+import functools
+import hashlib
+import inspect
+import json
+import logging
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from tabs.graficos.comparacaoPedra_tab import ComparacaoPedraTab
+from tabs.graficos.correlacaoIndicadores_tab import CorrelacaoIndicadoresTab
+from tabs.graficos.pontoVirada_tab import PontoViradaTab
+from util.cache import versao_codigo
+from util.dados import versao_dataset
+
+# Endereço padrão da API (somente leitura, para ferramentas internas na mesma máquina/rede)
+HOST_PADRAO = '127.0.0.1'
+PORTA_PADRAO = 8502
+
+# Versão do formato das respostas: entra na ETag para invalidar os caches dos clientes quando o formato muda
+VERSAO_API = '1'
+
+# Os clientes podem guardar as respostas, mas devem revalidá-las (If-None-Match) a cada uso
+CACHE_CONTROL = 'no-cache'
+
+_logger = logging.getLogger(__name__)
+
+
+class ParametroInvalido(ValueError):
+    pass
+
+
+def _instancia(classe):
+    # As etapas das abas são métodos de instância, mas só dependem dos argumentos (a instância não entra na chave
+    # do cache): uma instância sem __init__ reaproveita as mesmas etapas, sem renderizar a aba
+    return classe.__new__(classe)
+
+
+def _lista(parametros, nome, opcoes):
+    # Lista separada por vírgulas (ou parâmetro repetido); ausente = todas as opções, como o padrão dos widgets
+    if nome not in parametros:
+        return list(opcoes)
+    valores = [valor for item in parametros[nome] for valor in item.split(',') if valor]
+    invalidos = [valor for valor in valores if valor not in opcoes]
+    if invalidos:
+        raise ParametroInvalido(f"Valores inválidos para '{nome}': {', '.join(invalidos)}. Opções: {', '.join(opcoes)}.")
+    return [opcao for opcao in opcoes if opcao in valores]
+
+
+def _escolha(parametros, nome, opcoes):
+    valor = parametros.get(nome, [opcoes[0]])[-1]
+    if valor not in opcoes:
+        raise ParametroInvalido(f"Valor inválido para '{nome}': {valor}. Opções: {', '.join(opcoes)}.")
+    return valor
+
+
+def _tabela(df):
+    # DataFrame em JSON no formato "split" (índice, colunas e linhas); NaN vira null
+    return json.loads(df.to_json(orient='split', force_ascii=False))
+
+
+# Cada rota tem duas funções: uma valida a query e retorna os parâmetros aplicados (normalizados, na ordem das
+# opções), a outra recebe esses parâmetros e calcula a tabela com as mesmas etapas em cache das abas
+
+def parametros_ponto_virada(versao, parametros):
+    anos = _lista(parametros, 'anos', [str(ano) for ano in _instancia(PontoViradaTab).agregar(versao).index])
+    return {'anos': anos}
+
+
+def ponto_virada(versao, anos):
+    return _tabela(_instancia(PontoViradaTab).filtrar(versao, tuple(anos)).set_index('Ano'))
+
+
+def parametros_inde_por_pedra(versao, parametros):
+    return {'pedras': _lista(parametros, 'pedras', ComparacaoPedraTab.PEDRAS)}
+
+
+def inde_por_pedra(versao, pedras):
+    return _tabela(_instancia(ComparacaoPedraTab).filtrar(versao, tuple(pedras)).rename_axis('PEDRA'))
+
+
+def parametros_correlacao(versao, parametros):
+    indicadores = _lista(parametros, 'indicadores', CorrelacaoIndicadoresTab.INDICADORES)
+    anos = _lista(parametros, 'anos', CorrelacaoIndicadoresTab.ANOS)
+    metodo = _escolha(parametros, 'metodo', CorrelacaoIndicadoresTab.METODOS)
+
+    if len(CorrelacaoIndicadoresTab.colunas_selecionadas(indicadores, anos)) < 2:
+        raise ParametroInvalido('Selecione indicadores e anos que somem pelo menos duas colunas.')
+    return {'indicadores': indicadores, 'anos': anos, 'metodo': metodo}
+
+
+def correlacao(versao, indicadores, anos, metodo):
+    colunas = CorrelacaoIndicadoresTab.colunas_selecionadas(indicadores, anos)
+    return _tabela(_instancia(CorrelacaoIndicadoresTab).filtrar(versao, metodo, colunas))
+
+
+# Rotas da API: caminho -> (parâmetros, dados, etapas, descrição). As etapas usadas pela rota definem a versão
+# do código que entra na ETag
+ROTAS = {
+    '/api/ponto-virada': (
+        parametros_ponto_virada, ponto_virada, (PontoViradaTab.agregar, PontoViradaTab.filtrar),
+        "Contagens de 'Sim' e 'Não' por ano e variações (?anos=2020,2021)"
+    ),
+    '/api/inde-por-pedra': (
+        parametros_inde_por_pedra, inde_por_pedra, (ComparacaoPedraTab.agregar, ComparacaoPedraTab.filtrar),
+        'Média do INDE por Pedra de 2020 e ano (?pedras=Ametista,Quartzo)'
+    ),
+    '/api/correlacao': (
+        parametros_correlacao, correlacao, (CorrelacaoIndicadoresTab.agregar, CorrelacaoIndicadoresTab.filtrar),
+        'Matriz de correlação dos indicadores (?indicadores=INDE,IDA&anos=2022&metodo=Spearman)'
+    ),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def versao_codigo_rota(caminho):
+    # Versão do código das etapas da rota (a aba e os módulos de util/): muda a ETag quando o código muda,
+    # mesmo com o dataset igual. O código não muda com o processo em execução, então é calculada uma vez
+    _, _, etapas, _ = ROTAS[caminho]
+    return ''.join(versao_codigo(inspect.unwrap(funcao)) for funcao in etapas)
+
+
+def etag(versao, caminho, aplicados):
+    # ETag forte: a resposta depende só do conteúdo do dataset (hash), do código das etapas e dos parâmetros
+    # aplicados (já normalizados: ?anos=2020,2021 e ?anos=2021,2020 têm a mesma ETag), então pode ser calculada
+    # antes de qualquer processamento
+    consulta = json.dumps([VERSAO_API, caminho, versao_codigo_rota(caminho), sorted(aplicados.items())])
+    return f'"{versao[:16]}-{hashlib.sha1(consulta.encode("utf-8")).hexdigest()[:16]}"'
+
+
+def _etag_confere(cabecalho, valor):
+    if not cabecalho:
+        return False
+    candidatos = [item.strip() for item in cabecalho.split(',')]
+    return '*' in candidatos or valor in candidatos
+
+
+class ManipuladorApi(BaseHTTPRequestHandler):
+    server_version = 'DatathonAPI/1.0'
+
+    def _responder(self, status, corpo=None, cabecalhos=None, incluir_corpo=True):
+        dados = json.dumps(corpo, ensure_ascii=False).encode('utf-8') if corpo is not None else b''
+        self.send_response(status)
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        if corpo is not None:
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(dados)))
+        self.end_headers()
+        if incluir_corpo and dados:
+            self.wfile.write(dados)
+
+    def _atender(self, incluir_corpo):
+        # Qualquer falha inesperada vira um 500 com corpo JSON, em vez de derrubar a conexão sem resposta
+        try:
+            self._atender_rota(incluir_corpo)
+        except Exception:
+            _logger.exception('Erro ao atender %s', self.path)
+            self._responder(
+                HTTPStatus.INTERNAL_SERVER_ERROR, {'erro': 'Erro interno ao processar a consulta.'},
+                incluir_corpo=incluir_corpo
+            )
+
+    def _atender_rota(self, incluir_corpo):
+        url = urlsplit(self.path)
+        caminho = url.path.rstrip('/') or '/'
+        parametros = parse_qs(url.query)
+        versao = versao_dataset()
+
+        if caminho in ('/', '/api'):
+            rotas = {rota: descricao for rota, (*_, descricao) in ROTAS.items()}
+            self._responder(HTTPStatus.OK, {'versao': versao, 'rotas': rotas}, incluir_corpo=incluir_corpo)
+            return
+
+        if caminho not in ROTAS:
+            self._responder(HTTPStatus.NOT_FOUND, {'erro': f'Rota desconhecida: {caminho}'}, incluir_corpo=incluir_corpo)
+            return
+
+        interpretar, calcular, _, _ = ROTAS[caminho]
+        try:
+            aplicados = interpretar(versao, parametros)
+        except ParametroInvalido as erro:
+            self._responder(HTTPStatus.BAD_REQUEST, {'erro': str(erro)}, incluir_corpo=incluir_corpo)
+            return
+
+        # Requisição condicional: se o cliente já tem esta versão, 304 sem calcular a tabela
+        valor_etag = etag(versao, caminho, aplicados)
+        cabecalhos = {'ETag': valor_etag, 'Cache-Control': CACHE_CONTROL}
+        if _etag_confere(self.headers.get('If-None-Match'), valor_etag):
+            self._responder(HTTPStatus.NOT_MODIFIED, cabecalhos=cabecalhos)
+            return
+
+        tabela = calcular(versao, **aplicados)
+        corpo = {'versao': versao, 'parametros': aplicados, 'dados': tabela}
+        self._responder(HTTPStatus.OK, corpo, cabecalhos, incluir_corpo=incluir_corpo)
+
+    def do_GET(self):
+        self._atender(incluir_corpo=True)
+
+    def do_HEAD(self):
+        self._atender(incluir_corpo=False)
+
+
+def criar_servidor(host=HOST_PADRAO, porta=PORTA_PADRAO):
+    return ThreadingHTTPServer((host, porta), ManipuladorApi)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='API JSON somente leitura com os agregados das abas (ETag pela versão do dataset).'
+    )
+    parser.add_argument('--host', default=HOST_PADRAO, help='Endereço de escuta.')
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO, help='Porta de escuta.')
+    args = parser.parse_args()
+
+    servidor = criar_servidor(args.host, args.porta)
+    print(f'API dos dashboards em http://{args.host}:{args.porta}/api')
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == '__main__':
+    main()
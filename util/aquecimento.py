@@ -0,0 +1,135 @@
+import argparse
+import contextlib
+import importlib
+import logging
+import os
+import threading
+import time
+
+from streamlit.logger import get_logger
+
+from tabs.catalogo import modulos_e_classes
+from util.cache import remover_resultados_obsoletos
+from util.dados import artefato_dataset, versao_dataset
+from util.exportacao import iniciar_kaleido, pregerar_imagens
+
+# O aquecimento automático pode ser desligado com DATATHON_AQUECIMENTO=0 (ex.: em testes e benchmarks)
+AQUECIMENTO_HABILITADO = os.environ.get('DATATHON_AQUECIMENTO', '1') != '0'
+
+# Loggers do Streamlit que avisam sobre chamadas fora de uma sessão; o aquecimento faz isso de propósito
+LOGGERS_FORA_DA_SESSAO = (
+    'streamlit.runtime.scriptrunner.script_run_context',
+    'streamlit.runtime.state.session_state_proxy',
+)
+
+# Tempo máximo (s) que a thread de aquecimento espera o servidor do Streamlit subir, quando iniciada antes dele
+ESPERA_SERVIDOR = 30
+
+_logger = get_logger(__name__)
+_lock = threading.Lock()
+_thread = None
+
+
+def _executar_passo(nome, funcao, *args):
+    inicio = time.perf_counter()
+    erro = None
+    try:
+        funcao(*args)
+    except Exception as excecao:
+        erro = repr(excecao)
+        _logger.warning('Aquecimento: %s falhou: %s', nome, erro)
+    tempo_ms = (time.perf_counter() - inicio) * 1000
+    _logger.info('Aquecimento: %s em %.0f ms', nome, tempo_ms)
+    return {'passo': nome, 'tempo_ms': tempo_ms, 'erro': erro}
+
+
+def _renderizar_aba(modulo, classe):
+    # Fora de uma sessão do Streamlit, os widgets retornam os valores padrão e nada é enviado ao navegador:
+    # o render executa o pipeline de dados e as figuras da aba exatamente como na primeira visita
+    import streamlit as st
+
+    getattr(importlib.import_module(modulo), classe)(st.container())
+
+
+def _remover_obsoletos():
+    # As versões de código válidas vêm das etapas registradas na importação: todas as abas são importadas antes
+    # da limpeza, para que as etapas das abas não aquecidas não tenham seus resultados removidos
+    for modulo, _ in modulos_e_classes():
+        importlib.import_module(modulo)
+    return remover_resultados_obsoletos(versao_dataset())
+
+
+def aquecer(abas=None, imagens=True):
+    # Preenche os caches do processo (dataset, etapas das abas e, opcionalmente, kaleido e imagens dos gráficos)
+    # com o estado padrão de cada aba, e retorna o tempo de cada passo
+    loggers = [logging.getLogger(nome) for nome in LOGGERS_FORA_DA_SESSAO]
+    niveis_anteriores = [logger.level for logger in loggers]
+    for logger in loggers:
+        logger.setLevel(logging.ERROR)
+
+    inicio = time.perf_counter()
+    try:
+        passos = [
+            _executar_passo('dataset (hash e artefato colunar)', lambda: (versao_dataset(), artefato_dataset())),
+        ]
+        if imagens:
+            passos.append(_executar_passo('kaleido', iniciar_kaleido))
+
+        with pregerar_imagens() if imagens else contextlib.nullcontext():
+            for modulo, classe in abas or modulos_e_classes():
+                passos.append(_executar_passo(classe, _renderizar_aba, modulo, classe))
+
+        # Remove do cache em disco os resultados de outros datasets ou de código antigo, mesmo quando só parte
+        # das abas foi aquecida
+        passos.append(_executar_passo('remoção de resultados obsoletos', _remover_obsoletos))
+    finally:
+        for logger, nivel in zip(loggers, niveis_anteriores):
+            logger.setLevel(nivel)
+
+    _logger.info('Aquecimento concluído em %.0f ms', (time.perf_counter() - inicio) * 1000)
+    return passos
+
+
+def _aquecer_no_servidor():
+    # Quando disparado pelo util.servidor, o aquecimento começa antes do runtime do Streamlit existir
+    from streamlit import runtime
+
+    limite = time.monotonic() + ESPERA_SERVIDOR
+    while not runtime.exists() and time.monotonic() < limite:
+        time.sleep(0.1)
+    aquecer()
+
+
+def iniciar_aquecimento():
+    # Dispara o aquecimento em uma thread de fundo, uma única vez por processo do servidor
+    global _thread
+    if not AQUECIMENTO_HABILITADO:
+        return None
+
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_aquecer_no_servidor, name='aquecimento-caches', daemon=True)
+            _thread.start()
+        return _thread
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Executa o pipeline de dados e os gráficos de cada aba no estado padrão e mede cada passo.'
+    )
+    parser.add_argument('--abas', nargs='+', help='Classes das abas a aquecer (padrão: todas).')
+    parser.add_argument('--sem-imagens', action='store_true', help='Não inicia o kaleido nem gera as imagens.')
+    args = parser.parse_args()
+
+    # Fora do `streamlit run` a execução direta é intencional: dispensa o aviso do Streamlit
+    from streamlit import config
+    config.set_option('global.showWarningOnDirectExecution', False)
+
+    abas = [(modulo, classe) for modulo, classe in modulos_e_classes() if not args.abas or classe in args.abas]
+    for passo in aquecer(abas, imagens=not args.sem_imagens):
+        situacao = f" (erro: {passo['erro']})" if passo['erro'] else ''
+        print(f"{passo['passo']}: {passo['tempo_ms']:.0f} ms{situacao}")
+
+
+if __name__ == '__main__':
+    main()
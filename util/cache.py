@@ -0,0 +1,380 @@
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+
+# Quantidade máxima de resultados de etapas mantidos em memória
+LIMITE_ENTRADAS = 256
+
+# Backend do cache: 'memoria' (padrão) mantém cada processo isolado, sem nada em disco; 'disco' grava os resultados
+# em uma pasta local, que sobrevive a reinícios e deploys e pode ser compartilhada pelas réplicas do servidor na
+# mesma máquina (ex.: DATATHON_CACHE_PASTA=/dev/shm/datathon)
+BACKEND_CACHE = os.environ.get('DATATHON_CACHE', 'memoria')
+PASTA_CACHE = os.environ.get('DATATHON_CACHE_PASTA', './cache_resultados')
+LIMITE_CACHE_MB = float(os.environ.get('DATATHON_CACHE_LIMITE_MB', '512'))
+
+# Marca de "não encontrado" dos backends (None pode ser um resultado válido)
+AUSENTE = object()
+
+# Separa, no nome dos arquivos do cache em disco, o prefixo (versão do dataset e do código) do hash da chave
+SEPARADOR_PREFIXO = '--'
+
+# A cada quantas gravações o índice do cache em disco é conferido com a pasta (arquivos gravados ou removidos
+# pelas outras réplicas)
+SINCRONIZAR_A_CADA = 256
+
+
+class CacheMemoria:
+    # LRU em memória do processo, limitada pelo número de entradas
+    def __init__(self, limite_entradas):
+        self.limite_entradas = limite_entradas
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, chave):
+        with self._lock:
+            if chave not in self._entradas:
+                return AUSENTE
+            self._entradas.move_to_end(chave)
+            return self._entradas[chave]
+
+    def guardar(self, chave, valor):
+        with self._lock:
+            self._entradas[chave] = valor
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.limite_entradas:
+                self._entradas.popitem(last=False)
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+
+
+def _normalizar_chave(valor):
+    # Forma estável entre processos: funções entram pelo nome qualificado (o repr padrão traz o endereço em memória)
+    if isinstance(valor, (tuple, list)):
+        return tuple(_normalizar_chave(item) for item in valor)
+    if callable(valor):
+        return f'{getattr(valor, "__module__", "")}.{getattr(valor, "__qualname__", repr(valor))}'
+    return valor
+
+
+def _arrow_compativel(valor):
+    import pandas as pd
+
+    return (
+        isinstance(valor, pd.DataFrame)
+        and not isinstance(valor.columns, pd.MultiIndex)
+        and valor.columns.is_unique
+        and all(isinstance(coluna, str) for coluna in valor.columns)
+    )
+
+
+class CacheDisco:
+    # Cache em uma pasta compartilhada pelos processos da máquina, limitado pelo total de bytes, com despejo LRU
+    # pelo horário de último acesso (mtime, atualizado a cada acerto). DataFrames são gravados em Arrow IPC e lidos
+    # via memory map (com a pasta em /dev/shm, as páginas são compartilhadas entre as réplicas); o resto, em pickle.
+    # A escrita é atômica (arquivo temporário + os.replace), então leitores nunca veem um arquivo pela metade.
+    # Os tamanhos e a ordem de acesso ficam em um índice do processo (o despejo não varre a pasta a cada gravação),
+    # conferido com a pasta na criação e a cada SINCRONIZAR_A_CADA gravações.
+    # Confiança: ler um pickle executa código, então a pasta é tratada como parte do processo. Ela é criada com
+    # permissão 0700 e recusada se pertencer a outro usuário ou se outros usuários puderem gravar nela; só as
+    # réplicas do mesmo usuário devem compartilhá-la
+    def __init__(self, pasta, limite_bytes):
+        self.pasta = pasta
+        self.limite_bytes = limite_bytes
+        self._indice = OrderedDict()
+        self._total = 0
+        self._gravacoes = 0
+        self._lock = threading.Lock()
+        _preparar_pasta_privada(pasta)
+        self._sincronizar()
+
+    def _caminho(self, chave, prefixo):
+        nome = hashlib.sha256(repr(_normalizar_chave(chave)).encode('utf-8')).hexdigest()
+        return os.path.join(self.pasta, f'{prefixo}{SEPARADOR_PREFIXO}{nome}' if prefixo else nome)
+
+    def obter(self, chave, prefixo=''):
+        base = self._caminho(chave, prefixo)
+        for extensao, ler in (('.arrow', self._ler_arrow), ('.pkl', self._ler_pickle)):
+            caminho = base + extensao
+            try:
+                valor = ler(caminho)
+                os.utime(caminho)
+                # Arquivos gravados por outra réplica entram no índice no primeiro acerto
+                tamanho = self._indice.get(caminho)
+                self._registrar(caminho, os.path.getsize(caminho) if tamanho is None else tamanho)
+                return valor
+            except FileNotFoundError:
+                self._esquecer(caminho)
+                continue
+            except Exception:
+                # Arquivo corrompido ou de uma versão incompatível: descarta e recalcula
+                self._remover(caminho)
+        return AUSENTE
+
+    @staticmethod
+    def _ler_arrow(caminho):
+        import pyarrow as pa
+
+        with pa.memory_map(caminho) as origem:
+            return pa.ipc.open_file(origem).read_all().to_pandas(split_blocks=True)
+
+    @staticmethod
+    def _ler_pickle(caminho):
+        with open(caminho, 'rb') as arquivo:
+            return pickle.load(arquivo)
+
+    def guardar(self, chave, valor, prefixo=''):
+        base = self._caminho(chave, prefixo)
+        descritor, temporario = tempfile.mkstemp(dir=self.pasta, suffix='.tmp')
+        try:
+            with os.fdopen(descritor, 'wb') as arquivo:
+                if _arrow_compativel(valor):
+                    import pyarrow as pa
+
+                    tabela = pa.Table.from_pandas(valor)
+                    with pa.ipc.new_file(arquivo, tabela.schema) as escritor:
+                        escritor.write_table(tabela)
+                    extensao = '.arrow'
+                else:
+                    pickle.dump(valor, arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+                    extensao = '.pkl'
+            tamanho = os.path.getsize(temporario)
+            os.replace(temporario, base + extensao)
+        except Exception:
+            # Resultados que não podem ser serializados ficam só no cache em memória do processo
+            self._remover(temporario)
+            return
+        self._registrar(base + extensao, tamanho)
+
+        with self._lock:
+            self._gravacoes += 1
+            sincronizar = self._gravacoes % SINCRONIZAR_A_CADA == 0
+        if sincronizar:
+            self._sincronizar()
+        self._despejar()
+
+    def _remover(self, caminho):
+        self._esquecer(caminho)
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
+
+    def _registrar(self, caminho, tamanho):
+        # Arquivo gravado ou acessado agora: vai para o fim da ordem de despejo
+        with self._lock:
+            self._total += tamanho - self._indice.pop(caminho, 0)
+            self._indice[caminho] = tamanho
+
+    def _esquecer(self, caminho):
+        with self._lock:
+            self._total -= self._indice.pop(caminho, 0)
+
+    def _sincronizar(self):
+        # Reconstrói o índice a partir da pasta, do acesso mais antigo (mtime) para o mais recente
+        arquivos = []
+        for entrada in os.scandir(self.pasta):
+            if entrada.is_file() and not entrada.name.endswith('.tmp'):
+                try:
+                    stat = entrada.stat()
+                except FileNotFoundError:
+                    continue
+                arquivos.append((stat.st_mtime_ns, entrada.path, stat.st_size))
+
+        with self._lock:
+            self._indice = OrderedDict((caminho, tamanho) for _, caminho, tamanho in sorted(arquivos))
+            self._total = sum(self._indice.values())
+
+    def _despejar(self):
+        # Remove os arquivos acessados há mais tempo até o total caber no limite
+        while True:
+            with self._lock:
+                if self._total <= self.limite_bytes or not self._indice:
+                    return
+                caminho, tamanho = self._indice.popitem(last=False)
+                self._total -= tamanho
+            self._remover(caminho)
+
+    def limpar(self):
+        for entrada in os.scandir(self.pasta):
+            self._remover(entrada.path)
+
+    def remover_obsoletos(self, valido):
+        # Remove os arquivos cujo prefixo não passa em valido(prefixo); retorna quantos foram removidos
+        removidos = 0
+        for entrada in os.scandir(self.pasta):
+            prefixo, separador, _ = entrada.name.partition(SEPARADOR_PREFIXO)
+            if entrada.name.endswith('.tmp') or (separador and valido(prefixo)):
+                continue
+            self._remover(entrada.path)
+            removidos += 1
+        return removidos
+
+
+def _preparar_pasta_privada(pasta):
+    # Cria a pasta só com acesso do usuário do processo e recusa uma pasta existente de outro usuário ou gravável
+    # por outros usuários (alguém com escrita nela poderia plantar um pickle). PermissionError é um OSError: quem
+    # cria o cache cai para a memória do processo
+    os.makedirs(pasta, mode=0o700, exist_ok=True)
+    if not hasattr(os, 'getuid'):
+        return
+    stat = os.stat(pasta)
+    if stat.st_uid != os.getuid() or stat.st_mode & 0o022:
+        raise PermissionError(f'Pasta de cache {pasta!r} pertence a outro usuário ou é gravável por outros usuários.')
+
+
+class CacheEmCamadas:
+    # Memória do processo na frente (objetos já desserializados) e o backend compartilhado atrás
+    def __init__(self, local, compartilhado=None):
+        self.local = local
+        self.compartilhado = compartilhado
+
+    def obter(self, chave, prefixo=''):
+        valor = self.local.obter(chave)
+        if valor is AUSENTE and self.compartilhado is not None:
+            valor = self.compartilhado.obter(chave, prefixo)
+            if valor is not AUSENTE:
+                self.local.guardar(chave, valor)
+        return valor
+
+    def guardar(self, chave, valor, prefixo=''):
+        self.local.guardar(chave, valor)
+        if self.compartilhado is not None:
+            self.compartilhado.guardar(chave, valor, prefixo)
+
+    def limpar(self):
+        # Limpa só a camada do processo: a pasta compartilhada pertence também às outras réplicas
+        self.local.limpar()
+
+
+def criar_cache(nome, limite_entradas, backend=BACKEND_CACHE):
+    # Cache de um tipo de resultado ('etapas', 'imagens'...) com o backend configurado em DATATHON_CACHE
+    if backend == 'memoria':
+        return CacheEmCamadas(CacheMemoria(limite_entradas))
+    if backend == 'disco':
+        try:
+            compartilhado = CacheDisco(os.path.join(PASTA_CACHE, nome), int(LIMITE_CACHE_MB * 1024 * 1024))
+        except OSError:
+            # Sem permissão de escrita (ex.: sistema de arquivos somente leitura) ou pasta recusada por não ser
+            # privada do usuário: cache só em memória
+            compartilhado = None
+        return CacheEmCamadas(CacheMemoria(limite_entradas), compartilhado)
+    raise ValueError(f"Backend de cache desconhecido: {backend!r} (use 'memoria' ou 'disco').")
+
+
+_cache = criar_cache('etapas', LIMITE_ENTRADAS)
+_estatisticas = {}
+_lock = threading.Lock()
+
+# Versão do código de cada etapa decorada no processo: qualname -> hash
+_versoes_codigo = {}
+_hash_util = None
+
+# Prefixo das etapas que não recebem a versão do dataset
+SEM_VERSAO = 'geral'
+
+# Pasta dos módulos auxiliares (util/): uma mudança neles pode alterar o resultado de qualquer etapa
+PASTA_UTIL = os.path.dirname(os.path.abspath(__file__))
+
+
+def _hash_arquivos(caminhos):
+    sha = hashlib.sha256()
+    for caminho in sorted(caminhos):
+        with open(caminho, 'rb') as arquivo:
+            sha.update(arquivo.read())
+    return sha.hexdigest()
+
+
+def versao_codigo(funcao):
+    # Hash do código que produz o resultado de uma etapa: o módulo em que ela é definida (a aba) e os módulos
+    # auxiliares de util/. Entra no nome dos arquivos do cache em disco, que deixam de valer quando o código muda
+    global _hash_util
+    if _hash_util is None:
+        _hash_util = _hash_arquivos(
+            os.path.join(PASTA_UTIL, nome) for nome in os.listdir(PASTA_UTIL) if nome.endswith('.py')
+        )
+    try:
+        origem = inspect.getsourcefile(funcao)
+        hash_modulo = _hash_arquivos([origem]) if origem else ''
+    except (OSError, TypeError):
+        hash_modulo = ''
+    return hashlib.sha256(f'{funcao.__qualname__}:{hash_modulo}:{_hash_util}'.encode('utf-8')).hexdigest()[:16]
+
+
+def _prefixo(versao, codigo):
+    # Prefixo dos arquivos no disco: versão do dataset (hash do conteúdo) e versão do código da etapa
+    return f'{versao[:16] if isinstance(versao, str) else SEM_VERSAO}-{codigo}'
+
+
+def remover_resultados_obsoletos(versao_atual):
+    # Remove do disco os resultados de outras versões do dataset ou do código das etapas. Só é seguro depois que
+    # todas as etapas foram importadas (ex.: ao final do aquecimento), pois as versões válidas vêm delas
+    compartilhado = _cache.compartilhado
+    if compartilhado is None:
+        return 0
+
+    with _lock:
+        codigos = set(_versoes_codigo.values())
+    versoes = {versao_atual[:16], SEM_VERSAO}
+
+    def valido(prefixo):
+        versao, _, codigo = prefixo.rpartition('-')
+        return versao in versoes and codigo in codigos
+
+    return compartilhado.remover_obsoletos(valido)
+
+
+def etapa(funcao):
+    # Memoiza uma etapa do pipeline de uma aba (carregar, limpar, agregar, filtrar, figura) pelos seus
+    # próprios argumentos. Os argumentos precisam ser hasháveis (versão do dataset, tuplas de filtros, etc.)
+    # e o resultado é compartilhado entre sessões, portanto não deve ser alterado por quem o recebe.
+    # Em métodos, a instância (self) não entra na chave: cada rerun cria uma nova instância da aba.
+    # No disco, cada resultado fica marcado com a versão do dataset (argumento `versao`) e do código da etapa
+    nome = funcao.__qualname__
+    parametros = list(inspect.signature(funcao).parameters)
+    ignorar_instancia = bool(parametros) and parametros[0] == 'self'
+    posicao_versao = parametros.index('versao') if 'versao' in parametros else None
+    codigo = versao_codigo(funcao)
+    with _lock:
+        _versoes_codigo[nome] = codigo
+
+    @functools.wraps(funcao)
+    def envoltorio(*args, **kwargs):
+        argumentos_chave = args[1:] if ignorar_instancia else args
+        chave = (nome, argumentos_chave, tuple(sorted(kwargs.items())))
+        if posicao_versao is not None and posicao_versao < len(args):
+            versao = args[posicao_versao]
+        else:
+            versao = kwargs.get('versao')
+        prefixo = _prefixo(versao, codigo)
+
+        resultado = _cache.obter(chave, prefixo)
+        with _lock:
+            contadores = _estatisticas.setdefault(nome, {'acertos': 0, 'falhas': 0})
+            contadores['acertos' if resultado is not AUSENTE else 'falhas'] += 1
+        if resultado is not AUSENTE:
+            return resultado
+
+        resultado = funcao(*args, **kwargs)
+        _cache.guardar(chave, resultado, prefixo)
+        return resultado
+
+    return envoltorio
+
+
+def estatisticas_etapas():
+    # Acertos e falhas de cache por etapa, para verificar o que é recalculado a cada interação
+    with _lock:
+        return {nome: dict(contadores) for nome, contadores in _estatisticas.items()}
+
+
+def limpar_cache_etapas():
+    _cache.limpar()
+    with _lock:
+        _estatisticas.clear()
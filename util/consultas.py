@@ -0,0 +1,42 @@
+import importlib.util
+import os
+
+from util.dados import artefato_dataset
+
+# Motor das agregações: 'duckdb' consulta o artefato colunar direto do disco, em paralelo e sem montar o dataset
+# inteiro em um DataFrame (útil para datasets de vários anos e unidades); 'pandas' (padrão) calcula em memória.
+# Sem o pacote duckdb instalado, o pandas é sempre usado. Por ora só o cubo agregado (util.cubo) tem o caminho SQL;
+# as demais agregações das abas continuam em pandas sobre as colunas do manifesto
+MOTOR_CONSULTA = os.environ.get('DATATHON_MOTOR_CONSULTA', 'pandas')
+
+# Nome da visão do dataset nas consultas SQL
+TABELA_DATASET = 'dataset'
+
+
+def duckdb_ativo():
+    return MOTOR_CONSULTA == 'duckdb' and importlib.util.find_spec('duckdb') is not None
+
+
+def colunas_dataset():
+    # Nomes das colunas do artefato, lidos apenas do esquema (sem ler os dados); None sem artefato
+    import pyarrow.dataset as ds
+
+    artefato = artefato_dataset()
+    if artefato is None:
+        return None
+    return ds.dataset(artefato, format='feather').schema.names
+
+
+def consultar(sql, parametros=None):
+    # Executa a consulta sobre a visão `dataset` do artefato da versão atual e retorna um DataFrame.
+    # O DuckDB lê só as colunas e os blocos necessários; retorna None quando o artefato não pôde ser gerado
+    import duckdb
+    import pyarrow.dataset as ds
+
+    artefato = artefato_dataset()
+    if artefato is None:
+        return None
+
+    with duckdb.connect() as conexao:
+        conexao.register(TABELA_DATASET, ds.dataset(artefato, format='feather'))
+        return conexao.execute(sql, parametros or []).df()
@@ -0,0 +1,154 @@
+import json
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from util.cache import etapa
+
+# Dimensões do filtro global de coorte: rótulo na barra lateral -> coluna do dataset
+DIMENSOES_COORTE = {
+    'Instituição de Ensino (2021)': 'INSTITUICAO_ENSINO_ALUNO_2021',
+    'Fase (2022)': 'FASE_2022',
+    'Turma (2022)': 'TURMA_2022',
+    'Bolsista (2022)': 'BOLSISTA_2022',
+    'Ingressante (2021)': 'SINALIZADOR_INGRESSANTE_2021',
+    'Pedra (2022)': 'PEDRA_2022',
+}
+
+# A coorte entra na versão do dataset usada como chave das etapas: "<hash do dataset>#<filtros em JSON>"
+SEPARADOR_COORTE = '#'
+
+# Prefixo das chaves dos widgets da barra lateral no session_state
+PREFIXO_CHAVE = 'coorte_'
+
+
+class IndiceBitmap:
+    # Índice invertido das dimensões da coorte: para cada coluna e valor, um bitmap (np.packbits) com as linhas do
+    # dataset que têm aquele valor. Um filtro combinado é a união dos bitmaps dos valores escolhidos em cada
+    # dimensão e a interseção entre as dimensões, sem percorrer o DataFrame novamente
+    def __init__(self, df):
+        self.n = len(df)
+        self.bitmaps = {}
+        for coluna in df.columns:
+            codigos, valores = pd.factorize(df[coluna], sort=True)
+            self.bitmaps[coluna] = {
+                valor: np.packbits(codigos == posicao) for posicao, valor in enumerate(valores.tolist())
+            }
+
+    def valores(self, coluna):
+        return list(self.bitmaps.get(coluna, {}))
+
+    def _bits(self, filtros):
+        bits = np.full((self.n + 7) // 8, 0xFF, dtype=np.uint8)
+        for coluna, valores in filtros.items():
+            uniao = np.zeros_like(bits)
+            for valor in valores:
+                bitmap = self.bitmaps.get(coluna, {}).get(valor)
+                if bitmap is not None:
+                    uniao |= bitmap
+            bits &= uniao
+        return bits
+
+    def mascara(self, filtros):
+        # Máscara booleana das linhas da coorte, na ordem das linhas do dataset
+        return np.unpackbits(self._bits(filtros), count=self.n).astype(bool)
+
+    def contar(self, filtros):
+        return int(np.unpackbits(self._bits(filtros), count=self.n).sum())
+
+
+def versao_coorte(versao, filtros):
+    # Versão do dataset restrita a uma coorte; sem filtros, é a própria versão do dataset
+    if not filtros:
+        return versao
+    normalizados = sorted((coluna, sorted(valores, key=str)) for coluna, valores in filtros.items())
+    return f'{versao}{SEPARADOR_COORTE}{json.dumps(normalizados, ensure_ascii=False, separators=(",", ":"))}'
+
+
+def separar_versao(versao):
+    # (hash do dataset, filtros da coorte) a partir de uma versão gerada por versao_coorte
+    base, separador, filtros = versao.partition(SEPARADOR_COORTE)
+    return base, (dict((coluna, valores) for coluna, valores in json.loads(filtros)) if separador else {})
+
+
+@etapa
+def indice_coorte(versao):
+    # Índice de bitmaps das dimensões da coorte sobre todas as linhas do dataset, construído uma vez por versão
+    from util.dados import carregar_colunas
+
+    colunas = tuple((coluna, 'category') for coluna in DIMENSOES_COORTE.values())
+    df = carregar_colunas(colunas)
+    return IndiceBitmap(df)
+
+
+def mascara_coorte(versao):
+    # Linhas da coorte de uma versão com filtros (None quando a versão não tem coorte)
+    base, filtros = separar_versao(versao)
+    if not filtros:
+        return None
+    return indice_coorte(base).mascara(filtros)
+
+
+def condicao_sql_coorte(versao):
+    # Mesmo filtro da coorte em SQL (motor DuckDB); None quando a versão não tem coorte
+    _, filtros = separar_versao(versao)
+    if not filtros:
+        return None
+
+    def literal(valor):
+        if isinstance(valor, str):
+            return "'" + valor.replace("'", "''") + "'"
+        return repr(valor)
+
+    return ' AND '.join(
+        f'"{coluna}" IN ({", ".join(literal(valor) for valor in valores)})' for coluna, valores in filtros.items()
+    )
+
+
+def _filtros_da_sessao():
+    filtros = {}
+    for coluna in DIMENSOES_COORTE.values():
+        valores = st.session_state.get(f'{PREFIXO_CHAVE}{coluna}')
+        if valores:
+            filtros[coluna] = list(valores)
+    return filtros
+
+
+def versao_coorte_atual():
+    # Versão usada pelas abas: o hash do dataset e, quando a barra lateral tem filtros, a coorte escolhida.
+    # Uma coorte vazia é ignorada (a barra lateral avisa), para que as abas nunca recebam um conjunto sem linhas
+    from util.dados import versao_dataset
+
+    versao = versao_dataset()
+    filtros = _filtros_da_sessao()
+    if not filtros or indice_coorte(versao).contar(filtros) == 0:
+        return versao
+    return versao_coorte(versao, filtros)
+
+
+def _formatar_valor(valor):
+    return str(int(valor)) if isinstance(valor, float) and valor.is_integer() else str(valor)
+
+
+def barra_coorte():
+    # Filtro global de coorte na barra lateral: vale para todas as abas da página
+    from util.dados import versao_dataset
+
+    indice = indice_coorte(versao_dataset())
+
+    with st.sidebar:
+        st.subheader(':blue[Filtro de Coorte]', divider='orange')
+        st.caption('Restringe todos os dashboards aos alunos selecionados. Sem seleção, a dimensão não é filtrada.')
+
+        for rotulo, coluna in DIMENSOES_COORTE.items():
+            st.multiselect(
+                rotulo, options=indice.valores(coluna), format_func=_formatar_valor, key=f'{PREFIXO_CHAVE}{coluna}'
+            )
+
+        filtros = _filtros_da_sessao()
+        total = indice.contar(filtros)
+        if filtros and total == 0:
+            st.warning('Nenhum aluno na coorte selecionada: os filtros foram ignorados.')
+        else:
+            st.caption(f'**{total}** de {indice.n} alunos na coorte.')
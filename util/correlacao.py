@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+
+class EstatisticasCorrelacao:
+    # Estatísticas suficientes para a correlação de Pearson com pares completos (mesma convenção do DataFrame.corr):
+    # para cada par de colunas (i, j), considerando apenas as linhas em que ambas estão preenchidas,
+    #   n[i, j]          número de linhas
+    #   soma[i, j]       soma de x_i
+    #   soma_quad[i, j]  soma de x_i²
+    #   produto[i, j]    soma de x_i * x_j
+    # Qualquer subconjunto de colunas é respondido fatiando essas matrizes, e novas linhas são somadas a elas,
+    # sem reler os dados já processados. Com Spearman as estatísticas são dos postos, que dependem de todas as
+    # linhas: um lote novo muda os postos das linhas antigas, então não há atualização incremental.
+    def __init__(self, colunas, n, soma, soma_quad, produto, metodo='Pearson'):
+        self.colunas = list(colunas)
+        self.metodo = metodo
+        self._posicoes = {coluna: posicao for posicao, coluna in enumerate(self.colunas)}
+        self.n = n
+        self.soma = soma
+        self.soma_quad = soma_quad
+        self.produto = produto
+
+    @staticmethod
+    def _calcular(valores):
+        presentes = (~np.isnan(valores)).astype('float64')
+        valores = np.nan_to_num(valores, nan=0.0)
+        return (
+            presentes.T @ presentes,
+            valores.T @ presentes,
+            (valores ** 2).T @ presentes,
+            valores.T @ valores,
+        )
+
+    @classmethod
+    def de_dataframe(cls, df, metodo='Pearson'):
+        # Spearman é a correlação de Pearson entre os postos de cada coluna
+        if metodo == 'Spearman':
+            df = postos(df)
+        return cls(df.columns, *cls._calcular(df.to_numpy(dtype='float64', na_value=np.nan)), metodo=metodo)
+
+    def adicionar(self, df):
+        # Acrescenta novas linhas (com as mesmas colunas) às estatísticas; só vale para Pearson
+        if self.metodo != 'Pearson':
+            raise ValueError(
+                f'Atualização incremental indisponível para {self.metodo}: os postos dependem de todas as linhas.'
+            )
+        parciais = self._calcular(df[self.colunas].to_numpy(dtype='float64', na_value=np.nan))
+        self.n, self.soma, self.soma_quad, self.produto = (
+            atual + parcial for atual, parcial in zip((self.n, self.soma, self.soma_quad, self.produto), parciais)
+        )
+
+    def correlacao(self, colunas=None):
+        # Matriz de correlação de Pearson das colunas pedidas, calculada só a partir das estatísticas
+        colunas = self.colunas if colunas is None else list(colunas)
+        indices = [self._posicoes[coluna] for coluna in colunas]
+        fatia = np.ix_(indices, indices)
+
+        n = self.n[fatia]
+        soma_i = self.soma[fatia]
+        soma_j = soma_i.T
+        covariancia = n * self.produto[fatia] - soma_i * soma_j
+        variancia_i = n * self.soma_quad[fatia] - soma_i ** 2
+        variancia_j = variancia_i.T
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            matriz = covariancia / np.sqrt(variancia_i * variancia_j)
+        matriz[(n < 2) | (variancia_i <= 0) | (variancia_j <= 0)] = np.nan
+        matriz = np.clip(matriz, -1, 1)
+
+        # Diagonal exata, como no pandas, quando a coluna tem variância
+        diagonal = np.diag(matriz).copy()
+        np.fill_diagonal(matriz, np.where(np.isnan(diagonal), np.nan, 1.0))
+
+        return pd.DataFrame(matriz, index=colunas, columns=colunas)
+
+
+def postos(df):
+    # Postos médios de cada coluna (empates recebem a média), base da correlação de Spearman.
+    # Com valores ausentes, os postos são calculados sobre todos os valores da coluna, e não par a par.
+    return df.rank(method='average')
@@ -0,0 +1,161 @@
+import inspect
+
+import numpy as np
+import pandas as pd
+
+from util.cache import etapa
+from util.consultas import TABELA_DATASET, colunas_dataset, consultar, duckdb_ativo
+from util.coorte import condicao_sql_coorte
+from util.dados import dataset_completo, manifesto, versao_dataset
+from util.formato_longo import NIVEL_ALUNO, NIVEL_ANO, colunas_anuais, expandir_anos, listar_anos, para_formato_longo
+from util.preprocessamento import COLUNA_LINHA_COMPLETA
+
+# Dimensões do cubo e indicadores numéricos agregados em cada célula
+DIMENSOES = [NIVEL_ANO, 'PEDRA', 'INSTITUICAO', 'PONTO_VIRADA', 'PEDRA_INICIAL']
+MEDIDAS = ['INDE']
+
+# Colunas do dataset largo usadas na construção do cubo (manifesto das abas que consultam o cubo),
+# com as colunas anuais lidas para todos os anos do dataset
+COLUNAS_CUBO = {
+    'NOME': 'object',
+    'PEDRA_{ano}': 'category',
+    'INSTITUICAO_ENSINO_ALUNO_{ano}': 'category',
+    'PONTO_VIRADA_{ano}': 'category',
+    'INDE_{ano}': 'float64',
+}
+
+
+class CuboAgregado:
+    # Cubo pequeno com contagem, soma e soma dos quadrados por combinação de dimensões.
+    # As consultas das abas são respondidas a partir das células, sem reler os dados dos alunos.
+    def __init__(self, celulas):
+        self.celulas = celulas
+
+    def anos(self):
+        return sorted(self.celulas.index.get_level_values(NIVEL_ANO).dropna().unique())
+
+    def fatiar(self, **filtros):
+        # Mantém apenas as células cujas dimensões estão nos valores informados (ex.: ANO=['2020'])
+        mascara = np.ones(len(self.celulas), dtype=bool)
+        for dimensao, valores in filtros.items():
+            mascara &= self.celulas.index.get_level_values(dimensao).isin(valores)
+        return CuboAgregado(self.celulas[mascara])
+
+    def _agrupar(self, colunas, por):
+        return self.celulas[colunas].groupby(level=por).sum()
+
+    def contagem(self, por, **filtros):
+        # Número de alunos por combinação das dimensões em `por`
+        return self.fatiar(**filtros)._agrupar('CONTAGEM', por)
+
+    def media(self, medida, por, **filtros):
+        agregado = self.fatiar(**filtros)._agrupar([f'N_{medida}', f'SOMA_{medida}'], por)
+        return agregado[f'SOMA_{medida}'] / agregado[f'N_{medida}'].replace(0, np.nan)
+
+    def desvio_padrao(self, medida, por, **filtros):
+        # Desvio padrão amostral a partir das somas (mesma convenção ddof=1 do pandas)
+        agregado = self.fatiar(**filtros)._agrupar(
+            [f'N_{medida}', f'SOMA_{medida}', f'SOMA_QUAD_{medida}'], por
+        )
+        n = agregado[f'N_{medida}']
+        variancia = (agregado[f'SOMA_QUAD_{medida}'] - agregado[f'SOMA_{medida}'] ** 2 / n) / (n - 1)
+        return np.sqrt(variancia.clip(lower=0).where(n > 1))
+
+
+def construir_cubo(df):
+    # Constrói o cubo a partir do dataset largo (uma linha por aluno)
+    longo = para_formato_longo(df, indicadores=['PEDRA', 'INSTITUICAO_ENSINO_ALUNO', 'PONTO_VIRADA', *MEDIDAS])
+    longo = longo.rename(columns={'INSTITUICAO_ENSINO_ALUNO': 'INSTITUICAO'}).reset_index()
+
+    # Pedra do aluno no primeiro ano do dataset, usada para acompanhar a mesma turma de pedras ao longo dos anos
+    primeiro_ano = listar_anos(df)[0]
+    pedra_inicial = df.set_index(NIVEL_ALUNO)[f'PEDRA_{primeiro_ano}']
+    longo['PEDRA_INICIAL'] = longo[NIVEL_ALUNO].map(pedra_inicial)
+
+    for dimensao in DIMENSOES:
+        if dimensao not in longo:
+            longo[dimensao] = np.nan
+        # Dimensões como object para que o groupby mantenha as combinações com valores ausentes
+        longo[dimensao] = longo[dimensao].astype(object)
+
+    longo['CONTAGEM'] = 1
+    agregacoes = {'CONTAGEM': 'sum'}
+    for medida in MEDIDAS:
+        longo[f'N_{medida}'] = longo[medida].notna().astype('int64')
+        longo[f'SOMA_{medida}'] = longo[medida].fillna(0)
+        longo[f'SOMA_QUAD_{medida}'] = longo[medida].fillna(0) ** 2
+        agregacoes.update({f'N_{medida}': 'sum', f'SOMA_{medida}': 'sum', f'SOMA_QUAD_{medida}': 'sum'})
+
+    celulas = longo.groupby(DIMENSOES, dropna=False).agg(agregacoes)
+    return CuboAgregado(celulas)
+
+
+def consultar_cubo(condicao=None):
+    # Mesmas células de construir_cubo, agregadas em SQL direto do artefato: uma subconsulta por ano
+    # (o formato longo) e um GROUP BY sobre as dimensões. `condicao` é um filtro SQL extra sobre as linhas
+    colunas = colunas_dataset()
+    if colunas is None:
+        return None
+
+    anuais = colunas_anuais(pd.DataFrame(columns=list(expandir_anos(COLUNAS_CUBO, colunas))))
+    anos = sorted({ano for _, ano in anuais.values()})
+
+    def coluna(indicador, ano, tipo):
+        nome = f'{indicador}_{ano}'
+        return f'"{nome}"' if nome in anuais else f'CAST(NULL AS {tipo})'
+
+    filtro = f'{COLUNA_LINHA_COMPLETA} AND ({condicao})' if condicao else COLUNA_LINHA_COMPLETA
+    partes = [
+        f"""SELECT '{ano}' AS {NIVEL_ANO},
+                   CAST({coluna('PEDRA', ano, 'VARCHAR')} AS VARCHAR) AS PEDRA,
+                   CAST({coluna('INSTITUICAO_ENSINO_ALUNO', ano, 'VARCHAR')} AS VARCHAR) AS INSTITUICAO,
+                   CAST({coluna('PONTO_VIRADA', ano, 'VARCHAR')} AS VARCHAR) AS PONTO_VIRADA,
+                   CAST({coluna('PEDRA', anos[0], 'VARCHAR')} AS VARCHAR) AS PEDRA_INICIAL,
+                   {', '.join(f"CAST({coluna(medida, ano, 'DOUBLE')} AS DOUBLE) AS {medida}" for medida in MEDIDAS)}
+            FROM {TABELA_DATASET} WHERE {filtro}"""
+        for ano in anos
+    ]
+    agregacoes = [
+        f'COUNT({medida}) AS N_{medida}, COALESCE(SUM({medida}), 0) AS SOMA_{medida}, '
+        f'COALESCE(SUM({medida} * {medida}), 0) AS SOMA_QUAD_{medida}'
+        for medida in MEDIDAS
+    ]
+    celulas = consultar(f"""
+        SELECT {', '.join(DIMENSOES)}, COUNT(*) AS CONTAGEM, {', '.join(agregacoes)}
+        FROM ({' UNION ALL '.join(partes)})
+        GROUP BY {', '.join(DIMENSOES)}
+    """)
+    if celulas is None:
+        return None
+
+    # Dimensões como object com NaN nos ausentes, como no cubo construído pelo pandas
+    for dimensao in DIMENSOES:
+        celulas[dimensao] = celulas[dimensao].astype(object).where(celulas[dimensao].notna(), np.nan)
+    return CuboAgregado(celulas.set_index(DIMENSOES).sort_index())
+
+
+@etapa
+def _cubo_em_cache(nome, versao, selecionar_linhas, condicao_sql):
+    # Com o motor DuckDB, o cubo é agregado por SQL; populações filtradas só em Python continuam no pandas
+    if duckdb_ativo() and (selecionar_linhas is None or condicao_sql is not None):
+        # A coorte da barra lateral, quando houver, vira mais uma condição da consulta
+        condicoes = [condicao for condicao in (condicao_sql, condicao_sql_coorte(versao)) if condicao]
+        cubo = consultar_cubo(' AND '.join(f'({condicao})' for condicao in condicoes) or None)
+        if cubo is not None:
+            return cubo
+
+    df = dataset_completo(versao, manifesto(COLUNAS_CUBO))
+    if selecionar_linhas is not None:
+        df = selecionar_linhas(df)
+    return construir_cubo(df)
+
+
+def obter_cubo(nome='completos', selecionar_linhas=None, versao=None, condicao_sql=None):
+    # Retorna o cubo de uma população de alunos (por padrão, as linhas completas usadas pelas abas),
+    # construído uma vez por versão do dataset e compartilhado entre as sessões.
+    # `condicao_sql` é o mesmo filtro de `selecionar_linhas` escrito em SQL, usado pelo motor DuckDB.
+    # `selecionar_linhas` entra na chave do cache: precisa ser uma função (ou staticmethod), e não um método ligado
+    # a uma instância, que muda a cada rerun (o cache nunca acertaria) e manteria as abas antigas vivas
+    if inspect.ismethod(selecionar_linhas):
+        raise ValueError(f'selecionar_linhas deve ser uma função, não o método ligado {selecionar_linhas.__qualname__}.')
+    return _cubo_em_cache(nome, versao or versao_dataset(), selecionar_linhas, condicao_sql)
@@ -0,0 +1,176 @@
+import os
+import threading
+
+import numpy as np
+
+from util.cache import etapa
+from util.coorte import mascara_coorte, separar_versao
+from util.formato_longo import expandir_anos
+from util.preprocessamento import (
+    CAMINHO_CSV, COLUNA_LINHA_COMPLETA, artefato_atualizado, hash_arquivo, ler_artefato, ler_colunas_artefato, ler_csv,
+    salvar_artefato, tipar_dataset
+)
+
+# Caminho padrão do dataset utilizado pelos dashboards; pode ser trocado pela variável de ambiente
+# DATATHON_DATASET (ex.: datasets sintéticos maiores usados nos benchmarks)
+CAMINHO_DATASET = os.environ.get('DATATHON_DATASET', CAMINHO_CSV)
+
+# Cache do dataset compartilhado por todas as sessões do processo
+_cache = {}
+_lock = threading.Lock()
+
+
+def caminho_artefato(caminho):
+    # O artefato colunar fica ao lado do CSV, com a extensão .feather
+    return f'{os.path.splitext(caminho)[0]}.feather'
+
+
+def _ler_dataset(caminho, hash_atual):
+    # Usa o artefato tipado (leitura via memory map) quando ele corresponde ao conteúdo atual do CSV
+    artefato = caminho_artefato(caminho)
+    if artefato_atualizado(hash_atual, artefato):
+        return ler_artefato(artefato)
+
+    # Caso contrário tipa o CSV em memória e tenta regravar o artefato para os próximos processos
+    df = tipar_dataset(ler_csv(caminho))
+    try:
+        salvar_artefato(df, hash_atual, artefato)
+    except OSError:
+        pass
+
+    return df
+
+
+def _obter_entrada(caminho):
+    caminho = os.path.abspath(caminho)
+    with _lock:
+        stat = os.stat(caminho)
+        assinatura = (stat.st_mtime_ns, stat.st_size)
+        entrada = _cache.get(caminho)
+
+        # Só recalcula o hash quando o mtime ou o tamanho mudam; os dados só são lidos quando alguém os pede
+        if entrada is None or entrada['assinatura'] != assinatura:
+            hash_atual = hash_arquivo(caminho)
+            if entrada is None or entrada['hash'] != hash_atual:
+                entrada = {'hash': hash_atual, 'df': None}
+            entrada['assinatura'] = assinatura
+            _cache[caminho] = entrada
+
+        return caminho, entrada
+
+
+def _dataset_inteiro(caminho, entrada):
+    with _lock:
+        if entrada['df'] is None:
+            entrada['df'] = _ler_dataset(caminho, entrada['hash'])
+        return entrada['df']
+
+
+def carregar_dataset(caminho=CAMINHO_DATASET):
+    # Retorna uma visão do dataset em cache: as colunas são compartilhadas com a cópia do processo,
+    # então as abas devem criar novos DataFrames (dropna, filtros, atribuições) em vez de alterar os dados no lugar
+    return _dataset_inteiro(*_obter_entrada(caminho)).copy(deep=False)
+
+
+def _garantir_artefato(caminho, entrada):
+    # Gera o artefato da versão atual, se preciso, e retorna seu caminho.
+    # Quando não é possível gravá-lo, o dataset inteiro fica em memória e o retorno é None
+    artefato = caminho_artefato(caminho)
+    with _lock:
+        if artefato_atualizado(entrada['hash'], artefato):
+            return artefato
+
+        df = entrada['df'] if entrada['df'] is not None else _ler_dataset(caminho, entrada['hash'])
+        if artefato_atualizado(entrada['hash'], artefato):
+            return artefato
+
+        entrada['df'] = df
+        return None
+
+
+def artefato_dataset(caminho=CAMINHO_DATASET):
+    # Caminho do artefato colunar atualizado, para leitores que consultam o arquivo direto (ex.: util.consultas)
+    return _garantir_artefato(*_obter_entrada(caminho))
+
+
+def carregar_colunas(colunas, caminho=CAMINHO_DATASET):
+    # Lê apenas as colunas de um manifesto (pares coluna/dtype) direto do artefato colunar, sem carregar o resto
+    caminho, entrada = _obter_entrada(caminho)
+    nomes = [coluna for coluna, _ in colunas]
+
+    artefato = _garantir_artefato(caminho, entrada)
+    if entrada['df'] is not None:
+        df = entrada['df'][nomes]
+    else:
+        df = ler_artefato(artefato, nomes)
+
+    # Garante os tipos declarados no manifesto (o artefato já grava a tipagem, então normalmente nada muda)
+    divergentes = {coluna: dtype for coluna, dtype in colunas if not _tipo_atende(df[coluna].dtype, dtype)}
+    return df.astype(divergentes) if divergentes else df
+
+
+def _tipo_atende(atual, declarado):
+    # O dtype numérico do manifesto é o tipo mínimo exigido: uma coluna do mesmo tipo (ex.: float32 gravado pela
+    # compactação para um manifesto 'float64') já atende e não é convertida a cada leitura
+    if str(atual) == declarado:
+        return True
+    try:
+        declarado = np.dtype(declarado)
+    except TypeError:
+        return False
+    return isinstance(atual, np.dtype) and atual.kind in 'fiu' and atual.kind == declarado.kind
+
+
+def colunas_disponiveis(caminho=CAMINHO_DATASET):
+    # Nomes das colunas da versão atual, lidos do esquema do artefato (sem os dados) uma vez por versão
+    caminho, entrada = _obter_entrada(caminho)
+    if entrada.get('colunas') is None:
+        artefato = _garantir_artefato(caminho, entrada)
+        entrada['colunas'] = list(entrada['df'].columns) if entrada['df'] is not None else ler_colunas_artefato(artefato)
+    return entrada['colunas']
+
+
+def versao_dataset(caminho=CAMINHO_DATASET):
+    # Hash do conteúdo atual do dataset, útil como chave de cache para resultados derivados
+    return _obter_entrada(caminho)[1]['hash']
+
+
+def memoria_kb(df):
+    # Memória ocupada pelo DataFrame, incluindo o conteúdo das strings
+    return df.memory_usage(deep=True).sum() / 1024
+
+
+def limpar_cache():
+    with _lock:
+        _cache.clear()
+
+
+def manifesto(colunas):
+    # Forma imutável de um manifesto {coluna: dtype}, usada como chave das etapas abaixo. As colunas anuais
+    # ('INDE_{ano}') viram uma coluna por ano do dataset atual: um ano novo é lido sem alterar as abas
+    return tuple(expandir_anos(colunas, colunas_disponiveis()).items()) if colunas else None
+
+
+@etapa
+def dataset_versao(versao, colunas=None):
+    # Etapa "carregar" das abas: o dataset de uma versão específica (hash do conteúdo),
+    # inteiro ou apenas com as colunas de um manifesto. Em uma versão com coorte (filtro global da barra lateral),
+    # as linhas da coorte são recortadas do resultado da versão base com a máscara do índice de bitmaps
+    mascara = mascara_coorte(versao)
+    if mascara is not None:
+        return dataset_versao(separar_versao(versao)[0], colunas)[mascara]
+
+    if colunas is None:
+        return carregar_dataset()
+    return carregar_colunas(colunas)
+
+
+@etapa
+def dataset_completo(versao, colunas=None):
+    # Etapa "limpar" compartilhada: linhas sem valores ausentes em nenhuma coluna do dataset, base de quase todas
+    # as abas. A marcação LINHA_COMPLETA mantém essa semântica mesmo quando só algumas colunas são lidas
+    if colunas is None:
+        df = dataset_versao(versao)
+    else:
+        df = dataset_versao(versao, (*colunas, (COLUNA_LINHA_COMPLETA, 'bool')))
+    return df[df[COLUNA_LINHA_COMPLETA]].drop(columns=COLUNA_LINHA_COMPLETA)
@@ -0,0 +1,102 @@
+import os
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from tabs.catalogo import carregar_aba, modulos_e_classes
+from util.cache import estatisticas_etapas
+from util.dados import dataset_versao, memoria_kb, versao_dataset
+from util.instrumentacao import (
+    configurar_perfil, iniciar_rastreamento_memoria, medicoes_recentes, parar_rastreamento_memoria
+)
+
+# O modo de diagnóstico só existe quando o servidor é iniciado com DATATHON_DIAGNOSTICO=1: ele liga o tracemalloc
+# do processo e grava perfis em disco, então não pode ser habilitado por qualquer visitante pela URL
+DIAGNOSTICO_HABILITADO = os.environ.get('DATATHON_DIAGNOSTICO', '0') == '1'
+
+# Parâmetro da URL que habilita o painel de diagnóstico (ex.: /dashboards?diagnostico)
+PARAMETRO_DIAGNOSTICO = 'diagnostico'
+
+# Parâmetro que habilita o perfil dos reruns lentos (ex.: ?diagnostico&perfil=500 grava reruns acima de 500 ms)
+PARAMETRO_PERFIL = 'perfil'
+PARAMETRO_PERFILADOR = 'perfilador'
+
+
+def diagnostico_ativo():
+    return DIAGNOSTICO_HABILITADO and PARAMETRO_DIAGNOSTICO in st.query_params
+
+
+def configurar_diagnostico():
+    # Chamado antes das abas: liga o rastreamento de memória e, se pedido na URL, o perfil dos reruns lentos.
+    # Uma sessão fora do diagnóstico libera o tracemalloc (desligado quando nenhuma sessão o usa)
+    contexto = get_script_run_ctx()
+    sessao = contexto.session_id if contexto is not None else None
+    if not diagnostico_ativo():
+        configurar_perfil(None)
+        parar_rastreamento_memoria(sessao)
+        return
+
+    iniciar_rastreamento_memoria(sessao)
+
+    # O limite é elevado a LIMITE_MINIMO_PERFIL_MS; um valor inválido usa o mínimo
+    limite = st.query_params.get(PARAMETRO_PERFIL)
+    try:
+        limite_ms = float(limite) if limite is not None else None
+    except ValueError:
+        limite_ms = 0.0
+    configurar_perfil(limite_ms, st.query_params.get(PARAMETRO_PERFILADOR, 'cprofile'))
+
+
+def exibir_painel_diagnostico():
+    # Acertos e falhas de cache de cada etapa das abas, acumulados desde o início do processo
+    with st.expander("Diagnóstico: cache das etapas"):
+        estatisticas = estatisticas_etapas()
+        if estatisticas:
+            tabela = pd.DataFrame.from_dict(estatisticas, orient='index').rename(
+                columns={'acertos': 'Acertos', 'falhas': 'Falhas'}
+            )
+            tabela.index.name = 'Etapa'
+            st.write(tabela.sort_index())
+        else:
+            st.write("Nenhuma etapa executada ainda.")
+
+    # Tempo de parede, CPU e memória alocada em cada fase do render das abas, nos reruns mais recentes
+    with st.expander("Diagnóstico: tempo de renderização das abas"):
+        medicoes = medicoes_recentes()
+        if medicoes:
+            tabela = pd.DataFrame(medicoes).rename(columns={
+                'aba': 'Aba',
+                'rerun': 'Rerun',
+                'fase': 'Fase',
+                'tempo_ms': 'Tempo (ms)',
+                'cpu_ms': 'CPU (ms)',
+                'memoria_kb': 'Memória Alocada (KB)',
+                'momento': 'Momento'
+            })
+
+            # Média por aba e fase, seguida das medições individuais mais recentes
+            st.write(tabela.groupby(['Aba', 'Fase'])[['Tempo (ms)', 'CPU (ms)', 'Memória Alocada (KB)']].mean())
+            st.write(tabela.iloc[::-1].set_index(['Aba', 'Rerun']))
+        else:
+            st.write("Nenhuma aba renderizada ainda.")
+
+    # Memória dos dados carregados por cada aba (colunas do manifesto), comparada à do dataset inteiro
+    with st.expander("Diagnóstico: memória dos dados por aba"):
+        st.write(memoria_por_aba())
+
+
+def memoria_por_aba():
+    versao = versao_dataset()
+    linhas = []
+    # Importa todas as abas do catálogo (apenas no modo de diagnóstico)
+    abas = [carregar_aba(f'{modulo}:{classe}') for modulo, classe in modulos_e_classes()]
+    for aba in [*abas, None]:
+        df = dataset_versao(versao, aba.manifesto() if aba else None)
+        linhas.append({
+            'Aba': aba.__name__ if aba else 'Dataset inteiro',
+            'Colunas': df.shape[1],
+            'Linhas': df.shape[0],
+            'Memória (KB)': memoria_kb(df),
+        })
+    return pd.DataFrame(linhas).set_index('Aba')
@@ -0,0 +1,72 @@
+import numpy as np
+
+# Quantidade de pontos da curva de densidade (KDE) enviada ao navegador, independente do número de alunos
+PONTOS_KDE = 100
+
+# Resolução da grade em que os valores são agrupados antes do KDE, para que o custo não cresça com o número de linhas
+BINS_KDE = 1024
+
+
+def _valores_validos(valores):
+    valores = np.asarray(valores, dtype='float64')
+    return valores[~np.isnan(valores)]
+
+
+def resumo_boxplot(valores):
+    # Quartis (método linear, o mesmo padrão do Plotly), cercas de Tukey (1,5 x IQR) e outliers de uma série.
+    # As cercas são o menor e o maior valor observados dentro de [Q1 - 1,5 IQR, Q3 + 1,5 IQR], como no go.Box.
+    valores = _valores_validos(valores)
+    if valores.size == 0:
+        return None
+
+    q1, mediana, q3 = np.percentile(valores, [25, 50, 75])
+    iqr = q3 - q1
+    dentro = (valores >= q1 - 1.5 * iqr) & (valores <= q3 + 1.5 * iqr)
+
+    return {
+        'n': int(valores.size),
+        'q1': float(q1),
+        'mediana': float(mediana),
+        'q3': float(q3),
+        'media': float(valores.mean()),
+        'cerca_inferior': float(valores[dentro].min()),
+        'cerca_superior': float(valores[dentro].max()),
+        'outliers': valores[~dentro],
+    }
+
+
+def largura_banda_silverman(valores):
+    # Regra de Silverman, a mesma usada pelo go.Violin para a largura de banda do kernel gaussiano
+    desvio = valores.std(ddof=1) if valores.size > 1 else 0.0
+    q1, q3 = np.percentile(valores, [25, 75])
+    escala = min(desvio, (q3 - q1) / 1.349) or desvio
+    largura = 1.059 * escala * valores.size ** (-1 / 5)
+    return largura if largura > 0 else 1e-3
+
+
+def densidade_kde(valores, pontos=PONTOS_KDE, bins=BINS_KDE):
+    # KDE gaussiano vetorizado sobre os valores agrupados em uma grade fina: o custo depende de `bins` x `pontos`,
+    # e não do número de alunos. O intervalo segue o padrão 'soft' do Plotly (mínimo/máximo +- 2 larguras de banda).
+    valores = _valores_validos(valores)
+    if valores.size == 0:
+        return None
+
+    largura = largura_banda_silverman(valores)
+    inicio, fim = valores.min() - 2 * largura, valores.max() + 2 * largura
+
+    contagens, bordas = np.histogram(valores, bins=bins, range=(inicio, fim))
+    centros = (bordas[:-1] + bordas[1:]) / 2
+
+    grade = np.linspace(inicio, fim, pontos)
+    distancias = (grade[:, None] - centros[None, :]) / largura
+    densidade = (np.exp(-0.5 * distancias ** 2) @ contagens) / (valores.size * largura * np.sqrt(2 * np.pi))
+
+    return {'y': grade, 'densidade': densidade}
+
+
+def amostrar_pontos(valores, limite, semente=0):
+    # Amostra aleatória (reprodutível) de no máximo `limite` valores, para exibir pontos individuais sem enviar todos
+    valores = _valores_validos(valores)
+    if valores.size <= limite:
+        return valores
+    return np.random.default_rng(semente).choice(valores, size=limite, replace=False)
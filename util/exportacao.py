@@ -0,0 +1,140 @@
+import contextlib
+import hashlib
+import os
+import threading
+
+import streamlit as st
+
+from util.cache import AUSENTE, criar_cache
+
+# Formatos de imagem oferecidos para download: rótulo -> (formato do kaleido, mime type)
+FORMATOS_IMAGEM = {
+    'PNG': ('png', 'image/png'),
+    'SVG': ('svg', 'image/svg+xml'),
+}
+
+# Quantidade máxima de imagens mantidas em memória
+LIMITE_CACHE_IMAGENS = 64
+
+# Imagens geradas, com o mesmo backend das etapas (DATATHON_CACHE): no backend 'disco', as réplicas compartilham os PNGs
+_cache_imagens = criar_cache('imagens', LIMITE_CACHE_IMAGENS)
+
+# O processo do kaleido é único por processo Python e não aceita requisições concorrentes
+_lock_kaleido = threading.Lock()
+
+# Marca, por thread, que as imagens devem ser geradas antecipadamente (usado pelo aquecimento dos caches)
+_pregeracao = threading.local()
+
+# Exportações capturadas pelo exportador em lote (util.lote); None fora de uma captura
+_captura = None
+_lock_captura = threading.Lock()
+
+
+def _obter_scope():
+    # Scope do kaleido mantido pelo plotly: o subprocesso do Chromium é iniciado uma única vez e reutilizado
+    from plotly.io import kaleido as pio_kaleido
+    return pio_kaleido.scope
+
+
+def iniciar_kaleido():
+    # Inicia o processo do kaleido antecipadamente para evitar o cold start na primeira exportação
+    import plotly.graph_objects as go
+
+    scope = _obter_scope()
+    if scope is None:
+        return False
+
+    with _lock_kaleido:
+        go.Figure().to_image(format='png', engine='kaleido')
+    return True
+
+
+@contextlib.contextmanager
+def pregerar_imagens():
+    # Dentro do bloco, cada botão de download gera a imagem no formato padrão e a deixa no cache,
+    # para que a primeira exportação pedida por um usuário não espere pelo kaleido
+    _pregeracao.ativa = True
+    try:
+        yield
+    finally:
+        _pregeracao.ativa = False
+
+
+@contextlib.contextmanager
+def capturar_exportacoes():
+    # Dentro do bloco, cada botão de download registra o arquivo que ofereceria (figura ou CSV), sem depender de
+    # um clique. A captura vale para o processo inteiro, pois o AppTest executa a aba em outra thread: é usada
+    # apenas por processos dedicados ao lote, nunca pelo servidor
+    global _captura
+    capturas = []
+    with _lock_captura:
+        _captura = capturas
+    try:
+        yield capturas
+    finally:
+        with _lock_captura:
+            _captura = None
+
+
+def _registrar_exportacao(tipo, file_name, conteudo):
+    with _lock_captura:
+        if _captura is not None:
+            _captura.append({'tipo': tipo, 'arquivo': file_name, 'conteudo': conteudo})
+
+
+def hash_figura(fig, formato='png'):
+    # Chave de cache derivada da especificação completa da figura (dados + layout) e do formato
+    sha = hashlib.sha256(fig.to_json().encode('utf-8'))
+    sha.update(formato.encode('utf-8'))
+    return sha.hexdigest()
+
+
+def gerar_imagem(fig, formato='png', chave=None):
+    chave = chave or hash_figura(fig, formato)
+
+    img_bytes = _cache_imagens.obter(chave)
+    if img_bytes is not AUSENTE:
+        return img_bytes
+
+    with _lock_kaleido:
+        img_bytes = fig.to_image(format=formato, engine='kaleido')
+
+    _cache_imagens.guardar(chave, img_bytes)
+    return img_bytes
+
+
+def botao_download_grafico(fig, file_name, label="Download do Gráfico", key=None):
+    # Exibe o seletor de formato e só gera a imagem (via kaleido) quando o usuário pede a exportação
+    key = key or file_name
+    nome_base = os.path.splitext(file_name)[0]
+
+    formato_rotulo = st.radio(
+        'Formato da imagem:', options=list(FORMATOS_IMAGEM), horizontal=True, key=f'formato_{key}'
+    )
+    formato, mime = FORMATOS_IMAGEM[formato_rotulo]
+    chave = hash_figura(fig, formato)
+    _registrar_exportacao('grafico', file_name, fig)
+
+    if getattr(_pregeracao, 'ativa', False):
+        gerar_imagem(fig, formato, chave)
+
+    # A imagem gerada fica associada à figura atual; se os filtros mudarem a figura, o botão volta a aparecer
+    estado = f'imagem_gerada_{key}'
+    if st.session_state.get(estado) != chave:
+        if st.button(f"Gerar Imagem do Gráfico ({formato_rotulo})", key=f'gerar_{key}'):
+            st.session_state[estado] = chave
+
+    if st.session_state.get(estado) == chave:
+        st.download_button(
+            label=label,
+            data=gerar_imagem(fig, formato, chave),
+            file_name=f"{nome_base}.{formato}",
+            mime=mime,
+            key=f'download_{key}'
+        )
+
+
+def botao_download_csv(label, data, file_name, mime="text/csv", key=None):
+    # Botão de download das tabelas das abas (mesmos argumentos do st.download_button)
+    _registrar_exportacao('tabela', file_name, data)
+    return st.download_button(label=label, data=data, file_name=file_name, mime=mime, key=key)
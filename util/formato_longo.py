@@ -0,0 +1,82 @@
+import re
+
+import pandas as pd
+
+# Colunas anuais seguem o padrão INDICADOR_ANO (ex.: INDE_2020, PEDRA_2021, PONTO_VIRADA_2022)
+PADRAO_COLUNA_ANUAL = re.compile(r'^(?P<indicador>.+)_(?P<ano>\d{4})$')
+
+# Nomes dos níveis do índice no formato longo
+NIVEL_ALUNO = 'NOME'
+NIVEL_ANO = 'ANO'
+
+# Marcador do ano nos manifestos das abas (ex.: 'INDE_{ano}'): a coluna é lida para cada ano presente no dataset
+MARCADOR_ANO = '{ano}'
+
+
+def colunas_anuais(df):
+    # Mapeia cada coluna anual para o par (indicador, ano)
+    colunas = {}
+    for coluna in df.columns:
+        correspondencia = PADRAO_COLUNA_ANUAL.match(coluna)
+        if correspondencia:
+            colunas[coluna] = (correspondencia.group('indicador'), correspondencia.group('ano'))
+    return colunas
+
+
+def expandir_anos(colunas, existentes):
+    # Expande as colunas anuais de um manifesto ({'INDE_{ano}': 'float64'}) para os anos encontrados entre as
+    # colunas existentes no dataset, em ordem crescente; as demais colunas do manifesto são mantidas
+    expandido = {}
+    for coluna, dtype in colunas.items():
+        if MARCADOR_ANO not in coluna:
+            expandido[coluna] = dtype
+            continue
+        padrao = re.compile(re.escape(coluna).replace(re.escape(MARCADOR_ANO), r'(\d{4})') + '$')
+        anos = sorted(correspondencia.group(1) for correspondencia in map(padrao.match, existentes) if correspondencia)
+        expandido.update((coluna.replace(MARCADOR_ANO, ano), dtype) for ano in anos)
+    return expandido
+
+
+def listar_anos(df):
+    # Anos presentes no dataset, em ordem crescente; aceita tanto o formato largo quanto o longo
+    if NIVEL_ANO in getattr(df.index, 'names', []):
+        return sorted(df.index.get_level_values(NIVEL_ANO).unique())
+    return sorted({ano for _, ano in colunas_anuais(df).values()})
+
+
+def para_formato_longo(df, indicadores=None):
+    # Converte o dataset largo (uma coluna por indicador e ano) em um DataFrame indexado por (NOME, ANO),
+    # com uma coluna por indicador. Anos novos entram automaticamente, sem alterar as abas.
+    colunas_por_ano = {}
+    for coluna, (indicador, ano) in colunas_anuais(df).items():
+        if indicadores is None or indicador in indicadores:
+            colunas_por_ano.setdefault(ano, {})[coluna] = indicador
+
+    categoricas = set()
+    partes = []
+    for ano in sorted(colunas_por_ano):
+        renomear = colunas_por_ano[ano]
+        parte = df[[NIVEL_ALUNO, *renomear]].rename(columns=renomear)
+        parte.insert(1, NIVEL_ANO, ano)
+        partes.append(parte)
+        categoricas.update(
+            indicador for coluna, indicador in renomear.items() if isinstance(df[coluna].dtype, pd.CategoricalDtype)
+        )
+
+    if not partes:
+        return pd.DataFrame(index=pd.MultiIndex.from_arrays([[], []], names=[NIVEL_ALUNO, NIVEL_ANO]))
+
+    longo = pd.concat(partes, ignore_index=True)
+
+    # Categorias de anos diferentes são unificadas após a concatenação
+    for indicador in categoricas:
+        longo[indicador] = longo[indicador].astype('category')
+
+    return longo.set_index([NIVEL_ALUNO, NIVEL_ANO])
+
+
+def para_formato_largo(longo):
+    # Operação inversa: volta para uma coluna por indicador e ano (INDICADOR_ANO)
+    largo = longo.unstack(NIVEL_ANO)
+    largo.columns = [f'{indicador}_{ano}' for indicador, ano in largo.columns]
+    return largo.reset_index()
@@ -0,0 +1,56 @@
+import math
+
+import numpy as np
+import plotly.graph_objects as go
+
+# Número padrão de intervalos dos histogramas (o mesmo nbins=20 usado antes pelo Plotly)
+NUMERO_BINS = 20
+
+
+def _passo_arredondado(passo_bruto):
+    # Arredonda a largura do intervalo para 1, 2, 2,5 ou 5 x 10^k, como o agrupamento automático do Plotly
+    if passo_bruto <= 0 or not math.isfinite(passo_bruto):
+        return 1.0
+    potencia = 10 ** math.floor(math.log10(passo_bruto))
+    for multiplo in (1, 2, 2.5, 5, 10):
+        if passo_bruto <= multiplo * potencia:
+            return multiplo * potencia
+    return 10 * potencia
+
+
+def bordas_histograma(valores, nbins=NUMERO_BINS):
+    # Bordas com largura "redonda", calculadas sobre a coluna completa (antes dos filtros da aba):
+    # assim os intervalos continuam os mesmos quando o usuário muda a seleção
+    valores = np.asarray(valores, dtype='float64')
+    valores = valores[~np.isnan(valores)]
+    if valores.size == 0:
+        return np.array([0.0, 1.0])
+
+    minimo, maximo = valores.min(), valores.max()
+    passo = _passo_arredondado((maximo - minimo) / nbins)
+    inicio = math.floor(minimo / passo) * passo
+    quantidade = max(1, math.ceil((maximo - inicio) / passo - 1e-9))
+
+    # O último intervalo do np.histogram é fechado à direita, então o máximo entra no último intervalo
+    return np.round(inicio + passo * np.arange(quantidade + 1), 10)
+
+
+def calcular_histograma(valores, bordas):
+    # Contagens por intervalo com np.histogram; valores ausentes são ignorados
+    valores = np.asarray(valores, dtype='float64')
+    contagens, _ = np.histogram(valores[~np.isnan(valores)], bins=bordas)
+    return {'contagens': contagens, 'bordas': np.asarray(bordas)}
+
+
+def figura_histograma(histograma, cor, rotulo_valor='Valor', rotulo_contagem='Contagem'):
+    # Barras a partir das contagens já calculadas: o navegador recebe um ponto por intervalo, não um por aluno
+    bordas = histograma['bordas']
+    return go.Figure(data=[go.Bar(
+        x=(bordas[:-1] + bordas[1:]) / 2,
+        y=histograma['contagens'],
+        width=np.diff(bordas),
+        customdata=np.column_stack([bordas[:-1], bordas[1:]]),
+        hovertemplate=f'{rotulo_valor}: %{{customdata[0]:.2f}} a %{{customdata[1]:.2f}}<br>{rotulo_contagem}: %{{y}}<extra></extra>',
+        marker_color=cor,
+        marker_line=dict(width=0.5, color='black'),
+    )])
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+
+def classificar_tendencia_inde(inde_inicio, inde_meio, inde_fim):
+    # Versão vetorizada da classificação de tendência: as condições são avaliadas na mesma ordem
+    # do antigo if/elif, e np.select escolhe a primeira verdadeira para cada aluno.
+    # Comparações com NaN resultam em False, o que leva ao rótulo 'Estável' como antes.
+    condicoes = [
+        (inde_meio > inde_inicio) & (inde_fim > inde_meio),
+        (inde_meio < inde_inicio) & (inde_fim < inde_meio),
+        (inde_meio > inde_inicio) & (inde_fim < inde_meio),
+        (inde_meio < inde_inicio) & (inde_fim > inde_meio),
+        (inde_inicio == inde_meio) & (inde_meio > inde_fim),
+        (inde_inicio == inde_meio) & (inde_meio < inde_fim),
+    ]
+    rotulos = ['Aumento', 'Queda', 'Aumento seguido de queda', 'Queda seguida de aumento', 'Queda', 'Aumento']
+
+    tendencia = np.select(condicoes, rotulos, default='Estável')
+    return pd.Series(tendencia, index=inde_inicio.index, dtype=object)
+
+
+def calcular_variacao_inde(inde_inicio, inde_fim):
+    # Variação percentual entre dois anos. Quando o valor inicial é zero, a variação é 0 se o valor
+    # final também for zero, ou 'Aumento Infinito' caso contrário (coluna passa a ser do tipo object)
+    base_zero = inde_inicio == 0
+    fim_zero = inde_fim == 0
+
+    variacao = (inde_fim - inde_inicio) / inde_inicio.abs() * 100
+    variacao = variacao.mask(base_zero & fim_zero, 0.0)
+
+    aumento_infinito = base_zero & ~fim_zero
+    if aumento_infinito.any():
+        variacao = variacao.astype(object).mask(aumento_infinito, 'Aumento Infinito')
+
+    return variacao
@@ -0,0 +1,36 @@
+from bisect import bisect_left
+
+
+class IndiceAlunos:
+    # Índices do perfil do aluno sobre a coluna NOME: um dicionário nome -> posição da linha (busca exata em O(1),
+    # sem varrer o DataFrame com uma máscara booleana) e a lista de nomes ordenada para a busca por prefixo
+    # (autocompletar) com bisect, em O(log n) mais o tamanho do resultado
+    def __init__(self, nomes):
+        self.posicoes = {nome: posicao for posicao, nome in enumerate(nomes) if isinstance(nome, str)}
+        self.ordenados = sorted(self.posicoes, key=self._chave)
+        self._chaves = [self._chave(nome) for nome in self.ordenados]
+
+    @staticmethod
+    def _chave(nome):
+        # A busca ignora maiúsculas/minúsculas e espaços nas pontas
+        return nome.strip().casefold()
+
+    def __len__(self):
+        return len(self.ordenados)
+
+    def __contains__(self, nome):
+        return nome in self.posicoes
+
+    def posicao(self, nome):
+        # Posição (iloc) da linha do aluno; None quando o nome não existe
+        return self.posicoes.get(nome)
+
+    def buscar_prefixo(self, prefixo, limite=None):
+        # Nomes que começam com o prefixo, em ordem, e o total de correspondências (a lista pode ser truncada)
+        chave = self._chave(prefixo)
+        inicio = bisect_left(self._chaves, chave)
+        fim = bisect_left(self._chaves, chave + '\U0010ffff', lo=inicio)
+        total = fim - inicio
+        if limite is not None:
+            fim = min(fim, inicio + limite)
+        return self.ordenados[inicio:fim], total
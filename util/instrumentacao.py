@@ -0,0 +1,222 @@
+import cProfile
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from datetime import datetime
+
+# Fases de renderização de uma aba, na ordem em que normalmente acontecem
+FASES = ('carregar', 'preparar', 'plotar', 'exportar')
+
+# Quantidade de medições mantidas em memória para o painel de diagnóstico
+LIMITE_MEDICOES = 500
+
+# Arquivo JSONL com uma linha por fase medida (desabilitado quando a variável não está definida)
+ARQUIVO_METRICAS = os.environ.get('DATATHON_METRICAS_JSONL')
+
+# Pasta onde os perfis de reruns lentos são gravados
+PASTA_PERFIS = os.environ.get('DATATHON_PASTA_PERFIS', './perfis')
+
+# Limite mínimo (ms) para gravar o perfil de um rerun, e quantidade máxima de perfis mantidos na pasta
+# (os mais antigos são removidos): evita um arquivo por rerun com ?perfil=0
+LIMITE_MINIMO_PERFIL_MS = 100
+LIMITE_ARQUIVOS_PERFIL = 50
+
+# Tempo (s) sem reruns após o qual uma sessão de diagnóstico deixa de manter o tracemalloc ligado
+EXPIRACAO_SESSAO_DIAGNOSTICO = 300
+
+_medicoes = deque(maxlen=LIMITE_MEDICOES)
+_contador_reruns = itertools.count(1)
+_lock = threading.Lock()
+
+# Sessões de diagnóstico que precisam do tracemalloc (id -> último rerun). O tracemalloc é global ao processo:
+# fica ligado só enquanto houver alguma sessão ativa
+_sessoes_memoria = {}
+_lock_sessoes = threading.Lock()
+
+# Configuração do perfilador opcional, por thread (cada sessão do Streamlit executa o script na sua própria thread):
+# limite de tempo (ms) a partir do qual o rerun é gravado, e o perfilador usado
+_perfil = threading.local()
+
+
+def _atualizar_rastreamento(agora):
+    # Chamado com _lock_sessoes: descarta sessões expiradas e liga/desliga o tracemalloc conforme o que resta
+    for sessao, ultimo_rerun in list(_sessoes_memoria.items()):
+        if agora - ultimo_rerun > EXPIRACAO_SESSAO_DIAGNOSTICO:
+            del _sessoes_memoria[sessao]
+
+    if _sessoes_memoria and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not _sessoes_memoria and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def iniciar_rastreamento_memoria(sessao):
+    # A memória alocada por fase só é medida com o tracemalloc ativo, pois ele deixa o processo mais lento
+    with _lock_sessoes:
+        agora = time.monotonic()
+        _sessoes_memoria[sessao] = agora
+        _atualizar_rastreamento(agora)
+
+
+def parar_rastreamento_memoria(sessao):
+    # A sessão deixou o modo de diagnóstico (ou nunca esteve nele); sem sessões ativas, o tracemalloc é desligado
+    with _lock_sessoes:
+        _sessoes_memoria.pop(sessao, None)
+        _atualizar_rastreamento(time.monotonic())
+
+
+def configurar_perfil(limite_ms=None, perfilador='cprofile'):
+    # Habilita (ou desabilita, com limite_ms=None) a gravação do perfil dos reruns mais lentos que o limite
+    _perfil.limite_ms = max(limite_ms, LIMITE_MINIMO_PERFIL_MS) if limite_ms is not None else None
+    _perfil.perfilador = perfilador
+
+
+def medicoes_recentes():
+    with _lock:
+        return list(_medicoes)
+
+
+def limpar_medicoes():
+    with _lock:
+        _medicoes.clear()
+
+
+class RegistroRender:
+    # Mede tempo de parede, tempo de CPU e memória alocada em cada fase de um rerun de uma aba.
+    # As fases são marcadas em sequência: iniciar uma fase encerra a anterior.
+    def __init__(self, aba):
+        self.aba = aba
+        self.rerun = next(_contador_reruns)
+        self.fases = []
+        self._fase_atual = None
+
+    def iniciar_fase(self, nome):
+        self.encerrar_fase()
+
+        # Memória em uso no início da fase. O pico do tracemalloc é global ao processo (e reset_peak() afetaria
+        # as outras sessões e medições, como as do benchmark): a fase registra só a diferença do uso atual
+        memoria_inicio = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        self._fase_atual = (nome, time.perf_counter(), time.thread_time(), memoria_inicio)
+
+    def encerrar_fase(self):
+        if self._fase_atual is None:
+            return
+
+        nome, inicio, cpu_inicio, memoria_inicio = self._fase_atual
+        fim, cpu_fim = time.perf_counter(), time.thread_time()
+        # Memória que a fase deixou alocada (negativa quando libera mais do que aloca). Inclui o que outras
+        # threads alocaram no mesmo intervalo, sem serializar os renders das sessões
+        memoria = None
+        if memoria_inicio is not None and tracemalloc.is_tracing():
+            memoria = tracemalloc.get_traced_memory()[0] - memoria_inicio
+        self._fase_atual = None
+        self.fases.append({
+            'aba': self.aba,
+            'rerun': self.rerun,
+            'fase': nome,
+            'tempo_ms': (fim - inicio) * 1000,
+            'cpu_ms': (cpu_fim - cpu_inicio) * 1000,
+            'memoria_kb': memoria / 1024 if memoria is not None else None,
+            'momento': datetime.now().isoformat(timespec='seconds'),
+        })
+
+    def finalizar(self, tempo_total_ms, cpu_total_ms):
+        self.encerrar_fase()
+        self.fases.append({
+            'aba': self.aba,
+            'rerun': self.rerun,
+            'fase': 'total',
+            'tempo_ms': tempo_total_ms,
+            'cpu_ms': cpu_total_ms,
+            'memoria_kb': None,
+            'momento': datetime.now().isoformat(timespec='seconds'),
+        })
+
+        with _lock:
+            _medicoes.extend(self.fases)
+            if ARQUIVO_METRICAS:
+                with open(ARQUIVO_METRICAS, 'a', encoding='utf-8') as arquivo:
+                    for medicao in self.fases:
+                        arquivo.write(json.dumps(medicao, ensure_ascii=False) + '\n')
+
+
+def _criar_perfilador():
+    # pyinstrument é opcional; sem ele, o cProfile da biblioteca padrão é usado
+    if getattr(_perfil, 'perfilador', 'cprofile') == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            pass
+        else:
+            return Profiler()
+    return cProfile.Profile()
+
+
+def _iniciar_perfilador(perfilador):
+    if isinstance(perfilador, cProfile.Profile):
+        perfilador.enable()
+    else:
+        perfilador.start()
+
+
+def _parar_perfilador(perfilador):
+    if isinstance(perfilador, cProfile.Profile):
+        perfilador.disable()
+    else:
+        perfilador.stop()
+
+
+def _rotacionar_perfis():
+    # Mantém só os LIMITE_ARQUIVOS_PERFIL perfis mais recentes na pasta
+    arquivos = [os.path.join(PASTA_PERFIS, nome) for nome in os.listdir(PASTA_PERFIS)]
+    arquivos = sorted((arquivo for arquivo in arquivos if os.path.isfile(arquivo)), key=os.path.getmtime)
+    for arquivo in arquivos[:-LIMITE_ARQUIVOS_PERFIL]:
+        try:
+            os.remove(arquivo)
+        except OSError:
+            pass
+
+
+def _gravar_perfil(perfilador, registro, tempo_total_ms):
+    os.makedirs(PASTA_PERFIS, exist_ok=True)
+    nome = f"{registro.aba}_{registro.rerun}_{int(tempo_total_ms)}ms"
+
+    if isinstance(perfilador, cProfile.Profile):
+        perfilador.dump_stats(os.path.join(PASTA_PERFIS, f'{nome}.prof'))
+    else:
+        with open(os.path.join(PASTA_PERFIS, f'{nome}.html'), 'w', encoding='utf-8') as arquivo:
+            arquivo.write(perfilador.output_html())
+
+    with _lock:
+        _rotacionar_perfis()
+
+
+def instrumentar_render(render):
+    # Envolve o render() de uma aba: cria o registro do rerun, mede o total e, se habilitado, perfila a execução
+    @functools.wraps(render)
+    def envoltorio(self, *args, **kwargs):
+        self._registro_render = RegistroRender(type(self).__name__)
+        limite_ms = getattr(_perfil, 'limite_ms', None)
+        perfilador = _criar_perfilador() if limite_ms is not None else None
+
+        inicio, cpu_inicio = time.perf_counter(), time.thread_time()
+        if perfilador is not None:
+            _iniciar_perfilador(perfilador)
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            if perfilador is not None:
+                _parar_perfilador(perfilador)
+
+            tempo_total_ms = (time.perf_counter() - inicio) * 1000
+            self._registro_render.finalizar(tempo_total_ms, (time.thread_time() - cpu_inicio) * 1000)
+
+            if perfilador is not None and tempo_total_ms >= limite_ms:
+                _gravar_perfil(perfilador, self._registro_render, tempo_total_ms)
+
+    return envoltorio
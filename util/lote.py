@@ -0,0 +1,150 @@
+import argparse
+import io
+import os
+import time
+import unicodedata
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from tabs.catalogo import ABAS, separar_referencia
+from util.site_estatico import ABAS_SEM_COMBINACOES, renderizar_aba, slug_titulo, titulo_limpo, variantes_filtros
+
+# Pasta padrão do relatório gerado
+PASTA_RELATORIO = './relatorio'
+
+# Altura (px) da faixa com o título da aba no topo de cada página do PDF
+ALTURA_LEGENDA = 60
+TAMANHO_FONTE = 20
+
+# Fontes TrueType tentadas para a legenda; a fonte embutida do Pillow não tem acentos
+FONTES_LEGENDA = ['DejaVuSans.ttf', 'Arial.ttf', 'LiberationSans-Regular.ttf']
+
+
+def _exportar_aba(modulo, classe, variante=None, combinacoes=False):
+    # Executado em um processo do pool: renderiza a aba (estado padrão ou variante) capturando o que os botões de
+    # download ofereceriam, e gera os PNGs com o kaleido do próprio processo
+    from util.exportacao import capturar_exportacoes, gerar_imagem
+
+    inicio = time.perf_counter()
+    with capturar_exportacoes() as capturas:
+        app = renderizar_aba(modulo, classe, variante)
+
+    # Uma variante executa a aba duas vezes (padrão e filtro aplicado): vale o que foi oferecido por último
+    arquivos = {}
+    for captura in capturas:
+        arquivos[(captura['tipo'], captura['arquivo'])] = captura['conteudo']
+
+    graficos, tabelas = [], []
+    for (tipo, arquivo), conteudo in arquivos.items():
+        if tipo == 'grafico':
+            graficos.append((f'{os.path.splitext(arquivo)[0]}.png', gerar_imagem(conteudo, 'png')))
+        else:
+            tabelas.append((arquivo, conteudo.encode('utf-8') if isinstance(conteudo, str) else conteudo))
+
+    return {
+        'graficos': graficos,
+        'tabelas': tabelas,
+        'variantes': (
+            variantes_filtros(app) if combinacoes and variante is None and classe not in ABAS_SEM_COMBINACOES else []
+        ),
+        'tempo_ms': (time.perf_counter() - inicio) * 1000,
+    }
+
+
+def _fonte_legenda(legenda):
+    from PIL import ImageFont
+
+    for fonte in FONTES_LEGENDA:
+        try:
+            return ImageFont.truetype(fonte, TAMANHO_FONTE), legenda
+        except OSError:
+            continue
+    return ImageFont.load_default(size=TAMANHO_FONTE), unicodedata.normalize('NFKD', legenda).encode('ascii', 'ignore').decode()
+
+
+def _pagina_pdf(png, legenda):
+    from PIL import Image, ImageDraw
+
+    fonte, legenda = _fonte_legenda(legenda)
+    imagem = Image.open(io.BytesIO(png)).convert('RGB')
+    pagina = Image.new('RGB', (imagem.width, imagem.height + ALTURA_LEGENDA), 'white')
+    pagina.paste(imagem, (0, ALTURA_LEGENDA))
+    ImageDraw.Draw(pagina).text((20, 18), legenda, fill='black', font=fonte)
+    return pagina
+
+
+def _gravar(pasta, nome, arquivos):
+    os.makedirs(pasta, exist_ok=True)
+    for arquivo, conteudo in arquivos:
+        with open(os.path.join(pasta, f'{nome}--{arquivo}'), 'wb') as destino:
+            destino.write(conteudo)
+
+
+def exportar_lote(pasta=PASTA_RELATORIO, abas=None, combinacoes=False, processos=None):
+    # Renderiza as abas (e, opcionalmente, a grade de combinações de filtros) em paralelo, um processo por tarefa,
+    # e monta um PDF com todos os gráficos, além dos PNGs e CSVs de cada aba. Retorna o tempo de cada tarefa
+    selecionadas = [(titulo, referencia) for titulo, referencia in ABAS if not abas or separar_referencia(referencia)[1] in abas]
+    resultados = {}
+
+    with ProcessPoolExecutor(max_workers=processos) as pool:
+        pendentes = {}
+        for posicao, (titulo, referencia) in enumerate(selecionadas):
+            modulo, classe = separar_referencia(referencia)
+            tarefa = pool.submit(_exportar_aba, modulo, classe, None, combinacoes)
+            pendentes[tarefa] = (posicao, 0, titulo, modulo, classe, None)
+
+        # As variantes de cada aba só são conhecidas depois do render padrão: entram no pool assim que ele termina
+        while pendentes:
+            concluidas, _ = wait(pendentes, return_when=FIRST_COMPLETED)
+            for tarefa in concluidas:
+                posicao, numero, titulo, modulo, classe, variante = pendentes.pop(tarefa)
+                resultado = tarefa.result()
+                resultados[(posicao, numero)] = (titulo, classe, variante, resultado)
+
+                for numero_variante, nova in enumerate(resultado['variantes'], start=1):
+                    nova_tarefa = pool.submit(_exportar_aba, modulo, classe, nova)
+                    pendentes[nova_tarefa] = (posicao, numero_variante, titulo, modulo, classe, nova)
+
+    paginas_pdf = []
+    tarefas = []
+    for (_, numero), (titulo, classe, variante, resultado) in sorted(resultados.items()):
+        nome = slug_titulo(titulo) + (f'--{numero}' if numero else '')
+        legenda = titulo_limpo(titulo) + (f' ({variante[2].rstrip(":")}: {variante[3]})' if variante else '')
+
+        _gravar(os.path.join(pasta, 'graficos'), nome, resultado['graficos'])
+        _gravar(os.path.join(pasta, 'tabelas'), nome, resultado['tabelas'])
+        paginas_pdf.extend(_pagina_pdf(png, legenda) for _, png in resultado['graficos'])
+        tarefas.append({
+            'aba': classe, 'variante': legenda, 'graficos': len(resultado['graficos']),
+            'tabelas': len(resultado['tabelas']), 'tempo_ms': resultado['tempo_ms'],
+        })
+
+    if paginas_pdf:
+        paginas_pdf[0].save(os.path.join(pasta, 'relatorio.pdf'), save_all=True, append_images=paginas_pdf[1:])
+
+    return tarefas
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Exporta os gráficos (PNG e um PDF com todas as páginas) e as tabelas (CSV) de todas as abas.'
+    )
+    parser.add_argument('--saida', default=PASTA_RELATORIO, help='Pasta de destino do relatório.')
+    parser.add_argument('--abas', nargs='+', help='Classes das abas a exportar (padrão: todas).')
+    parser.add_argument(
+        '--combinacoes', action='store_true',
+        help='Exporta também cada opção dos seletores de escolha única (um seletor por vez).'
+    )
+    parser.add_argument('--processos', type=int, help='Número de processos (padrão: número de núcleos).')
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    tarefas = exportar_lote(args.saida, args.abas, args.combinacoes, args.processos)
+    for tarefa in tarefas:
+        print(f"{tarefa['variante']}: {tarefa['graficos']} gráfico(s), {tarefa['tabelas']} tabela(s) em {tarefa['tempo_ms']:.0f} ms")
+    print(f'{len(tarefas)} tarefas exportadas em {args.saida} ({time.perf_counter() - inicio:.1f}s).')
+
+
+if __name__ == '__main__':
+    # As tarefas do pool são enviadas pelo módulo importável: o AppTest troca o __main__ dos processos do pool
+    from util import lote
+    lote.main()
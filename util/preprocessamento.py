@@ -0,0 +1,205 @@
+import argparse
+import hashlib
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+# Caminhos padrão do CSV original e do artefato colunar gerado a partir dele
+CAMINHO_CSV = './dataset/PEDE_PASSOS_DATASET_FIAP.csv'
+CAMINHO_ARTEFATO = './dataset/PEDE_PASSOS_DATASET_FIAP.feather'
+
+# Versão do formato do artefato: deve ser incrementada sempre que a tipagem abaixo mudar
+VERSAO_ARTEFATO = '3'
+
+# Marcadores de valor ausente encontrados no CSV
+VALORES_NULOS = ['#NULO!']
+
+# Indicadores anuais e demais colunas numéricas (ex.: INDE_2020, NOTA_MAT_2022, FASE_2021)
+PADRAO_NUMERICO = re.compile(
+    r'^(INDE|IAA|IEG|IPS|IDA|IPP|IPV|IAN|CG|CF|CT|NOTA_PORT|NOTA_MAT|NOTA_ING|'
+    r'IDADE_ALUNO|ANOS_PM|FASE|DEFASAGEM|QTD_AVAL|ANO_INGRESSO)_\d{4}$'
+)
+
+# Colunas categóricas de baixa cardinalidade
+PADRAO_CATEGORICO = re.compile(r'^(PEDRA|INSTITUICAO_ENSINO_ALUNO)_\d{4}$')
+
+# Coluna calculada na tipagem: indica se a linha não tem valores ausentes em nenhuma coluna do CSV.
+# Com ela as linhas completas (o dropna sobre o dataset inteiro) são selecionadas lendo só algumas colunas
+COLUNA_LINHA_COMPLETA = 'LINHA_COMPLETA'
+
+# Compactação: textos com poucos valores distintos em relação às linhas preenchidas viram categorias
+FRACAO_MAXIMA_CATEGORIAS = 0.5
+
+# Textos longos (ex.: frases DESTAQUE_*) repetidos são codificados por dicionário, guardando cada frase uma única vez
+TAMANHO_TEXTO_LONGO = 40
+
+
+def hash_arquivo(caminho):
+    # Calcula o hash do conteúdo do arquivo em blocos, sem carregá-lo inteiro na memória
+    sha = hashlib.sha256()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(1 << 20), b''):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+def ler_csv(caminho=CAMINHO_CSV):
+    return pd.read_csv(caminho, delimiter=';', na_values=VALORES_NULOS)
+
+
+def tipar_dataset(df, compactar=True):
+    # Converte os indicadores para numérico (valores inválidos viram NaN) e as colunas repetitivas para categorias
+    df = df.copy()
+
+    for coluna in df.columns:
+        if PADRAO_NUMERICO.match(coluna):
+            df[coluna] = pd.to_numeric(df[coluna], errors='coerce').astype('float64')
+        elif PADRAO_CATEGORICO.match(coluna):
+            df[coluna] = df[coluna].astype('category')
+
+    df[COLUNA_LINHA_COMPLETA] = df.notna().all(axis=1)
+
+    return compactar_dataset(df) if compactar else df
+
+
+def _deve_categorizar(serie):
+    valores = serie.dropna()
+    if valores.empty:
+        return False
+
+    distintos = valores.nunique()
+    if distintos <= FRACAO_MAXIMA_CATEGORIAS * len(valores):
+        return True
+    return distintos < len(valores) and valores.astype(str).str.len().mean() >= TAMANHO_TEXTO_LONGO
+
+
+def _cabe_em_float32(serie):
+    # Só reduz a precisão quando todos os valores voltam idênticos do float32 (ex.: fases, idades, notas inteiras)
+    valores = serie.to_numpy()
+    return np.array_equal(valores.astype('float32').astype('float64'), valores, equal_nan=True)
+
+
+def compactar_dataset(df):
+    # Reduz a memória do dataset tipado sem alterar os valores: textos repetidos viram categorias
+    # e indicadores float64 passam a float32 quando a conversão é exata
+    df = df.copy()
+
+    for coluna in df.columns:
+        if df[coluna].dtype == object and _deve_categorizar(df[coluna]):
+            df[coluna] = df[coluna].astype('category')
+        elif df[coluna].dtype == 'float64' and _cabe_em_float32(df[coluna]):
+            df[coluna] = df[coluna].astype('float32')
+
+    return df
+
+
+def relatorio_memoria(antes, depois):
+    # Bytes ocupados por coluna antes e depois da compactação, incluindo o conteúdo das strings
+    relatorio = pd.DataFrame({
+        'tipo_antes': antes.dtypes.astype(str),
+        'tipo_depois': depois.dtypes.astype(str),
+        'bytes_antes': antes.memory_usage(index=False, deep=True),
+        'bytes_depois': depois.memory_usage(index=False, deep=True),
+    })
+    relatorio.index.name = 'coluna'
+    relatorio.loc['TOTAL'] = ['', '', relatorio['bytes_antes'].sum(), relatorio['bytes_depois'].sum()]
+    relatorio['reducao_%'] = (1 - relatorio['bytes_depois'] / relatorio['bytes_antes']) * 100
+    return relatorio
+
+
+def salvar_artefato(df, hash_origem, destino=CAMINHO_ARTEFATO):
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+
+    # O hash do CSV de origem fica nos metadados para detectar artefatos desatualizados
+    metadados = dict(tabela.schema.metadata or {})
+    metadados[b'hash_origem'] = hash_origem.encode('utf-8')
+    metadados[b'versao_artefato'] = VERSAO_ARTEFATO.encode('utf-8')
+    tabela = tabela.replace_schema_metadata(metadados)
+
+    # Sem compressão para que a leitura possa ser feita via memory map
+    destino_tmp = f'{destino}.tmp'
+    feather.write_feather(tabela, destino_tmp, compression='uncompressed')
+    os.replace(destino_tmp, destino)
+
+
+def ler_metadados_artefato(caminho=CAMINHO_ARTEFATO):
+    import pyarrow.ipc as ipc
+
+    with ipc.open_file(caminho) as leitor:
+        metadados = leitor.schema.metadata or {}
+
+    return {chave.decode('utf-8'): valor.decode('utf-8') for chave, valor in metadados.items()}
+
+
+def ler_colunas_artefato(caminho=CAMINHO_ARTEFATO):
+    import pyarrow.ipc as ipc
+
+    # Apenas o esquema do arquivo é lido, sem os dados
+    with ipc.open_file(caminho) as leitor:
+        return leitor.schema.names
+
+
+def artefato_atualizado(hash_origem, caminho=CAMINHO_ARTEFATO):
+    if not os.path.exists(caminho):
+        return False
+
+    try:
+        metadados = ler_metadados_artefato(caminho)
+    except Exception:
+        return False
+
+    return (
+        metadados.get('hash_origem') == hash_origem
+        and metadados.get('versao_artefato') == VERSAO_ARTEFATO
+    )
+
+
+def ler_artefato(caminho=CAMINHO_ARTEFATO, colunas=None):
+    import pyarrow.feather as feather
+
+    # Com `colunas`, apenas essas colunas são lidas do arquivo (projeção colunar)
+    tabela = feather.read_table(caminho, columns=colunas, memory_map=True)
+    return tabela.to_pandas(split_blocks=True)
+
+
+def construir_artefato(origem=CAMINHO_CSV, destino=CAMINHO_ARTEFATO):
+    # Gera o artefato tipado a partir do CSV e retorna o DataFrame resultante
+    hash_origem = hash_arquivo(origem)
+    df = tipar_dataset(ler_csv(origem))
+    salvar_artefato(df, hash_origem, destino)
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Gera o dataset tipado em formato colunar (Feather) a partir do CSV original.'
+    )
+    parser.add_argument('--origem', default=CAMINHO_CSV, help='CSV de origem (separado por ";").')
+    parser.add_argument('--destino', default=CAMINHO_ARTEFATO, help='Arquivo Feather de destino.')
+    parser.add_argument(
+        '--relatorio-memoria', action='store_true',
+        help='Exibe a memória de cada coluna antes e depois da compactação, sem gerar o artefato.'
+    )
+    args = parser.parse_args()
+
+    if args.relatorio_memoria:
+        antes = tipar_dataset(ler_csv(args.origem), compactar=False)
+        with pd.option_context('display.max_rows', None, 'display.width', 200):
+            print(relatorio_memoria(antes, compactar_dataset(antes)))
+        return
+
+    inicio = time.perf_counter()
+    df = construir_artefato(args.origem, args.destino)
+    duracao = time.perf_counter() - inicio
+
+    print(f'Artefato gerado em {args.destino}: {df.shape[0]} linhas, {df.shape[1]} colunas ({duracao:.2f}s).')
+
+
+if __name__ == '__main__':
+    main()
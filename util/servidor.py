@@ -0,0 +1,20 @@
+import sys
+
+from streamlit.web import cli
+
+from util.aquecimento import iniciar_aquecimento
+
+# Script principal do aplicativo, o mesmo de `streamlit run main.py`
+SCRIPT_PRINCIPAL = 'main.py'
+
+
+def main():
+    # Equivalente a `streamlit run main.py [opções]`, mas dispara o aquecimento dos caches assim que o processo
+    # do servidor sobe, antes da primeira visita (com `streamlit run`, ele só começa na primeira sessão)
+    iniciar_aquecimento()
+    sys.argv = ['streamlit', 'run', SCRIPT_PRINCIPAL, *sys.argv[1:]]
+    sys.exit(cli.main())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,311 @@
+import argparse
+import html
+import json
+import os
+import re
+import time
+import unicodedata
+
+from tabs.catalogo import ABAS, separar_referencia
+
+# Pasta padrão do site gerado
+PASTA_SITE = './site_estatico'
+
+# Tempo máximo de uma execução da aba no AppTest (segundos)
+TEMPO_LIMITE = 600
+
+# Bibliotecas do Vega-Lite (gráficos st.line_chart), carregadas da CDN; o plotly.js é copiado para o site
+SCRIPTS_VEGA = [
+    'https://cdn.jsdelivr.net/npm/vega@5',
+    'https://cdn.jsdelivr.net/npm/vega-lite@5',
+    'https://cdn.jsdelivr.net/npm/vega-embed@6',
+]
+
+# Cores da sintaxe :cor[texto] do Streamlit
+CORES_MARKDOWN = {
+    'blue': '#1c83e1', 'orange': '#ff8700', 'green': '#21c354', 'red': '#ff2b2b',
+    'violet': '#803df5', 'gray': '#808495', 'grey': '#808495', 'rainbow': '#ff8700',
+}
+
+# Widgets de escolha única variados na grade de combinações (um widget por vez, cada opção)
+WIDGETS_VARIAVEIS = ('radio', 'selectbox')
+
+# Abas fora da grade de combinações: variar o aluno do perfil publicaria perfis individuais
+ABAS_SEM_COMBINACOES = {'PerfilAlunoTab'}
+
+# Widgets cujo estado é exibido como texto na página estática
+WIDGETS_FILTRO = ('multiselect', 'radio', 'selectbox', 'toggle', 'slider', 'select_slider', 'checkbox')
+
+ESTILO = """
+body { font-family: 'Source Sans Pro', sans-serif; margin: 0 auto; max-width: 1100px; padding: 24px; color: #31333f; }
+nav a { margin-right: 12px; }
+h3 { color: #1c83e1; border-bottom: 2px solid #ff8700; padding-bottom: 4px; }
+.filtros { background: #f0f2f6; border-radius: 6px; padding: 8px 16px; }
+.colunas { display: flex; gap: 16px; }
+.colunas > div { flex: 1; }
+.metrica { font-size: 2em; }
+.delta { color: #21c354; }
+table { border-collapse: collapse; } td, th { border: 1px solid #e6e9ef; padding: 4px 8px; }
+"""
+
+
+def slug_titulo(texto):
+    texto = re.sub(r':\w+:', '', texto)
+    texto = unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode()
+    return re.sub(r'[^a-z0-9]+', '-', texto.lower()).strip('-') or 'aba'
+
+
+def titulo_limpo(titulo):
+    # Título da aba sem os códigos de emoji do Streamlit (:bar_chart: etc.)
+    return re.sub(r':\w+:', '', titulo).strip()
+
+
+def _markdown_para_html(texto):
+    # Subconjunto do markdown usado pelas abas: cores do Streamlit, negrito e quebras de linha (HTML passa direto)
+    texto = re.sub(
+        r':(\w+)\[(.*?)\]',
+        lambda grupo: f'<span style="color:{CORES_MARKDOWN.get(grupo.group(1), grupo.group(1))}">{grupo.group(2)}</span>',
+        texto
+    )
+    texto = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', texto)
+    return texto.replace('\n', '<br>')
+
+
+def _script_aba(modulo, classe):
+    # Script executado pelo AppTest: renderiza uma única aba, como o seletor de pages/dashboards.py
+    import importlib
+
+    import streamlit as st
+
+    getattr(importlib.import_module(modulo), classe)(st.container())
+
+
+def _valor_widget(widget):
+    valor = widget.value
+    if isinstance(valor, (list, tuple)):
+        return ', '.join(str(item) for item in valor)
+    return str(valor)
+
+
+def _especificacao_vega(elemento):
+    # Spec do Vega-Lite com os dados embutidos (o Streamlit envia os dados em Arrow, separados da spec)
+    import pyarrow as pa
+
+    especificacao = json.loads(elemento.proto.spec)
+    especificacao['datasets'] = {
+        dataset.name: json.loads(pa.ipc.open_stream(dataset.data.data).read_pandas().to_json(orient='records'))
+        for dataset in elemento.proto.datasets
+    }
+    return especificacao
+
+
+class _Pagina:
+    # Converte a árvore de elementos de um AppTest em HTML estático
+    def __init__(self, nome, pasta, imagens):
+        self.nome = nome
+        self.pasta = pasta
+        self.imagens = imagens
+        self.graficos = 0
+
+    def _plotly(self, elemento):
+        self.graficos += 1
+        identificador = f'grafico-{self.graficos}'
+        partes = [
+            f'<div id="{identificador}"></div>',
+            f'<script>var spec = {elemento.proto.spec}; '
+            f'Plotly.newPlot("{identificador}", spec.data, spec.layout, {{responsive: true}});</script>',
+        ]
+
+        if self.imagens:
+            import plotly.io as pio
+
+            from util.exportacao import gerar_imagem
+
+            arquivo = f'img/{self.nome}-{self.graficos}.png'
+            with open(os.path.join(self.pasta, arquivo), 'wb') as destino:
+                destino.write(gerar_imagem(pio.from_json(elemento.proto.spec), 'png'))
+            partes.append(f'<noscript><img src="{arquivo}" alt="Gráfico {self.graficos}"></noscript>')
+            partes.append(f'<p><a href="{arquivo}" download>Download do Gráfico (PNG)</a></p>')
+
+        return '\n'.join(partes)
+
+    def _vega(self, elemento):
+        self.graficos += 1
+        identificador = f'grafico-{self.graficos}'
+        return (
+            f'<div id="{identificador}"></div>'
+            f'<script>vegaEmbed("#{identificador}", {json.dumps(_especificacao_vega(elemento))}, '
+            f'{{actions: false}});</script>'
+        )
+
+    def converter(self, no):
+        tipo = getattr(no, 'type', None)
+
+        if tipo in WIDGETS_FILTRO:
+            # Seletores da exportação não fazem sentido na página estática
+            if (no.key or '').startswith('formato_'):
+                return ''
+            return f'<p class="filtros"><strong>{html.escape(no.label.rstrip(":"))}</strong>: {html.escape(_valor_widget(no))}</p>'
+        if tipo == 'markdown':
+            return f'<div>{_markdown_para_html(no.value)}</div>'
+        if tipo in ('header', 'subheader', 'title'):
+            return f'<h3>{_markdown_para_html(no.value)}</h3>'
+        if tipo in ('caption', 'text', 'alert', 'warning', 'info', 'success', 'error'):
+            return f'<p>{html.escape(str(getattr(no, "value", "")))}</p>'
+        if tipo == 'metric':
+            delta = f' <span class="delta">{html.escape(no.delta)}</span>' if no.delta else ''
+            return f'<p class="metrica">{html.escape(no.value)}{delta}</p>'
+        if tipo == 'arrow_data_frame':
+            return no.value.to_html(border=0)
+        if tipo == 'plotly_chart':
+            return self._plotly(no)
+        if tipo == 'arrow_vega_lite_chart':
+            return self._vega(no)
+        if tipo == 'expander':
+            return f'<details open><summary>{html.escape(no.label)}</summary>{self._filhos(no)}</details>'
+        if tipo == 'horizontal':
+            return f'<div class="colunas">{self._filhos(no)}</div>'
+        if hasattr(no, 'children'):
+            return f'<div>{self._filhos(no)}</div>'
+
+        # Botões e downloads dependem do servidor e ficam de fora
+        return ''
+
+    def _filhos(self, no):
+        return '\n'.join(self.converter(filho) for filho in no.children.values())
+
+
+def _documento(titulo, navegacao, corpo, plotly_local=True):
+    scripts = ['plotly.min.js'] if plotly_local else []
+    scripts += SCRIPTS_VEGA
+    cabecalho = '\n'.join(f'<script src="{script}"></script>' for script in scripts)
+    return f"""<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<title>{html.escape(titulo)} | Datathon | FIAP</title>
+{cabecalho}
+<style>{ESTILO}</style>
+</head>
+<body>
+<nav>{navegacao}</nav>
+<h2>{html.escape(titulo)}</h2>
+{corpo}
+</body>
+</html>
+"""
+
+
+def _executar(app):
+    app.run(timeout=TEMPO_LIMITE)
+    if app.exception:
+        raise RuntimeError('; '.join(excecao.value for excecao in app.exception))
+    return app
+
+
+def variantes_filtros(app):
+    # Grade de combinações comuns: cada opção de cada seletor de escolha única, variando um widget por vez
+    variantes = []
+    for tipo in WIDGETS_VARIAVEIS:
+        for indice, widget in enumerate(getattr(app, tipo)):
+            if (widget.key or '').startswith('formato_'):
+                continue
+            for opcao in widget.options:
+                if opcao != widget.value:
+                    variantes.append((tipo, indice, widget.label, opcao))
+    return variantes
+
+
+def renderizar_aba(modulo, classe, variante=None):
+    # Executa a aba no AppTest no estado padrão dos widgets ou com uma variante de variantes_filtros aplicada
+    from streamlit.testing.v1 import AppTest
+
+    app = _executar(AppTest.from_function(_script_aba, args=(modulo, classe), default_timeout=TEMPO_LIMITE))
+    if variante is not None:
+        tipo, indice, _, opcao = variante
+        getattr(app, tipo)[indice].set_value(opcao)
+        _executar(app)
+    return app
+
+
+def construir_site(pasta=PASTA_SITE, abas=None, combinacoes=False, imagens=True):
+    # Renderiza cada aba no estado padrão (e, opcionalmente, na grade de combinações) em HTML estático.
+    # Retorna a lista de páginas geradas com o tempo de cada uma
+    os.makedirs(os.path.join(pasta, 'img'), exist_ok=True)
+
+    import plotly.offline
+    with open(os.path.join(pasta, 'plotly.min.js'), 'w', encoding='utf-8') as arquivo:
+        arquivo.write(plotly.offline.get_plotlyjs())
+
+    selecionadas = [(titulo, referencia) for titulo, referencia in ABAS if not abas or separar_referencia(referencia)[1] in abas]
+    titulos_limpos = {titulo: titulo_limpo(titulo) for titulo, _ in selecionadas}
+    navegacao = ' '.join(
+        f'<a href="{slug_titulo(titulo)}.html">{html.escape(titulos_limpos[titulo])}</a>' for titulo, _ in selecionadas
+    )
+
+    paginas = []
+    for titulo, referencia in selecionadas:
+        modulo, classe = separar_referencia(referencia)
+        nome = slug_titulo(titulo)
+
+        def renderizar(ajuste=None, sufixo=''):
+            inicio = time.perf_counter()
+            app = renderizar_aba(modulo, classe, ajuste)
+            corpo = _Pagina(f'{nome}{sufixo}', pasta, imagens).converter(app.main)
+            return app, corpo, (time.perf_counter() - inicio) * 1000
+
+        app, corpo, tempo_ms = renderizar()
+        variantes = variantes_filtros(app) if combinacoes and classe not in ABAS_SEM_COMBINACOES else []
+
+        links_variantes = ''
+        if variantes:
+            itens = ''.join(
+                f'<li><a href="{nome}--{numero}.html">{html.escape(rotulo)}: {html.escape(str(opcao))}</a></li>'
+                for numero, (_, _, rotulo, opcao) in enumerate(variantes, start=1)
+            )
+            links_variantes = f'<details><summary>Outras combinações de filtros</summary><ul>{itens}</ul></details>'
+
+        with open(os.path.join(pasta, f'{nome}.html'), 'w', encoding='utf-8') as arquivo:
+            arquivo.write(_documento(titulos_limpos[titulo], navegacao, links_variantes + corpo))
+        paginas.append({'pagina': f'{nome}.html', 'aba': classe, 'tempo_ms': tempo_ms})
+
+        for numero, variante in enumerate(variantes, start=1):
+            _, corpo, tempo_ms = renderizar(variante, f'--{numero}')
+            titulo_variante = f'{titulos_limpos[titulo]} ({variante[2]} {variante[3]})'
+            voltar = f'<p><a href="{nome}.html">Voltar ao estado padrão</a></p>'
+            with open(os.path.join(pasta, f'{nome}--{numero}.html'), 'w', encoding='utf-8') as arquivo:
+                arquivo.write(_documento(titulo_variante, navegacao, voltar + corpo))
+            paginas.append({'pagina': f'{nome}--{numero}.html', 'aba': classe, 'tempo_ms': tempo_ms})
+
+    # Página inicial com a lista de dashboards
+    itens = ''.join(
+        f'<li><a href="{slug_titulo(titulo)}.html">{html.escape(titulos_limpos[titulo])}</a></li>' for titulo, _ in selecionadas
+    )
+    with open(os.path.join(pasta, 'index.html'), 'w', encoding='utf-8') as arquivo:
+        arquivo.write(_documento('Dashboards', navegacao, f'<ul>{itens}</ul>'))
+
+    return paginas
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Gera uma versão estática (HTML + Plotly JSON + PNG) dos dashboards no estado padrão de cada aba.'
+    )
+    parser.add_argument('--saida', default=PASTA_SITE, help='Pasta de destino do site.')
+    parser.add_argument('--abas', nargs='+', help='Classes das abas a gerar (padrão: todas).')
+    parser.add_argument(
+        '--combinacoes', action='store_true',
+        help='Gera também uma página para cada opção dos seletores de escolha única (um seletor por vez).'
+    )
+    parser.add_argument('--sem-imagens', action='store_true', help='Não gera as imagens PNG dos gráficos.')
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    paginas = construir_site(args.saida, args.abas, args.combinacoes, imagens=not args.sem_imagens)
+    for pagina in paginas:
+        print(f"{pagina['pagina']}: {pagina['tempo_ms']:.0f} ms")
+    print(f'{len(paginas)} páginas geradas em {args.saida} ({time.perf_counter() - inicio:.1f}s).')
+
+
+if __name__ == '__main__':
+    main()